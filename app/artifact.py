@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# File layout:
+#   MAGIC (8 bytes) | header length (uint64, little-endian) | JSON header | arrays...
+# Every array starts on an ALIGNMENT boundary so it can be viewed in place from a
+# read-only memory map. The header records format version, free-form metadata and
+# the dtype/shape/offset of each array.
+MAGIC = b"PLMBMODL"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sQ")
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def content_hash(arrays: Dict[str, np.ndarray]) -> str:
+    """Short hash identifying the names, types and contents of a set of arrays"""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(json.dumps([name, array.dtype.str, list(array.shape)]).encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def save_artifact(path: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Atomically write arrays and metadata to `path` and return the metadata written.
+
+    The file is written to a temporary sibling and renamed into place, so
+    concurrent readers see either the old artifact or the new one, never a
+    partial file. The metadata gains a `content_hash` of the arrays, which
+    tells artifacts apart even when they carry the same model version.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f"Array {name!r} has object dtype and cannot be memory-mapped")
+    metadata = {**metadata, 'content_hash': content_hash(arrays)}
+
+    # Offsets depend on the header size, which depends on the offsets: iterate until stable
+    header_size = 0
+    while True:
+        offset = _aligned(_PREFIX.size + header_size)
+        entries = {}
+        for name, array in arrays.items():
+            entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps({
+            'format_version': FORMAT_VERSION,
+            'metadata': metadata,
+            'arrays': entries,
+        }).encode('utf-8')
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(path), dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(entries[name]['offset'])
+                f.write(array.tobytes())
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return metadata
+
+
+def read_metadata(path: str) -> Dict[str, Any]:
+    """Read only the header of an artifact"""
+    with open(path, 'rb') as f:
+        return _read_header(f.read(_PREFIX.size), f)[0]['metadata']
+
+
+def _read_header(prefix: bytes, f) -> Tuple[Dict[str, Any], int]:
+    if len(prefix) != _PREFIX.size:
+        raise ValueError("Model artifact is truncated")
+    magic, header_size = _PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ValueError("Not a plumbing classifier model artifact")
+    header = json.loads(f.read(header_size).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format version {header.get('format_version')!r}")
+    return header, header_size
+
+
+def load_artifact(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Memory-map an artifact read-only and return zero-copy array views plus metadata"""
+    with open(path, 'rb') as f:
+        header, _ = _read_header(f.read(_PREFIX.size), f)
+
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        count = int(np.prod(shape, dtype=np.int64))
+        end = entry['offset'] + count * dtype.itemsize
+        if end > mapped.size:
+            raise ValueError(f"Model artifact is truncated (array {name!r})")
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=entry['offset']).reshape(shape)
+    return arrays, header['metadata']
@@ -0,0 +1,138 @@
+import asyncio
+import os
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .metrics import MICROBATCH_FLUSHES, MICROBATCH_SIZE
+
+# Upper bounds of the reported batch size distribution
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """Collects concurrent single classifications into vectorized batches.
+
+    A request is flushed right away while fewer than `max_concurrent_batches`
+    batches are running, so an idle server adds no wait. Once every slot is
+    busy, requests accumulate and are flushed together when a running batch
+    finishes, when `max_batch_size` are waiting, or at the latest
+    `max_wait_seconds` after the first of them arrived. The window therefore
+    grows with load and stays closed when there is none.
+    """
+
+    def __init__(self, classify_batch: Callable[[List[str]], Awaitable[List[Dict[str, Any]]]],
+                 max_batch_size: Optional[int] = None, max_wait_seconds: Optional[float] = None,
+                 max_concurrent_batches: int = 1):
+        self.classify_batch = classify_batch
+        self.max_batch_size = max_batch_size or int(os.getenv("CLASSIFIER_MICROBATCH_MAX_SIZE", "32"))
+        self.max_wait_seconds = max_wait_seconds if max_wait_seconds is not None else \
+            float(os.getenv("CLASSIFIER_MICROBATCH_MAX_WAIT_MS", "2")) / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+
+        # (description, future, enqueued at) for requests not yet flushed
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.running = 0
+        self.batches = 0
+        self.items = 0
+        self.flushes = {'idle': 0, 'full': 0, 'drain': 0, 'timer': 0}
+        self._size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    async def submit(self, description: str) -> Tuple[Dict[str, Any], float]:
+        """Classify one description as part of a batch.
+
+        Returns the result and the seconds the request waited to be flushed.
+        """
+        if not self._pending and self.running < self.max_concurrent_batches:
+            # Idle: classify right here, without a future or task in between
+            self._record_flush('idle', 1)
+            self.running += 1
+            try:
+                return (await self.classify_batch([description]))[0], 0.0
+            finally:
+                self._finished()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((description, future, loop.time()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush('full')
+        elif self.running < self.max_concurrent_batches:
+            self._flush('idle')
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush, 'timer')
+        return await future
+
+    def _record_flush(self, reason: str, size: int):
+        self.flushes[reason] += 1
+        self.batches += 1
+        self.items += size
+        self._size_counts[bisect_left(BATCH_SIZE_BUCKETS, size)] += 1
+        MICROBATCH_FLUSHES.labels(reason).inc()
+        MICROBATCH_SIZE.observe(size)
+
+    def _finished(self):
+        self.running -= 1
+        if self._pending:
+            self._flush('drain')
+
+    def _flush(self, reason: str):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch = self._pending[:self.max_batch_size]
+        del self._pending[:self.max_batch_size]
+        self._record_flush(reason, len(batch))
+
+        self.running += 1
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        # Whatever didn't fit waits for the next flush
+        if self._pending and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_seconds, self._flush, 'timer')
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        flushed_at = asyncio.get_running_loop().time()
+        try:
+            results = await self.classify_batch([description for description, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, enqueued_at), result in zip(batch, results):
+                if not future.done():
+                    future.set_result((result, flushed_at - enqueued_at))
+        finally:
+            self._finished()
+
+    def close(self):
+        """Fail requests that were never flushed"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher closed"))
+
+    def stats(self) -> Dict[str, Any]:
+        bounds = BATCH_SIZE_BUCKETS + (None,)
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_seconds * 1000,
+            'max_concurrent_batches': self.max_concurrent_batches,
+            'pending': len(self._pending),
+            'running': self.running,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'flushes': dict(self.flushes),
+            'batch_sizes': [{'le': bound, 'count': count} for bound, count in zip(bounds, self._size_counts)],
+        }
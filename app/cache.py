@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ClassificationCache:
+    """Bounded LRU/TTL cache for classification results with an optional disk tier.
+
+    The memory tier is an LRU capped at `max_size` entries. When `disk_path` is
+    set, entries are also written to a SQLite file so they survive restarts; a
+    memory miss that hits on disk is promoted back into memory. `serialize` and
+    `deserialize` convert values to and from the text stored on disk.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None,
+                 disk_path: Optional[str] = None,
+                 serialize: Callable[[Any], str] = None, deserialize: Callable[[str], Any] = None,
+                 clock: Callable[[], float] = time.time):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if disk_path and (serialize is None or deserialize is None):
+            raise ValueError("serialize and deserialize are required for the disk tier")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._serialize = serialize
+        self._deserialize = deserialize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'disk_hits': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+        # The SQLite connection is opened lazily per process: a connection must not be
+        # shared across fork(), e.g. when a preloaded classifier is inherited by workers
+        self._disk = None
+        self._disk_pid = None
+        self._inherited_connections = []
+        if disk_path:
+            self._connection()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.disk_path:
+            return None
+        if self._disk is None or self._disk_pid != os.getpid():
+            if self._disk is not None:
+                # Keep the parent's connection alive rather than closing it from the child
+                self._inherited_connections.append(self._disk)
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS classification_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._disk_pid = os.getpid()
+        return self._disk
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+                self._counters['expirations'] += 1
+
+            disk = self._connection()
+            if disk is not None:
+                row = disk.execute(
+                    "SELECT value, created_at FROM classification_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        value = self._deserialize(row[0])
+                        self._store(key, row[1], value)
+                        self._counters['hits'] += 1
+                        self._counters['disk_hits'] += 1
+                        return value
+                    disk.execute("DELETE FROM classification_cache WHERE key = ?", (key,))
+                    self._counters['expirations'] += 1
+
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        """Store a value in memory and, if enabled, on disk"""
+        now = self._clock()
+        with self._lock:
+            self._store(key, now, value)
+            disk = self._connection()
+            if disk is not None:
+                disk.execute(
+                    "INSERT OR REPLACE INTO classification_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, self._serialize(value), now)
+                )
+
+    def _store(self, key: str, created_at: float, value: Any):
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def clear(self):
+        """Drop every cached entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            disk = self._connection()
+            if disk is not None:
+                disk.execute("DELETE FROM classification_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['max_size'] = self.max_size
+        stats['ttl_seconds'] = self.ttl_seconds
+        stats['disk_enabled'] = bool(self.disk_path)
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Close the disk tier"""
+        if self._disk is not None and self._disk_pid == os.getpid():
+            self._disk.close()
+        self._disk = None
@@ -0,0 +1,210 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .artifact import load_artifact, save_artifact
+from .engine import _l2_normalize_rows
+from .keywords import KeywordHits
+from .models import IssueCategory
+
+# Confidence reported when the keyword rules decide the category on their own
+RULE_CONFIDENCE = 0.9
+
+CASCADE_STAGES = ('rules', 'model', 'fallback')
+
+FALLBACK_ARTIFACT_KIND = "char_ngram_logistic_regression"
+NGRAM_RANGE = (2, 5)
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+def fallback_model_path(model_path: str) -> str:
+    """Where the fallback model belonging to a model artifact is stored"""
+    return f"{model_path}.fallback"
+
+
+def rule_category(keyword_hits: KeywordHits, min_hits: int) -> Optional[IssueCategory]:
+    """The category the keyword rules are decisive about, if any.
+
+    Rules decide when at least `min_hits` distinct keywords of one category were
+    found and none of any other category.
+    """
+    category_hits = keyword_hits['category']
+    if len(category_hits) != 1:
+        return None
+    category, keywords = next(iter(category_hits.items()))
+    return category if len(keywords) >= min_hits else None
+
+
+class CharNgramModel:
+    """Logistic regression over character n-gram TF-IDF features.
+
+    Slower than the Naive Bayes scorer but more robust to misspellings, word
+    forms and phrasing it hasn't seen, so it is run only for descriptions the
+    Naive Bayes model is unsure about. Trained with sklearn, then kept as plain
+    arrays like the Naive Bayes scorer so it can be saved next to the model
+    artifact and memory-mapped back.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, coef: np.ndarray, intercept: np.ndarray,
+                 classes: Sequence[str], ngram_range: Tuple[int, int] = NGRAM_RANGE):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes = [str(label) for label in classes]
+        self.ngram_range = tuple(ngram_range)
+        # Feature-major layout so a row of the sparse matrix gathers contiguous memory
+        self._coef_t = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).T)
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[str]) -> "CharNgramModel":
+        """Fit on preprocessed texts"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+
+        pipeline = Pipeline([
+            ('tfidf', TfidfVectorizer(analyzer='char_wb', ngram_range=NGRAM_RANGE, sublinear_tf=True)),
+            ('clf', LogisticRegression(C=10.0, max_iter=1000))
+        ])
+        pipeline.fit(list(texts), list(labels))
+        return cls.from_pipeline(pipeline)
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "CharNgramModel":
+        """Compile a fitted Pipeline([('tfidf', TfidfVectorizer(analyzer='char_wb')), ('clf', LogisticRegression)])"""
+        vectorizer = pipeline.named_steps['tfidf']
+        model = pipeline.named_steps['clf']
+        if len(model.classes_) < 3:
+            raise ValueError("The fallback model needs at least three categories")
+        return cls(
+            vocabulary={term: int(index) for term, index in vectorizer.vocabulary_.items()},
+            idf=vectorizer.idf_,
+            coef=model.coef_,
+            intercept=model.intercept_,
+            classes=model.classes_,
+            ngram_range=vectorizer.ngram_range,
+        )
+
+    def save(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write the model to a memory-mappable artifact and return the metadata written"""
+        terms = [''] * len(self.vocabulary)
+        for term, index in self.vocabulary.items():
+            terms[index] = term
+        max_length = max((len(term) for term in terms), default=1)
+
+        return save_artifact(path, {
+            'vocabulary': np.array(terms, dtype=f'<U{max(max_length, 1)}'),
+            'idf': self.idf,
+            'coef_t': self._coef_t,
+            'intercept': self.intercept,
+            'classes': np.array(self.classes),
+        }, {
+            **(metadata or {}),
+            'kind': FALLBACK_ARTIFACT_KIND,
+            'ngram_range': list(self.ngram_range),
+        })
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["CharNgramModel", Dict[str, Any]]:
+        """Load a model from an artifact; the idf and coefficient arrays stay memory-mapped"""
+        arrays, metadata = load_artifact(path)
+        if metadata.get('kind') != FALLBACK_ARTIFACT_KIND:
+            raise ValueError(f"Model artifact kind {metadata.get('kind')!r} is not {FALLBACK_ARTIFACT_KIND!r}")
+
+        model = cls(
+            vocabulary={term: index for index, term in enumerate(arrays['vocabulary'].tolist())},
+            idf=arrays['idf'],
+            coef=arrays['coef_t'].T,
+            intercept=arrays['intercept'],
+            classes=arrays['classes'].tolist(),
+            ngram_range=tuple(metadata['ngram_range']),
+        )
+        return model, metadata
+
+    def analyze(self, text: str) -> List[str]:
+        """Character n-grams of each word padded with spaces, as sklearn's 'char_wb' analyzer"""
+        min_n, max_n = self.ngram_range
+        ngrams = []
+        for word in _WHITE_SPACES.sub(" ", text.lower()).split():
+            word = f" {word} "
+            length = len(word)
+            for n in range(min_n, max_n + 1):
+                ngrams.extend(word[offset:offset + n] for offset in range(max(length - n + 1, 1)))
+                if length <= n:
+                    # Longer n-grams of a short word are the word itself again
+                    break
+        return ngrams
+
+    def vectorize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Build the l2-normalized sublinear TF-IDF matrix as CSR arrays (indptr, indices, data)"""
+        vocabulary = self.vocabulary
+        indptr = [0]
+        indices: List[int] = []
+        counts: List[float] = []
+
+        for text in texts:
+            row: Dict[int, int] = {}
+            for ngram in self.analyze(text):
+                index = vocabulary.get(ngram)
+                if index is not None:
+                    row[index] = row.get(index, 0) + 1
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+
+        indptr_array = np.asarray(indptr, dtype=np.int64)
+        indices_array = np.asarray(indices, dtype=np.int64)
+        data = (np.log(np.asarray(counts, dtype=np.float64)) + 1.0) * self.idf[indices_array]
+        _l2_normalize_rows(indptr_array, data)
+        return indptr_array, indices_array, data
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Full class probability matrix, in the same column order as `classes`"""
+        indptr, indices, data = self.vectorize(texts)
+        logits = np.tile(self.intercept, (len(indptr) - 1, 1))
+        if data.size:
+            contributions = data[:, None] * self._coef_t[indices]
+            nonempty = np.diff(indptr) > 0
+            logits[nonempty] += np.add.reduceat(contributions, indptr[:-1][nonempty], axis=0)
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities
+
+    def predict(self, texts: Sequence[str]) -> Tuple[List[str], List[float]]:
+        """Best label and its probability for each preprocessed text"""
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [self.classes[index] for index in best], probabilities.max(axis=1).tolist()
+
+
+class CascadeStats:
+    """How often each cascade stage was consulted and answered, and what it cost"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {stage: {'evaluated': 0, 'answered': 0, 'seconds': 0.0} for stage in CASCADE_STAGES}
+
+    def record(self, stage: str, evaluated: int, answered: int, seconds: float):
+        with self._lock:
+            counters = self._stages[stage]
+            counters['evaluated'] += evaluated
+            counters['answered'] += answered
+            counters['seconds'] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {stage: dict(counters) for stage, counters in self._stages.items()}
+        answered = sum(counters['answered'] for counters in stages.values())
+        return {
+            stage: {
+                'evaluated': counters['evaluated'],
+                'answered': counters['answered'],
+                'answered_share': counters['answered'] / answered if answered else 0.0,
+                'mean_ms_per_item': counters['seconds'] / counters['evaluated'] * 1000 if counters['evaluated'] else 0.0,
+                'total_seconds': counters['seconds'],
+            }
+            for stage, counters in stages.items()
+        }
@@ -1,17 +1,117 @@
-import re
+import hashlib
+import json
 import time
-from typing import Dict, List, Tuple, Any
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-import pickle
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple, Any, Optional
 import os
 from .models import IssueCategory, IssueSeverity, IssueUrgency
+from .engine import ARTIFACT_KIND, HASHED_ARTIFACT_KIND, TOKEN_PATTERN, CompiledNBScorer, HashedNBScorer, load_engine
+from .keywords import KeywordHits, KeywordMatcher
+from .cache import ClassificationCache
+from .recommendations import BundleKey, RecommendationBundle, copy_result
+from .cascade import RULE_CONFIDENCE, CascadeStats, CharNgramModel, fallback_model_path, rule_category
+
+MODEL_VERSION = "1.0.0"
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'plumbing_classifier.model'
+)
+
+class _CleanTable(dict):
+    """str.translate table replacing every character that is neither a word nor a
+    whitespace character with a space, as the regex class [^\\w\\s] would. Entries
+    beyond ASCII are added the first time a character is seen."""
 
-class PlumbingIssueClassifier:
     def __init__(self):
+        super().__init__()
+        for codepoint in range(128):
+            self.__missing__(codepoint)
+
+    def __missing__(self, codepoint: int) -> int:
+        char = chr(codepoint)
+        self[codepoint] = value = codepoint if char.isalnum() or char == '_' or char.isspace() else 0x20
+        return value
+
+_CLEAN_TABLE = _CleanTable()
+
+def preprocess_text(text: str) -> str:
+    """Clean text the same way for training and classification"""
+    # Replace special characters with spaces and collapse whitespace
+    return ' '.join(text.translate(_CLEAN_TABLE).split())
+
+def tokenize(text: str) -> Tuple[str, List[str]]:
+    """Lowercase and clean a description once, returning the cleaned text and its tokens.
+    
+    The tokens are exactly what the vectorizer's default token pattern finds in
+    the cleaned text (words of two or more characters), so they can be scored
+    without tokenizing again.
+    """
+    words = text.lower().translate(_CLEAN_TABLE).split()
+    return ' '.join(words), [word for word in words if len(word) > 1]
+
+# Sample training data - in production, this would come from real customer data
+TRAINING_DATA = [
+    ("water is leaking from under the sink", "leak"),
+    ("kitchen sink is clogged and water won't drain", "clog"),
+    ("no hot water coming from faucet", "water_heater"),
+    ("faucet handle is loose and dripping", "faucet"),
+    ("toilet won't flush properly", "toilet"),
+    ("bathroom drain is slow", "drain"),
+    ("pipe burst in basement", "pipe"),
+    ("sewer line is backing up", "sewer"),
+    ("garbage disposal is making noise", "garbage_disposal"),
+    ("water pressure is very low", "water_pressure"),
+    ("sink is making noise", "faucet"),
+    ("no hot water", "water_heater"),
+    ("drain is blocked", "clog"),
+    ("pipe is leaking", "leak"),
+    ("toilet is running", "toilet"),
+    ("shower drain is slow", "drain"),
+    ("water heater is not working", "water_heater"),
+    ("faucet is dripping", "faucet"),
+    ("sewer smell in yard", "sewer"),
+    ("disposal is jammed", "garbage_disposal"),
+    ("pressure is too high", "water_pressure"),
+    ("pipe is frozen", "pipe"),
+    ("drain is overflowing", "clog"),
+    ("water is brown", "water_heater"),
+    ("faucet handle broke", "faucet"),
+    ("toilet is clogged", "toilet"),
+    ("sink is backing up", "drain"),
+    ("main line is blocked", "sewer"),
+    ("disposal won't turn on", "garbage_disposal"),
+    ("pressure regulator failed", "water_pressure"),
+    ("pipe is corroded", "pipe"),
+    ("water is leaking from ceiling", "leak"),
+    ("drain is making gurgling noise", "clog"),
+    ("heater pilot light won't stay lit", "water_heater"),
+    ("faucet aerator is clogged", "faucet"),
+    ("toilet tank is leaking", "toilet"),
+    ("bathroom sink is slow", "drain"),
+    ("sewer cleanout is overflowing", "sewer"),
+    ("disposal is leaking", "garbage_disposal"),
+    ("pressure valve is faulty", "water_pressure"),
+    ("pipe joint is leaking", "pipe"),
+]
+
+class PlumbingIssueClassifier:
+    def __init__(self, cache_size: Optional[int] = None, cache_ttl_seconds: Optional[float] = None,
+                 cache_path: Optional[str] = None, model_path: Optional[str] = None,
+                 model_kind: Optional[str] = None, rule_min_hits: Optional[int] = None,
+                 fallback_threshold: Optional[float] = None):
         self.model = None
         self.vectorizer = None
+        self.engine = None
+        self.model_version = MODEL_VERSION
+        self.model_metadata: Dict[str, Any] = {}
+        # Model version plus the artifact's content hash: what cached results are filed under
+        self._cache_version = MODEL_VERSION
+        self.model_path = model_path or os.getenv("CLASSIFIER_MODEL_PATH") or DEFAULT_MODEL_PATH
+        # Kind of model trained when there is no artifact yet; an existing artifact keeps its own kind
+        self.model_kind = model_kind or os.getenv("CLASSIFIER_MODEL_KIND") or ARTIFACT_KIND
+        if self.model_kind not in (ARTIFACT_KIND, HASHED_ARTIFACT_KIND):
+            raise ValueError(f"Unknown model kind {self.model_kind!r}, expected {ARTIFACT_KIND!r} or {HASHED_ARTIFACT_KIND!r}")
+        self._learn_lock = threading.Lock()
         self.categories = list(IssueCategory)
         self.severity_keywords = {
             IssueSeverity.LOW: ['slow', 'minor', 'small', 'slight', 'drip'],
@@ -38,6 +138,15 @@ class PlumbingIssueClassifier:
             IssueCategory.WATER_PRESSURE: ['pressure', 'low flow', 'weak', 'strong', 'force']
         }
         
+        # All keyword tables compiled into one automaton so a single scan finds every hit.
+        # Keywords are cleaned like descriptions, so e.g. 'non-urgent' matches 'non urgent'
+        self.keyword_matcher = KeywordMatcher({
+            name: {level: [tokenize(keyword)[0] for keyword in keywords] for level, keywords in table.items()}
+            for name, table in (('severity', self.severity_keywords),
+                                ('urgency', self.urgency_keywords),
+                                ('category', self.category_keywords))
+        })
+        
         self.tools_by_category = {
             IssueCategory.LEAK: ['pipe wrench', 'plumber\'s tape', 'soldering torch', 'pipe cutter'],
             IssueCategory.CLOG: ['plunger', 'drain snake', 'auger', 'chemical cleaner'],
@@ -90,66 +199,143 @@ class PlumbingIssueClassifier:
             IssueCategory.WATER_PRESSURE: '1-3 hours'
         }
         
+        # Next steps are composed from the urgency, category and severity tables in that order
+        self.next_steps_by_urgency = {
+            IssueUrgency.EMERGENCY: ["Dispatch emergency technician immediately", "Contact customer to confirm address and access"],
+            IssueUrgency.HIGH: ["Schedule technician within 2-4 hours", "Contact customer to confirm availability"],
+            IssueUrgency.MEDIUM: ["Schedule technician within 24-48 hours", "Send confirmation email to customer"],
+            IssueUrgency.LOW: ["Schedule technician within 24-48 hours", "Send confirmation email to customer"]
+        }
+        
+        self.next_steps_by_category = {
+            IssueCategory.LEAK: ["Instruct customer to turn off water supply if possible", "Prepare leak detection equipment"],
+            IssueCategory.CLOG: ["Bring appropriate drain cleaning tools", "Check if customer has tried DIY solutions"],
+            IssueCategory.WATER_HEATER: ["Bring multimeter and testing equipment", "Check warranty status if applicable"],
+            IssueCategory.SEWER: ["Bring sewer camera and rooter equipment", "Check for city sewer line responsibility"]
+        }
+        
+        self.next_steps_by_severity = {
+            IssueSeverity.HIGH: ["Bring backup technician if needed", "Prepare for potential emergency parts ordering"],
+            IssueSeverity.CRITICAL: ["Bring backup technician if needed", "Prepare for potential emergency parts ordering"]
+        }
+        
+        # Every (category, severity, urgency) combination, so a result is one table lookup
+        self.recommendations: Dict[BundleKey, RecommendationBundle] = self._build_recommendations()
+        
         self._load_or_train_model()
+        
+        # Optional cascade around the model: keyword rules answer first when decisive, and a
+        # heavier character n-gram model re-checks predictions below the confidence threshold,
+        # answering instead when it is more confident
+        if rule_min_hits is None:
+            rule_min_hits = int(os.getenv("CLASSIFIER_RULE_MIN_HITS", "0"))
+        if fallback_threshold is None and os.getenv("CLASSIFIER_FALLBACK_THRESHOLD"):
+            fallback_threshold = float(os.getenv("CLASSIFIER_FALLBACK_THRESHOLD"))
+        self.rule_min_hits = rule_min_hits
+        self.fallback_threshold = fallback_threshold
+        self.fallback_model = None
+        self.fallback_metadata: Dict[str, Any] = {}
+        if fallback_threshold is not None:
+            self._load_or_train_fallback_model()
+        self.cascade_stats = CascadeStats()
+        # Cached results depend on the cascade settings as well as on the model
+        self._cache_variant = "".join([
+            f"+rules{rule_min_hits}" if rule_min_hits else "",
+            f"+fallback{fallback_threshold}#{self.fallback_metadata.get('content_hash', '')}"
+            if self.fallback_model is not None else "",
+        ])
+        
+        # Result cache keyed on the preprocessed description and model version
+        if cache_size is None:
+            cache_size = int(os.getenv("CLASSIFIER_CACHE_SIZE", "1024"))
+        if cache_ttl_seconds is None and os.getenv("CLASSIFIER_CACHE_TTL_SECONDS"):
+            cache_ttl_seconds = float(os.getenv("CLASSIFIER_CACHE_TTL_SECONDS"))
+        if cache_path is None:
+            cache_path = os.getenv("CLASSIFIER_CACHE_PATH") or None
+        
+        self.cache = None
+        if cache_size > 0:
+            self.cache = ClassificationCache(
+                max_size=cache_size,
+                ttl_seconds=cache_ttl_seconds,
+                disk_path=cache_path,
+                serialize=self._serialize_result,
+                deserialize=self._deserialize_result
+            )
     
     def _load_or_train_model(self):
-        """Load pre-trained model or train a new one with sample data"""
-        model_path = 'plumbing_classifier_model.pkl'
-        
-        if os.path.exists(model_path):
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
-        else:
-            self._train_model()
+        """Load the model artifact, or train a new one with sample data and save it"""
+        if os.path.exists(self.model_path):
+            # A broken or incompatible artifact is an error, not a reason to retrain over it
+            self.engine, self.model_metadata = load_engine(self.model_path)
+            self._set_model_version(self.model_metadata.get('model_version', MODEL_VERSION))
+            return
+        
+        self._train_model()
+        try:
+            self.model_metadata = self.save_model(self.model_path)
+            self._set_model_version(self.model_version)
+        except OSError as e:
+            print(f"⚠️  Could not save model artifact to {self.model_path}: {e}")
+    
+    def _load_or_train_fallback_model(self):
+        """Load the fallback model saved next to the artifact, or train it on the data the artifact came from.
+        
+        A saved fallback model is only used with the artifact it was trained
+        alongside. The sample data can be trained on here; an artifact trained by
+        train.py needs its fallback model from `train.py --fallback`, and without
+        one the fallback stage stays off.
+        """
+        path = fallback_model_path(self.model_path)
+        content_hash = self.model_metadata.get('content_hash')
+        if os.path.exists(path):
+            model, metadata = CharNgramModel.load(path)
+            if content_hash and metadata.get('base_content_hash') == content_hash:
+                self.fallback_model, self.fallback_metadata = model, metadata
+                return
+        
+        if 'training_sources' in self.model_metadata:
+            print(f"⚠️  No fallback model trained with {self.model_path} (train.py --fallback); the fallback stage is off")
+            return
+        
+        texts, labels = zip(*TRAINING_DATA)
+        self.fallback_model = CharNgramModel.train([self._preprocess_text(text.lower()) for text in texts], labels)
+        if content_hash:
+            try:
+                self.fallback_metadata = self.fallback_model.save(path, {
+                    'created_at': datetime.now().isoformat(),
+                    'training_examples': len(texts),
+                    'base_content_hash': content_hash,
+                })
+            except OSError as e:
+                print(f"⚠️  Could not save fallback model to {path}: {e}")
+    
+    def save_model(self, path: str) -> Dict[str, Any]:
+        """Atomically write the compiled model to a versioned, memory-mappable artifact"""
+        return self.engine.save(path, self.model_metadata)
+    
+    def _set_model_version(self, model_version: str):
+        """Set the reported model version and, with the current metadata, the cache version"""
+        # Artifacts trained elsewhere may share a version string; their content hash tells them apart
+        self._cache_version = f"{model_version}#{self.model_metadata.get('content_hash', '')}"
+        self.model_version = model_version
     
     def _train_model(self):
         """Train the classifier with sample plumbing issue data"""
-        # Sample training data - in production, this would come from real customer data
-        training_data = [
-            ("water is leaking from under the sink", "leak"),
-            ("kitchen sink is clogged and water won't drain", "clog"),
-            ("no hot water coming from faucet", "water_heater"),
-            ("faucet handle is loose and dripping", "faucet"),
-            ("toilet won't flush properly", "toilet"),
-            ("bathroom drain is slow", "drain"),
-            ("pipe burst in basement", "pipe"),
-            ("sewer line is backing up", "sewer"),
-            ("garbage disposal is making noise", "garbage_disposal"),
-            ("water pressure is very low", "water_pressure"),
-            ("sink is making noise", "faucet"),
-            ("no hot water", "water_heater"),
-            ("drain is blocked", "clog"),
-            ("pipe is leaking", "leak"),
-            ("toilet is running", "toilet"),
-            ("shower drain is slow", "drain"),
-            ("water heater is not working", "water_heater"),
-            ("faucet is dripping", "faucet"),
-            ("sewer smell in yard", "sewer"),
-            ("disposal is jammed", "garbage_disposal"),
-            ("pressure is too high", "water_pressure"),
-            ("pipe is frozen", "pipe"),
-            ("drain is overflowing", "clog"),
-            ("water is brown", "water_heater"),
-            ("faucet handle broke", "faucet"),
-            ("toilet is clogged", "toilet"),
-            ("sink is backing up", "drain"),
-            ("main line is blocked", "sewer"),
-            ("disposal won't turn on", "garbage_disposal"),
-            ("pressure regulator failed", "water_pressure"),
-            ("pipe is corroded", "pipe"),
-            ("water is leaking from ceiling", "leak"),
-            ("drain is making gurgling noise", "clog"),
-            ("heater pilot light won't stay lit", "water_heater"),
-            ("faucet aerator is clogged", "faucet"),
-            ("toilet tank is leaking", "toilet"),
-            ("bathroom sink is slow", "drain"),
-            ("sewer cleanout is overflowing", "sewer"),
-            ("disposal is leaking", "garbage_disposal"),
-            ("pressure valve is faulty", "water_pressure"),
-            ("pipe joint is leaking", "pipe"),
-        ]
-        
-        texts, labels = zip(*training_data)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+        
+        
+        texts, labels = zip(*TRAINING_DATA)
+        
+        if self.model_kind == HASHED_ARTIFACT_KIND:
+            # Incrementally trainable variant: every category is a class so feedback can teach any of them
+            self.engine = HashedNBScorer.empty([category.value for category in IssueCategory]).partial_fit(
+                [self._preprocess_text(text.lower()) for text in texts], labels
+            )
+            self._set_trained_metadata(len(texts))
+            return
         
         # Create and train the pipeline
         self.model = Pipeline([
@@ -159,117 +345,278 @@ class PlumbingIssueClassifier:
         
         self.model.fit(texts, labels)
         
-        # Save the model
-        with open('plumbing_classifier_model.pkl', 'wb') as f:
-            pickle.dump(self.model, f)
+        # Compile the fitted pipeline into the NumPy-only scorer used at inference time
+        self.engine = CompiledNBScorer.from_pipeline(self.model)
+        self._set_trained_metadata(len(texts))
+    
+    def _set_trained_metadata(self, training_examples: int):
+        self.model_metadata = {
+            'model_version': MODEL_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'training_examples': training_examples,
+        }
+        self._set_model_version(MODEL_VERSION)
+    
+    @property
+    def supports_online_learning(self) -> bool:
+        """Whether the loaded model can learn from feedback without retraining"""
+        return isinstance(self.engine, HashedNBScorer)
+    
+    def learn(self, descriptions: List[str], categories: List[IssueCategory]) -> str:
+        """Incrementally train the model on corrected examples and return the new model version.
+        
+        The update is computed on a copy and swapped in, so classifications in
+        progress finish on the previous model. Results cached under the previous
+        model version are no longer served. The version ends in a digest chained
+        over everything learned since the artifact, so models that learned
+        different feedback never share a version.
+        """
+        if not self.supports_online_learning:
+            raise ValueError(f"Model kind {self.model_metadata.get('kind', ARTIFACT_KIND)!r} does not support online learning")
+        
+        cleaned_descriptions = [self._preprocess_text(description.lower()) for description in descriptions]
+        labels = [IssueCategory(category).value for category in categories]
+        with self._learn_lock:
+            engine = self.engine.partial_fit(cleaned_descriptions, labels)
+            feedback_examples = self.model_metadata.get('feedback_examples', 0) + len(labels)
+            base_version = self.model_metadata.get('base_model_version', self.model_version)
+            digest = hashlib.sha256(
+                (self.model_metadata.get('feedback_digest') or self.model_metadata.get('content_hash', '')).encode('utf-8')
+            )
+            for description, label in zip(cleaned_descriptions, labels):
+                digest.update(f"{label}\x00{description}\x00".encode('utf-8'))
+            feedback_digest = digest.hexdigest()[:16]
+            model_version = f"{base_version}+feedback.{feedback_examples}.{feedback_digest[:8]}"
+            # The learned model no longer matches the artifact it was loaded from
+            metadata = {key: value for key, value in self.model_metadata.items() if key != 'content_hash'}
+            self.model_metadata = {
+                **metadata,
+                'model_version': model_version,
+                'base_model_version': base_version,
+                'feedback_examples': feedback_examples,
+                'feedback_digest': feedback_digest,
+                'updated_at': datetime.now().isoformat(),
+            }
+            self.engine = engine
+            self._set_model_version(model_version)
+        return model_version
     
-    def classify_issue(self, description: str) -> Dict[str, Any]:
+    def classify_issue(self, description: str, use_cache: bool = True) -> Dict[str, Any]:
         """Classify a plumbing issue based on the description"""
-        start_time = time.time()
-        
-        # Clean and preprocess the description
-        cleaned_description = self._preprocess_text(description.lower())
-        
-        # Predict category
-        predicted_category = self.model.predict([cleaned_description])[0]
-        confidence = max(self.model.predict_proba([cleaned_description])[0])
-        
-        # Determine severity and urgency
-        severity = self._determine_severity(cleaned_description)
-        urgency = self._determine_urgency(cleaned_description)
-        
-        # Get category enum
-        category_enum = IssueCategory(predicted_category)
-        
-        # Get recommendations
-        tools = self.tools_by_category.get(category_enum, [])
-        parts = self.parts_by_category.get(category_enum, [])
-        safety_notes = self.safety_notes_by_category.get(category_enum, [])
-        duration = self.duration_estimates.get(category_enum, '1-2 hours')
-        
-        # Generate next steps
-        next_steps = self._generate_next_steps(category_enum, severity, urgency)
-        
-        processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-        
-        return {
-            'category': category_enum,
-            'confidence': confidence,
-            'severity': severity,
-            'urgency': urgency,
-            'estimated_duration': duration,
-            'required_tools': tools,
-            'recommended_parts': parts,
-            'safety_notes': safety_notes,
-            'next_steps': next_steps,
-            'processing_time_ms': processing_time
+        return self.classify_batch([description], use_cache=use_cache)[0]
+    
+    def classify_batch(self, descriptions: List[str], use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Classify several plumbing issues with a single vectorizer/model pass.
+        
+        Each result carries `processing_time_ms` (the batch time shared evenly across
+        it) and `stage_timings`, the seconds the whole batch spent in each stage; the
+        latter dict is shared by every result of the batch.
+        """
+        if not descriptions:
+            return []
+        
+        clock = time.perf_counter
+        started = clock()
+        
+        # Clean and tokenize every description once; the tokens feed the vectorizer
+        # and the cleaned text the cache key and keyword rules
+        prepared = [tokenize(description) for description in descriptions]
+        preprocessed = clock()
+        
+        # Serve what we can from the cache; identical misses are only computed once
+        cache = self.cache if use_cache else None
+        # Keys are taken once so a model update mid-batch can't file results under the new version
+        cache_version = self._cache_version
+        results: List[Optional[Dict[str, Any]]] = [None] * len(descriptions)
+        missing: Dict[str, List[int]] = {}
+        tokens_by_text: Dict[str, List[str]] = {}
+        for index, (cleaned_description, tokens) in enumerate(prepared):
+            cached = cache.get(self._cache_key(cleaned_description, cache_version)) if cache is not None else None
+            if cached is not None:
+                # Callers get their own lists, so changing a result can't change the cached one
+                results[index] = copy_result(cached)
+            else:
+                missing.setdefault(cleaned_description, []).append(index)
+                tokens_by_text[cleaned_description] = tokens
+        looked_up = clock()
+        
+        vectorize_seconds = predict_seconds = keyword_seconds = fallback_seconds = recommendation_seconds = 0.0
+        if missing:
+            texts = list(missing)
+            count = len(texts)
+            categories: List[Optional[str]] = [None] * count
+            confidences: List[float] = [0.0] * count
+            
+            # One keyword scan per description gives severity, urgency and the rule stage's answer
+            levels = []
+            rule_seconds = 0.0
+            for position, cleaned_description in enumerate(texts):
+                keyword_hits = self.keyword_matcher.scan(cleaned_description)
+                levels.append(self._determine_levels(cleaned_description, keyword_hits))
+                if self.rule_min_hits:
+                    rule_started = clock()
+                    category = rule_category(keyword_hits, self.rule_min_hits)
+                    if category is not None:
+                        categories[position] = category.value
+                        confidences[position] = RULE_CONFIDENCE
+                    rule_seconds += clock() - rule_started
+            keyword_done = clock()
+            keyword_seconds = keyword_done - looked_up
+            undecided = [position for position in range(count) if categories[position] is None]
+            if self.rule_min_hits:
+                self.cascade_stats.record('rules', count, count - len(undecided), rule_seconds)
+            
+            if undecided:
+                # Predict the remaining categories with one sparse dot product
+                engine = self.engine
+                if engine.token_pattern == TOKEN_PATTERN:
+                    vectorized = engine.vectorize_tokens([tokens_by_text[texts[position]] for position in undecided])
+                else:
+                    vectorized = engine.vectorize([texts[position] for position in undecided])
+                vectorize_done = clock()
+                predicted, scores = engine.score(*vectorized)
+                predict_done = clock()
+                vectorize_seconds = vectorize_done - keyword_done
+                predict_seconds = predict_done - vectorize_done
+                for position, category, confidence in zip(undecided, predicted, scores):
+                    categories[position] = category
+                    confidences[position] = confidence
+                
+                unsure = []
+                if self.fallback_model is not None:
+                    unsure = [position for position in undecided if confidences[position] < self.fallback_threshold]
+                overruled = 0
+                if unsure:
+                    # The fallback's answer is kept only where it is more confident than the model's
+                    predicted, scores = self.fallback_model.predict([texts[position] for position in unsure])
+                    for position, category, confidence in zip(unsure, predicted, scores):
+                        if confidence > confidences[position]:
+                            categories[position] = category
+                            confidences[position] = confidence
+                            overruled += 1
+                    fallback_seconds = clock() - predict_done
+                    self.cascade_stats.record('fallback', len(unsure), overruled, fallback_seconds)
+                self.cascade_stats.record('model', len(undecided), len(undecided) - overruled,
+                                          vectorize_seconds + predict_seconds)
+            
+            recommendation_started = clock()
+            for cleaned_description, category, confidence, (severity, urgency) in zip(texts, categories, confidences, levels):
+                result = self.recommendations[(IssueCategory(category), severity, urgency)].result(confidence)
+                if cache is not None:
+                    cache.put(self._cache_key(cleaned_description, cache_version), result)
+                for index in missing[cleaned_description]:
+                    results[index] = copy_result(result)
+            recommendation_seconds = clock() - recommendation_started
+        
+        finished = clock()
+        stage_timings = {
+            'preprocess': preprocessed - started,
+            'cache_lookup': looked_up - preprocessed,
+            'vectorize': vectorize_seconds,
+            'predict': predict_seconds,
+            'keyword_match': keyword_seconds,
+            'recommendation': recommendation_seconds,
         }
+        if self.fallback_model is not None:
+            stage_timings['fallback'] = fallback_seconds
+        
+        # Processing time is shared evenly across the batch
+        processing_time = (finished - started) * 1000 / len(descriptions)  # Convert to milliseconds
+        for result in results:
+            result['processing_time_ms'] = processing_time
+            result['stage_timings'] = stage_timings
+        
+        return results
+    
+    def _cache_key(self, cleaned_description: str, cache_version: Optional[str] = None) -> str:
+        """Cache key for a preprocessed description under a model's cache version (default: current)"""
+        return f"{cache_version or self._cache_version}{self._cache_variant}\x00{cleaned_description}"
+    
+    def _serialize_result(self, result: Dict[str, Any]) -> str:
+        """Encode a classification result for the disk cache tier"""
+        bundle = self.recommendations[(result['category'], result['severity'], result['urgency'])]
+        return bundle.classification_json(result['confidence'])
+    
+    def _deserialize_result(self, data: str) -> Dict[str, Any]:
+        """Decode a classification result stored by the disk cache tier"""
+        # Recommendations come from the current tables, only the prediction is read back
+        stored = json.loads(data)
+        key = (IssueCategory(stored['category']), IssueSeverity(stored['severity']), IssueUrgency(stored['urgency']))
+        return self.recommendations[key].result(stored['confidence'])
+    
+    def warm_up_cache(self, log_path: str, field: str = "description", batch_size: int = 256,
+                      limit: Optional[int] = None) -> int:
+        """Prime the cache from a JSONL request log, returning how many descriptions were classified"""
+        if self.cache is None:
+            return 0
+        
+        warmed = 0
+        batch: List[str] = []
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if limit is not None and warmed + len(batch) >= limit:
+                    break
+                try:
+                    description = json.loads(line).get(field)
+                except (ValueError, AttributeError):
+                    continue
+                if not isinstance(description, str) or not description.strip():
+                    continue
+                batch.append(description)
+                if len(batch) >= batch_size:
+                    warmed += len(self.classify_batch(batch))
+                    batch = []
+        if batch:
+            warmed += len(self.classify_batch(batch))
+        return warmed
+    
+    def _determine_levels(self, cleaned_description: str, keyword_hits: KeywordHits) -> Tuple[IssueSeverity, IssueUrgency]:
+        """Severity and urgency from a single keyword scan"""
+        return (
+            self._determine_severity(cleaned_description, keyword_hits),
+            self._determine_urgency(cleaned_description, keyword_hits)
+        )
+    
+    def _build_recommendations(self) -> Dict[BundleKey, RecommendationBundle]:
+        """Precompute the recommendation bundle for every category, severity and urgency"""
+        recommendations = {}
+        for category in IssueCategory:
+            for severity in IssueSeverity:
+                for urgency in IssueUrgency:
+                    recommendations[(category, severity, urgency)] = RecommendationBundle.build(
+                        category, severity, urgency,
+                        estimated_duration=self.duration_estimates.get(category, '1-2 hours'),
+                        required_tools=self.tools_by_category.get(category, []),
+                        recommended_parts=self.parts_by_category.get(category, []),
+                        safety_notes=self.safety_notes_by_category.get(category, []),
+                        next_steps=self._generate_next_steps(category, severity, urgency)
+                    )
+        return recommendations
     
     def _preprocess_text(self, text: str) -> str:
         """Clean and preprocess the input text"""
-        # Remove special characters and extra whitespace
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return preprocess_text(text)
     
-    def _determine_severity(self, text: str) -> IssueSeverity:
-        """Determine issue severity based on keywords"""
-        text_lower = text.lower()
-        
-        for severity, keywords in self.severity_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return severity
+    def _determine_severity(self, text: str, keyword_hits: KeywordHits = None) -> IssueSeverity:
+        """Determine issue severity based on keywords, highest matching level wins"""
+        if keyword_hits is None:
+            keyword_hits = self.keyword_matcher.scan(tokenize(text)[0])
         
         # Default to medium if no specific keywords found
-        return IssueSeverity.MEDIUM
+        return KeywordMatcher.highest_level(keyword_hits['severity'], list(IssueSeverity), IssueSeverity.MEDIUM)
     
-    def _determine_urgency(self, text: str) -> IssueUrgency:
-        """Determine issue urgency based on keywords"""
-        text_lower = text.lower()
-        
-        for urgency, keywords in self.urgency_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return urgency
+    def _determine_urgency(self, text: str, keyword_hits: KeywordHits = None) -> IssueUrgency:
+        """Determine issue urgency based on keywords, highest matching level wins"""
+        if keyword_hits is None:
+            keyword_hits = self.keyword_matcher.scan(tokenize(text)[0])
         
         # Default to medium if no specific keywords found
-        return IssueUrgency.MEDIUM
+        return KeywordMatcher.highest_level(keyword_hits['urgency'], list(IssueUrgency), IssueUrgency.MEDIUM)
     
     def _generate_next_steps(self, category: IssueCategory, severity: IssueSeverity, urgency: IssueUrgency) -> List[str]:
         """Generate appropriate next steps based on classification"""
-        steps = []
-        
-        # Emergency steps
-        if urgency == IssueUrgency.EMERGENCY:
-            steps.append("Dispatch emergency technician immediately")
-            steps.append("Contact customer to confirm address and access")
-        
-        # High urgency steps
-        elif urgency == IssueUrgency.HIGH:
-            steps.append("Schedule technician within 2-4 hours")
-            steps.append("Contact customer to confirm availability")
-        
-        # Standard steps
-        else:
-            steps.append("Schedule technician within 24-48 hours")
-            steps.append("Send confirmation email to customer")
-        
-        # Category-specific steps
-        if category == IssueCategory.LEAK:
-            steps.append("Instruct customer to turn off water supply if possible")
-            steps.append("Prepare leak detection equipment")
-        elif category == IssueCategory.CLOG:
-            steps.append("Bring appropriate drain cleaning tools")
-            steps.append("Check if customer has tried DIY solutions")
-        elif category == IssueCategory.WATER_HEATER:
-            steps.append("Bring multimeter and testing equipment")
-            steps.append("Check warranty status if applicable")
-        elif category == IssueCategory.SEWER:
-            steps.append("Bring sewer camera and rooter equipment")
-            steps.append("Check for city sewer line responsibility")
-        
-        # Severity-specific steps
-        if severity in [IssueSeverity.HIGH, IssueSeverity.CRITICAL]:
-            steps.append("Bring backup technician if needed")
-            steps.append("Prepare for potential emergency parts ordering")
-        
-        return steps 
\ No newline at end of file
+        return (
+            self.next_steps_by_urgency[urgency]
+            + self.next_steps_by_category.get(category, [])
+            + self.next_steps_by_severity.get(severity, [])
+        )
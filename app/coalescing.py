@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class RequestCoalescer:
+    """Single-flight execution of identical concurrent requests.
+
+    The first caller for a key starts the computation; callers arriving with the
+    same key while it runs wait for it and receive the same result object (or
+    exception) instead of computing it again. The computation runs in its own
+    task, so a caller that disconnects doesn't cancel it for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.computed = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return the result for `key` and whether it was shared from an earlier caller"""
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.computed += 1
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # Retrieve the exception so it isn't reported as unhandled when every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.computed + self.coalesced
+        return {
+            'in_flight': len(self._in_flight),
+            'computed': self.computed,
+            'coalesced': self.coalesced,
+            'coalesced_ratio': self.coalesced / requests if requests else 0.0,
+        }
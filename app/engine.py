@@ -0,0 +1,304 @@
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .artifact import load_artifact, read_metadata, save_artifact
+
+ARTIFACT_KIND = "tfidf_multinomial_nb"
+HASHED_ARTIFACT_KIND = "hashed_multinomial_nb"
+# Words of two or more characters, as in sklearn's TfidfVectorizer
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+def _l2_normalize_rows(indptr: np.ndarray, data: np.ndarray):
+    """l2-normalize each row of a CSR matrix in place; empty rows stay all-zero"""
+    if data.size:
+        row_lengths = np.diff(indptr)
+        nonempty = row_lengths > 0
+        norms = np.zeros(len(row_lengths))
+        norms[nonempty] = np.sqrt(np.add.reduceat(data * data, indptr[:-1][nonempty]))
+        data /= np.repeat(norms, row_lengths)
+
+
+class CompiledNBScorer:
+    """NumPy-only scorer compiled from a trained TF-IDF + MultinomialNB pipeline.
+
+    Keeps only the fitted arrays (vocabulary, idf and NB log probabilities) and
+    scores a batch with one sparse dot product, so the label and confidence come
+    from a single pass without sklearn's per-call validation.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, feature_log_prob: np.ndarray,
+                 class_log_prior: np.ndarray, classes: Sequence[str],
+                 token_pattern: str = TOKEN_PATTERN, lowercase: bool = True):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.feature_log_prob = np.asarray(feature_log_prob, dtype=np.float64)
+        self.class_log_prior = np.asarray(class_log_prior, dtype=np.float64)
+        self.classes = [str(label) for label in classes]
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self._token_regex = re.compile(token_pattern)
+        # Feature-major layout so a row of the sparse matrix gathers contiguous memory
+        self._feature_log_prob_t = np.ascontiguousarray(self.feature_log_prob.T)
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "CompiledNBScorer":
+        """Compile a fitted Pipeline([('tfidf', TfidfVectorizer), ('clf', MultinomialNB)])"""
+        vectorizer = pipeline.named_steps['tfidf']
+        model = pipeline.named_steps['clf']
+
+        unsupported = []
+        if vectorizer.analyzer != 'word':
+            unsupported.append(f"analyzer={vectorizer.analyzer!r}")
+        if tuple(vectorizer.ngram_range) != (1, 1):
+            unsupported.append(f"ngram_range={vectorizer.ngram_range!r}")
+        if vectorizer.sublinear_tf or not vectorizer.use_idf or vectorizer.norm != 'l2':
+            unsupported.append("tf/idf weighting other than raw counts, idf and l2 norm")
+        if vectorizer.binary:
+            unsupported.append("binary=True")
+        if np.dtype(vectorizer.dtype) != np.float64:
+            unsupported.append(f"dtype={np.dtype(vectorizer.dtype).name}")
+        if vectorizer.preprocessor is not None or vectorizer.tokenizer is not None or vectorizer.strip_accents:
+            unsupported.append("custom preprocessor, tokenizer or accent stripping")
+        if unsupported:
+            raise ValueError(f"Cannot compile vectorizer with {', '.join(unsupported)}")
+
+        return cls(
+            vocabulary={term: int(index) for term, index in vectorizer.vocabulary_.items()},
+            idf=vectorizer.idf_,
+            feature_log_prob=model.feature_log_prob_,
+            class_log_prior=model.class_log_prior_,
+            classes=model.classes_,
+            token_pattern=vectorizer.token_pattern,
+            lowercase=vectorizer.lowercase,
+        )
+
+    def save(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write the scorer to a memory-mappable model artifact and return the metadata written"""
+        terms = [''] * len(self.vocabulary)
+        for term, index in self.vocabulary.items():
+            terms[index] = term
+        max_length = max((len(term) for term in terms), default=1)
+        
+        return save_artifact(path, {
+            'vocabulary': np.array(terms, dtype=f'<U{max(max_length, 1)}'),
+            'idf': self.idf,
+            # Stored feature-major so loading needs no transpose copy
+            'feature_log_prob_t': self._feature_log_prob_t,
+            'class_log_prior': self.class_log_prior,
+            'classes': np.array(self.classes),
+        }, {
+            **(metadata or {}),
+            'kind': ARTIFACT_KIND,
+            'token_pattern': self.token_pattern,
+            'lowercase': self.lowercase,
+        })
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["CompiledNBScorer", Dict[str, Any]]:
+        """Load a scorer from a model artifact; the NB and idf arrays stay memory-mapped"""
+        arrays, metadata = load_artifact(path)
+        if metadata.get('kind') != ARTIFACT_KIND:
+            raise ValueError(f"Model artifact kind {metadata.get('kind')!r} is not {ARTIFACT_KIND!r}")
+        
+        scorer = cls(
+            vocabulary={term: index for index, term in enumerate(arrays['vocabulary'].tolist())},
+            idf=arrays['idf'],
+            feature_log_prob=arrays['feature_log_prob_t'].T,
+            class_log_prior=arrays['class_log_prior'],
+            classes=arrays['classes'].tolist(),
+            token_pattern=metadata['token_pattern'],
+            lowercase=metadata['lowercase'],
+        )
+        return scorer, metadata
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split a text into tokens with the artifact's token pattern"""
+        return self._token_regex.findall(text.lower() if self.lowercase else text)
+
+    def vectorize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Build the l2-normalized TF-IDF matrix as CSR arrays (indptr, indices, data)"""
+        return self.vectorize_tokens([self.tokenize(text) for text in texts])
+
+    def vectorize_tokens(self, token_lists: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Like `vectorize`, for texts already split into (lowercase) tokens"""
+        vocabulary = self.vocabulary
+        indptr = [0]
+        indices: List[int] = []
+        counts: List[float] = []
+
+        for tokens in token_lists:
+            row: Dict[int, int] = {}
+            for token in tokens:
+                index = vocabulary.get(token)
+                if index is not None:
+                    row[index] = row.get(index, 0) + 1
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+
+        indptr_array = np.asarray(indptr, dtype=np.int64)
+        indices_array = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(counts, dtype=np.float64) * self.idf[indices_array]
+        _l2_normalize_rows(indptr_array, data)
+        return indptr_array, indices_array, data
+
+    def joint_log_likelihood(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray) -> np.ndarray:
+        """Compute X @ feature_log_prob.T + class_log_prior for a CSR matrix"""
+        n_rows = len(indptr) - 1
+        jll = np.tile(self.class_log_prior, (n_rows, 1))
+        if data.size:
+            contributions = data[:, None] * self._feature_log_prob_t[indices]
+            nonempty = np.diff(indptr) > 0
+            jll[nonempty] += np.add.reduceat(contributions, indptr[:-1][nonempty], axis=0)
+        return jll
+
+    def score(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray) -> Tuple[List[str], List[float]]:
+        """Return the best label and its probability for each row of a vectorized batch"""
+        jll = self.joint_log_likelihood(indptr, indices, data)
+        best = jll.argmax(axis=1)
+        # max softmax probability == 1 / sum(exp(jll - max(jll)))
+        shifted = jll - jll[np.arange(len(best)), best][:, None]
+        confidences = 1.0 / np.exp(shifted).sum(axis=1)
+        classes = self.classes
+        return [classes[index] for index in best], confidences.tolist()
+
+    def predict(self, texts: Sequence[str]) -> Tuple[List[str], List[float]]:
+        """Vectorize and score a batch of texts in a single pass"""
+        return self.score(*self.vectorize(texts))
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Full class probability matrix, in the same column order as `classes`"""
+        jll = self.joint_log_likelihood(*self.vectorize(texts))
+        jll -= jll.max(axis=1, keepdims=True)
+        probabilities = np.exp(jll)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities
+
+
+class HashedNBScorer(CompiledNBScorer):
+    """Multinomial NB over a hashed feature space that can be updated incrementally.
+
+    Tokens are hashed (crc32) into `n_features` buckets, so examples with new words
+    need no vocabulary refit. The raw per-class feature and class counts are kept,
+    which makes `partial_fit` an exact incremental update. `partial_fit` returns a
+    new scorer and leaves this one untouched, so it can keep serving while the
+    update is computed and the caller swaps the new one in.
+    """
+
+    def __init__(self, feature_count: np.ndarray, class_count: np.ndarray, classes: Sequence[str],
+                 alpha: float = 1.0, token_pattern: str = TOKEN_PATTERN, lowercase: bool = True,
+                 feature_log_prob: Optional[np.ndarray] = None, class_log_prior: Optional[np.ndarray] = None):
+        self.feature_count = np.asarray(feature_count, dtype=np.float64)
+        self.class_count = np.asarray(class_count, dtype=np.float64)
+        self.n_features = self.feature_count.shape[1]
+        self.alpha = alpha
+        if feature_log_prob is None or class_log_prior is None:
+            smoothed = self.feature_count + alpha
+            feature_log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+            # Classes without examples get a zero prior and are never predicted
+            total = self.class_count.sum()
+            with np.errstate(divide='ignore'):
+                class_log_prior = np.log(self.class_count) - np.log(total) if total else np.zeros(len(classes))
+        super().__init__(
+            vocabulary={}, idf=np.ones(0), feature_log_prob=feature_log_prob, class_log_prior=class_log_prior,
+            classes=classes, token_pattern=token_pattern, lowercase=lowercase
+        )
+        self._class_index = {label: index for index, label in enumerate(self.classes)}
+
+    @classmethod
+    def empty(cls, classes: Sequence[str], n_features: int = 2 ** 16, alpha: float = 1.0) -> "HashedNBScorer":
+        """An untrained scorer over a fixed set of classes"""
+        return cls(np.zeros((len(classes), n_features)), np.zeros(len(classes)), classes, alpha=alpha)
+
+    def vectorize_tokens(self, token_lists: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Build the l2-normalized hashed term-count matrix as CSR arrays (indptr, indices, data)"""
+        n_features = self.n_features
+        indptr = [0]
+        indices: List[int] = []
+        counts: List[float] = []
+
+        for tokens in token_lists:
+            row: Dict[int, int] = {}
+            for token in tokens:
+                index = zlib.crc32(token.encode('utf-8')) % n_features
+                row[index] = row.get(index, 0) + 1
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+
+        indptr_array = np.asarray(indptr, dtype=np.int64)
+        indices_array = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(counts, dtype=np.float64)
+        _l2_normalize_rows(indptr_array, data)
+        return indptr_array, indices_array, data
+
+    def partial_fit(self, texts: Sequence[str], labels: Sequence[str]) -> "HashedNBScorer":
+        """Return a new scorer that has also learned from (texts, labels)"""
+        unknown = sorted(set(labels) - set(self._class_index))
+        if unknown:
+            raise ValueError(f"Unknown labels {unknown}, expected one of {self.classes}")
+
+        indptr, indices, data = self.vectorize(texts)
+        label_indices = np.asarray([self._class_index[label] for label in labels], dtype=np.int64)
+
+        feature_count = np.array(self.feature_count)
+        class_count = np.array(self.class_count)
+        np.add.at(feature_count, (np.repeat(label_indices, np.diff(indptr)), indices), data)
+        np.add.at(class_count, label_indices, 1)
+        return HashedNBScorer(
+            feature_count, class_count, self.classes, alpha=self.alpha,
+            token_pattern=self.token_pattern, lowercase=self.lowercase
+        )
+
+    def save(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write counts and derived log probabilities to a memory-mappable model artifact and return the metadata written"""
+        return save_artifact(path, {
+            'feature_count': self.feature_count,
+            'class_count': self.class_count,
+            'feature_log_prob_t': self._feature_log_prob_t,
+            'class_log_prior': self.class_log_prior,
+            'classes': np.array(self.classes),
+        }, {
+            **(metadata or {}),
+            'kind': HASHED_ARTIFACT_KIND,
+            'alpha': self.alpha,
+            'token_pattern': self.token_pattern,
+            'lowercase': self.lowercase,
+        })
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["HashedNBScorer", Dict[str, Any]]:
+        """Load a scorer from a model artifact; counts are only copied by the first update"""
+        arrays, metadata = load_artifact(path)
+        if metadata.get('kind') != HASHED_ARTIFACT_KIND:
+            raise ValueError(f"Model artifact kind {metadata.get('kind')!r} is not {HASHED_ARTIFACT_KIND!r}")
+
+        scorer = cls(
+            feature_count=arrays['feature_count'],
+            class_count=arrays['class_count'],
+            classes=arrays['classes'].tolist(),
+            alpha=metadata['alpha'],
+            token_pattern=metadata['token_pattern'],
+            lowercase=metadata['lowercase'],
+            feature_log_prob=arrays['feature_log_prob_t'].T,
+            class_log_prior=arrays['class_log_prior'],
+        )
+        return scorer, metadata
+
+
+ENGINES = {
+    ARTIFACT_KIND: CompiledNBScorer,
+    HASHED_ARTIFACT_KIND: HashedNBScorer,
+}
+
+
+def load_engine(path: str) -> Tuple[CompiledNBScorer, Dict[str, Any]]:
+    """Load a model artifact with the scorer class recorded in its header"""
+    kind = read_metadata(path).get('kind')
+    if kind not in ENGINES:
+        raise ValueError(f"Unknown model artifact kind {kind!r}, expected one of {sorted(ENGINES)}")
+    return ENGINES[kind].load(path)
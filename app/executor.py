@@ -0,0 +1,144 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Classifier owned by each process-pool worker, loaded by _init_process_worker
+_worker_classifier = None
+
+
+class ExecutorQueueFull(Exception):
+    """Raised when the inference queue is at capacity"""
+
+
+def _init_process_worker(model_path: str):
+    """Load the model once per worker process (the artifact is memory-mapped, so this is cheap)"""
+    global _worker_classifier
+    from .classifier import PlumbingIssueClassifier
+    from .startup import warm_up
+    _worker_classifier = PlumbingIssueClassifier(model_path=model_path)
+    warm_up(_worker_classifier, rounds=1)
+
+
+def _call_in_process(method: str, args: Tuple) -> Tuple[float, Any]:
+    return time.time(), getattr(_worker_classifier, method)(*args)
+
+
+def _call_in_thread(classifier, method: str, args: Tuple) -> Tuple[float, Any]:
+    return time.time(), getattr(classifier, method)(*args)
+
+
+def _record_queue_wait(result: Any, wait: float):
+    """Add the time spent waiting for a worker to the results' stage timings"""
+    for item in result if isinstance(result, list) else (result,):
+        timings = item.get('stage_timings') if isinstance(item, dict) else None
+        if timings is not None:
+            timings['queue_wait'] = wait
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """Runs CPU-bound classification off the asyncio event loop.
+
+    `kind` is "thread" (shares the loaded classifier) or "process" (each worker
+    maps the model artifact itself). At most `max_queue` calls may be in flight;
+    beyond that `ExecutorQueueFull` is raised so the API can shed load instead of
+    letting latency grow without bound.
+    """
+
+    def __init__(self, kind: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_queue: Optional[int] = None):
+        self.kind = (kind or os.getenv("CLASSIFIER_EXECUTOR", "thread")).lower()
+        if self.kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind {self.kind!r}, expected 'thread' or 'process'")
+        self.max_workers = max_workers or int(os.getenv("CLASSIFIER_EXECUTOR_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue or int(os.getenv("CLASSIFIER_MAX_QUEUE", "0")) or self.max_workers * 32
+
+        self._pool: Optional[Executor] = None
+        self._classifier = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def start(self, classifier):
+        """Create the worker pool for a loaded classifier"""
+        self._classifier = classifier
+        if self.kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+            return
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker,
+            initargs=(classifier.model_path,)
+        )
+        # Start every worker now so the first requests don't pay for spawning and loading
+        for future in [self._pool.submit(_ping) for _ in range(self.max_workers)]:
+            future.result()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def classify_issue(self, description: str) -> Dict[str, Any]:
+        return await self._submit("classify_issue", description)
+
+    async def classify_batch(self, descriptions: List[str]) -> List[Dict[str, Any]]:
+        return await self._submit("classify_batch", descriptions)
+
+    async def _submit(self, method: str, *args) -> Any:
+        if self._pool is None:
+            raise RuntimeError("Inference executor has not been started")
+        if self.in_flight >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorQueueFull(f"{self.in_flight} classifications already queued")
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        submitted_at = time.time()
+        try:
+            if self.kind == "thread":
+                started_at, result = await loop.run_in_executor(self._pool, _call_in_thread, self._classifier, method, args)
+            else:
+                started_at, result = await loop.run_in_executor(self._pool, _call_in_process, method, args)
+        finally:
+            self.in_flight -= 1
+
+        finished_at = time.time()
+        wait = max(0.0, started_at - submitted_at)
+        self.completed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._run_total += finished_at - started_at
+        _record_queue_wait(result, wait)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.completed or 1
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            # Calls beyond the worker count must be waiting, but the pool doesn't say which are
+            'estimated_queue_depth': max(0, self.in_flight - self.max_workers),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_ms_avg': self._wait_total / completed * 1000,
+            'wait_ms_max': self._wait_max * 1000,
+            'run_ms_avg': self._run_total / completed * 1000,
+        }
@@ -0,0 +1,98 @@
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# (table name, level, keyword) for every pattern compiled into the automaton
+Pattern = Tuple[str, Hashable, str]
+KeywordHits = Dict[str, Dict[Hashable, List[str]]]
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over several keyword tables.
+
+    Every keyword of every table is compiled into one automaton when the matcher
+    is built, so `scan` finds all hits for all tables in a single pass over the
+    text, independent of how many keywords there are.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[Hashable, Iterable[str]]]):
+        self.tables = {name: list(levels) for name, levels in tables.items()}
+        self.patterns: List[Pattern] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for table, levels in tables.items():
+            for level, keywords in levels.items():
+                for keyword in keywords:
+                    self._add_pattern((table, level, keyword.lower()))
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: Pattern):
+        """Insert a keyword into the trie"""
+        state = 0
+        for char in pattern[2]:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build_failure_links(self):
+        """Breadth-first pass linking every state to its longest proper suffix state"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # A state also reports every keyword ending at its suffix state
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def scan(self, text: str) -> KeywordHits:
+        """Return {table: {level: [keywords]}} for every keyword found in the cleaned, lowercase text.
+
+        A keyword only counts where a word starts, so "now" is not found in
+        "know", but it may end inside a word so inflections such as "leaking"
+        or "overflowing" still count. A keyword lying inside a longer keyword
+        that was found too doesn't count, so "non urgent" isn't also "urgent".
+        """
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self.patterns
+        spans = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for pattern_id in output[state]:
+                    start = end - len(patterns[pattern_id][2])
+                    if start == 0 or text[start - 1] == ' ':
+                        spans.append((start, end, pattern_id))
+
+        found = {
+            pattern_id for start, end, pattern_id in spans
+            if not any(other_start <= start and end <= other_end and other_end - other_start > end - start
+                       for other_start, other_end, _ in spans)
+        }
+
+        hits: KeywordHits = {table: {} for table in self.tables}
+        for pattern_id in sorted(found):
+            table, level, keyword = self.patterns[pattern_id]
+            hits[table].setdefault(level, []).append(keyword)
+        return hits
+
+    @staticmethod
+    def highest_level(table_hits: Dict[Hashable, List[str]], order: List[Any], default: Optional[Any] = None):
+        """Resolve hits to the highest level according to `order` (lowest first)"""
+        for level in reversed(order):
+            if level in table_hits:
+                return level
+        return default
@@ -1,29 +1,148 @@
+import os
+import json
 import time
 import uuid
+import asyncio
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Depends
+from pydantic import ValidationError
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
 
 from .models import (
     IssueRequest, IssueResponse, IssueClassification, 
-    HealthResponse, ErrorResponse
+    HealthResponse, ErrorResponse, BatchIssueRequest,
+    BatchItemResult, BatchIssueResponse, LivenessResponse, ReadinessResponse,
+    StreamErrorLine, FeedbackRequest, FeedbackResponse, TimingBreakdown
 )
-from .classifier import PlumbingIssueClassifier
+from .classifier import PlumbingIssueClassifier, tokenize
+from .batching import MicroBatcher
+from .coalescing import RequestCoalescer
+from .startup import StartupState, WARMUP_DESCRIPTIONS, warm_up
+from .executor import InferenceExecutor, ExecutorQueueFull
+from .online import FeedbackLearner, FeedbackQueueFull
+from .metrics import (
+    MODEL_LOAD_SECONDS, PROMETHEUS_CONTENT_TYPE, REGISTRY, MetricsMiddleware, observe_results, observe_stages
+)
+from .server import process_memory
+from .streaming import NDJSON_MEDIA_TYPE, NDJSONStreamingResponse, iter_ndjson_lines
 
-# Global classifier instance
+# Global classifier instance, only set once the model is loaded and warm
 classifier = None
+startup_state = StartupState()
+inference_executor = None
+feedback_learner = None
+# Why /feedback is refused although the model could learn, if it is
+feedback_unavailable: Optional[str] = None
+request_coalescer = RequestCoalescer()
+micro_batcher = None
+
+# Classifier loaded by a pre-fork parent before workers are forked (see app.server)
+preloaded_classifier = None
+
+def preload_classifier():
+    """Load and warm the model in this process so forked workers inherit it"""
+    global preloaded_classifier
+    started = time.perf_counter()
+    preloaded_classifier = PlumbingIssueClassifier()
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - started)
+    warm_up(preloaded_classifier)
+    return preloaded_classifier
+
+def _load_classifier():
+    """Load the model and warm it up; runs off the event loop"""
+    global classifier, feedback_learner, feedback_unavailable
+    # A classifier inherited from the pre-fork parent is already warm
+    if preloaded_classifier is not None:
+        loaded = preloaded_classifier
+    else:
+        started = time.perf_counter()
+        loaded = PlumbingIssueClassifier()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started)
+    startup_state.mark_model_loaded()
+    print("🚰 Plumbing Issue Classifier initialized!")
+    
+    # Prime lazy imports, compiled regexes and the response models
+    if preloaded_classifier is None:
+        warm_up(loaded)
+    _build_issue_response(loaded.classify_issue(WARMUP_DESCRIPTIONS[0], use_cache=False), loaded.model_version)
+    
+    # Optionally prime the result cache from a request log
+    warmup_file = os.getenv("CLASSIFIER_CACHE_WARMUP_FILE")
+    if warmup_file and os.path.exists(warmup_file):
+        warmed = loaded.warm_up_cache(warmup_file)
+        print(f"🔥 Cache warmed with {warmed} descriptions from {warmup_file}")
+    
+    inference_executor.start(loaded)
+    
+    # Online models learn from technician feedback in the background. Each process
+    # would learn only the feedback it received and overwrite the others' snapshots,
+    # so learning needs the process that takes feedback to be the only one serving
+    if loaded.supports_online_learning:
+        if preloaded_classifier is not None or inference_executor.kind == "process":
+            feedback_unavailable = ("Online learning needs a single serving process; "
+                                    "it is off with pre-forked workers and process executors")
+            print(f"⚠️  {feedback_unavailable}")
+        else:
+            feedback_learner = FeedbackLearner(loaded)
+            feedback_learner.start()
+    
+    classifier = loaded
+    startup_state.mark_ready()
+    print(f"✅ Classifier ready after {startup_state.report()['cold_start_seconds']:.2f}s")
+
+def _on_classifier_loaded(load_task: asyncio.Future):
+    """Record a failed background load so /health/ready reports why it never became ready"""
+    if load_task.cancelled():
+        return
+    error = load_task.exception()
+    if error is not None:
+        startup_state.mark_failed(str(error) or type(error).__name__)
+        print(f"❌ Classifier failed to load: {error!r}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global classifier
-    classifier = PlumbingIssueClassifier()
-    print("🚰 Plumbing Issue Classifier initialized!")
+    global classifier, inference_executor, feedback_learner, feedback_unavailable, request_coalescer, micro_batcher
+    app.state.start_time = time.time()
+    startup_state.reset()
+    classifier = None
+    feedback_learner = None
+    feedback_unavailable = None
+    inference_executor = InferenceExecutor()
+    request_coalescer = RequestCoalescer()
+    
+    # Identical descriptions classified concurrently share one computation
+    app.state.coalesce_requests = os.getenv("CLASSIFIER_COALESCE_REQUESTS", "True").lower() == "true"
+    
+    # Opt-in: classify concurrent single requests together in adaptive micro-batches
+    micro_batcher = None
+    if os.getenv("CLASSIFIER_MICROBATCH", "False").lower() == "true":
+        micro_batcher = MicroBatcher(_classify_micro_batch, max_concurrent_batches=inference_executor.max_workers)
+    
+    # Opt-in: render /classify responses straight from the precomputed recommendation
+    # bundles instead of validating and serializing them through pydantic
+    app.state.fast_response = os.getenv("CLASSIFIER_FAST_RESPONSE", "False").lower() == "true"
+    
+    # Opt-in: per-stage timings in a Server-Timing header and the response's debug field
+    app.state.server_timing = os.getenv("CLASSIFIER_SERVER_TIMING", "False").lower() == "true"
+    
+    # Load and warm up in the background so the server accepts connections right away;
+    # set CLASSIFIER_BLOCKING_STARTUP=true to wait for it before serving instead
+    app.state.load_task = asyncio.get_running_loop().run_in_executor(None, _load_classifier)
+    app.state.load_task.add_done_callback(_on_classifier_loaded)
+    if os.getenv("CLASSIFIER_BLOCKING_STARTUP", "False").lower() == "true":
+        await app.state.load_task
     yield
     # Shutdown
     print("🔧 Shutting down Plumbing Issue Classifier...")
+    if micro_batcher is not None:
+        micro_batcher.close()
+    if feedback_learner is not None:
+        feedback_learner.stop()
+    inference_executor.shutdown()
 
 app = FastAPI(
     title="Smart Plumbing Issue Classifier API",
@@ -41,6 +160,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts, latency and in-flight requests per endpoint for /metrics
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/", response_model=dict)
 async def root():
     """Root endpoint with API information"""
@@ -63,8 +185,25 @@ async def health_check():
         uptime_seconds=uptime
     )
 
+@app.get("/health/live", response_model=LivenessResponse)
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    uptime = time.time() - app.state.start_time if hasattr(app.state, 'start_time') else 0
+    return LivenessResponse(status="alive", uptime_seconds=uptime)
+
+@app.get("/health/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def readiness_check():
+    """Readiness probe: the model is loaded and warmed up, so traffic can be routed here"""
+    response = ReadinessResponse(
+        **startup_state.report(),
+        model_version=classifier.model_version if classifier is not None else None
+    )
+    if not response.ready:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
+
 @app.post("/classify", response_model=IssueResponse)
-async def classify_issue(request: IssueRequest):
+async def classify_issue(request: IssueRequest, http_response: Response):
     """
     Classify a plumbing issue based on customer description.
     
@@ -75,38 +214,357 @@ async def classify_issue(request: IssueRequest):
     - Safety considerations
     - Recommended next steps
     """
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    
+    received = time.perf_counter()
     try:
-        if classifier is None:
-            raise HTTPException(status_code=503, detail="Classifier not initialized")
+        # Classify the issue off the event loop
+        coalesced = False
+        if getattr(app.state, "coalesce_requests", False):
+            # Requests for the same normalized description and model wait on one classification
+            key = (tokenize(request.description)[0], classifier.model_version)
+            (result, batch_wait), coalesced = await request_coalescer.run(
+                key, lambda: _classify_one(request.description)
+            )
+        else:
+            result, batch_wait = await _classify_one(request.description)
         
-        # Classify the issue
-        result = classifier.classify_issue(request.description)
-        
-        # Create classification object
-        classification = IssueClassification(
-            category=result['category'],
-            confidence=result['confidence'],
-            severity=result['severity'],
-            urgency=result['urgency'],
-            estimated_duration=result['estimated_duration'],
-            required_tools=result['required_tools'],
-            recommended_parts=result['recommended_parts'],
-            safety_notes=result['safety_notes'],
-            next_steps=result['next_steps']
-        )
-        
-        # Generate response
-        response = IssueResponse(
-            request_id=str(uuid.uuid4()),
-            classification=classification,
-            processing_time_ms=result['processing_time_ms'],
-            model_version="1.0.0"
-        )
+        started = time.perf_counter()
+        timing = getattr(app.state, "server_timing", False)
+        stages_ms = _stages_ms(result, batch_wait) if timing else None
+        if getattr(app.state, "fast_response", False):
+            response = Response(content=_render_issue_response(result, classifier, stages_ms), media_type="application/json")
+            response_stage = "serialization"
+        else:
+            # FastAPI validates and encodes the model after this returns, outside the timed section
+            response = _build_issue_response(result, classifier.model_version, stages_ms)
+            response_stage = "response_build"
+        finished = time.perf_counter()
+        observe_results((result,), finished - started, coalesced=coalesced, stages=micro_batcher is None,
+                        response_stage=response_stage)
         
+        if timing:
+            # A returned Response is sent as is; otherwise headers come from the injected one
+            headers = response.headers if isinstance(response, Response) else http_response.headers
+            headers["Server-Timing"] = _server_timing(stages_ms, response_stage, finished - started, finished - received)
+        _record_first_classification()
         return response
         
+    except ExecutorQueueFull:
+        raise _overloaded()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
+
+@app.post("/classify/batch", response_model=BatchIssueResponse)
+async def classify_batch(batch: BatchIssueRequest):
+    """
+    Classify a batch of plumbing issues in a single request.
+    
+    Every item is validated on its own, and the valid ones are classified
+    together with one vectorizer/model pass. Invalid items are reported
+    with a per-item error instead of failing the whole batch.
+    """
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    
+    start_time = time.time()
+    results = [BatchItemResult(index=index) for index in range(len(batch.requests))]
+    
+    # Validate each item independently so one bad item doesn't reject the batch
+    valid_indices = []
+    descriptions = []
+    for index, item in enumerate(batch.requests):
+        try:
+            issue = IssueRequest.model_validate(item)
+        except ValidationError as e:
+            results[index].error = ErrorResponse(error="Invalid request", detail=_format_validation_error(e))
+            continue
+        valid_indices.append(index)
+        descriptions.append(issue.description)
+    
+    try:
+        classified = await inference_executor.classify_batch(descriptions) if descriptions else []
+    except ExecutorQueueFull:
+        raise _overloaded()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
+    
+    started = time.perf_counter()
+    for index, result in zip(valid_indices, classified):
+        try:
+            results[index].response = _build_issue_response(result, classifier.model_version)
+        except Exception as e:
+            results[index].error = ErrorResponse(error="Classification failed", detail=str(e))
+    observe_results(classified, time.perf_counter() - started, response_stage="response_build")
+    
+    succeeded = sum(1 for item in results if item.response is not None)
+    if succeeded:
+        _record_first_classification()
+    
+    return BatchIssueResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        processing_time_ms=(time.time() - start_time) * 1000,
+        model_version=classifier.model_version
+    )
+
+@app.post(
+    "/classify/stream",
+    response_class=NDJSONStreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/IssueResponse"}}}}},
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {NDJSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/IssueRequest"}}}
+    }}
+)
+async def classify_stream(request: Request):
+    """
+    Classify a stream of plumbing issues sent as NDJSON.
+    
+    Each non-blank input line is an IssueRequest object. For each one, the response
+    streams back one line, in input order: an IssueResponse, or an error with the
+    input line number. Lines are classified in micro-batches as they arrive, so memory
+    stays constant regardless of input size.
+    """
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    
+    batch_size = int(os.getenv("CLASSIFIER_STREAM_BATCH_SIZE", "64"))
+    max_line_bytes = int(os.getenv("CLASSIFIER_STREAM_MAX_LINE_BYTES", "16384"))
+    queue_wait_seconds = float(os.getenv("CLASSIFIER_STREAM_QUEUE_WAIT_SECONDS", "30"))
+    
+    async def classify_pending(pending):
+        descriptions = [item.description for _, item in pending if isinstance(item, IssueRequest)]
+        # Bulk streams wait a while for capacity rather than failing mid-response, but not forever
+        deadline = time.monotonic() + queue_wait_seconds
+        classified = None
+        while classified is None:
+            try:
+                classified = await inference_executor.classify_batch(descriptions) if descriptions else []
+            except ExecutorQueueFull:
+                if time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(0.05)
+        
+        results = iter(classified or ())
+        started = time.perf_counter()
+        lines = []
+        for line_number, item in pending:
+            if not isinstance(item, IssueRequest):
+                lines.append(item.model_dump_json())
+            elif classified is None:
+                lines.append(StreamErrorLine(
+                    line=line_number, error="Classifier overloaded",
+                    detail=f"Inference queue stayed full for {queue_wait_seconds:g}s"
+                ).model_dump_json())
+            else:
+                lines.append(_build_issue_response(next(results), classifier.model_version).model_dump_json())
+        if classified:
+            observe_results(classified, time.perf_counter() - started)
+            _record_first_classification()
+        return ("\n".join(lines) + "\n").encode("utf-8")
+    
+    async def generate():
+        pending = []
+        valid = 0
+        async for line_number, line in iter_ndjson_lines(request.stream(), max_line_bytes):
+            if line is None:
+                pending.append((line_number, StreamErrorLine(
+                    line=line_number, error="Invalid request", detail=f"Line exceeds {max_line_bytes} bytes"
+                )))
+            else:
+                try:
+                    pending.append((line_number, IssueRequest.model_validate_json(line)))
+                    valid += 1
+                except ValidationError as e:
+                    pending.append((line_number, StreamErrorLine(
+                        line=line_number, error="Invalid request", detail=_format_validation_error(e)
+                    )))
+            
+            if valid >= batch_size or len(pending) >= batch_size * 4:
+                yield await classify_pending(pending)
+                pending = []
+                valid = 0
+        
+        if pending:
+            yield await classify_pending(pending)
+    
+    return NDJSONStreamingResponse(generate())
+
+@app.post("/feedback", response_model=FeedbackResponse, status_code=202)
+async def submit_feedback(feedback: FeedbackRequest):
+    """
+    Submit a technician's correction of a classification.
+    
+    Feedback is queued and learned in small batches in the background, so the
+    model version reported by later classifications changes once it is applied.
+    Requires an online model (CLASSIFIER_MODEL_KIND=hashed_multinomial_nb).
+    """
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    if feedback_learner is None:
+        raise HTTPException(status_code=409, detail=feedback_unavailable or "The loaded model does not support online learning")
+    
+    try:
+        pending = feedback_learner.submit(feedback.description, feedback.category)
+    except FeedbackQueueFull:
+        raise HTTPException(status_code=503, detail="Feedback queue full", headers={"Retry-After": "5"})
+    
+    return FeedbackResponse(accepted=True, pending=pending, model_version=classifier.model_version)
+
+@app.get("/feedback/stats")
+async def get_feedback_stats():
+    """Get online learning counters and snapshot status"""
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    if feedback_learner is None:
+        return {"enabled": False, "reason": feedback_unavailable} if feedback_unavailable else {"enabled": False}
+    return {"enabled": True, **feedback_learner.stats()}
+
+async def _classify_one(description: str) -> Tuple[dict, Optional[float]]:
+    """Classify one description, through the micro-batcher when enabled.
+    
+    Returns the result and the seconds it waited for its micro-batch, or None
+    when it wasn't batched.
+    """
+    if micro_batcher is not None:
+        return await micro_batcher.submit(description)
+    return await inference_executor.classify_issue(description), None
+
+async def _classify_micro_batch(descriptions: List[str]) -> List[dict]:
+    """Classify a micro-batch, observing its stage timings once for the whole batch"""
+    results = await inference_executor.classify_batch(descriptions)
+    if results:
+        observe_stages(results[0]['stage_timings'])
+    return results
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic validation error into a single readable line"""
+    return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in error.errors())
+
+def _overloaded() -> HTTPException:
+    """503 telling clients to back off while the inference queue is full"""
+    return HTTPException(status_code=503, detail="Classifier overloaded", headers={"Retry-After": "1"})
+
+def _record_first_classification():
+    """Report cold start time the first time a classification succeeds"""
+    if startup_state.mark_first_classification():
+        seconds = startup_state.report()['time_to_first_classification_seconds']
+        print(f"⏱️  First successful classification {seconds:.2f}s after startup")
+
+def _stages_ms(result: dict, batch_wait: Optional[float] = None) -> dict:
+    """A classifier result's stage timings in milliseconds, to the microsecond"""
+    stages_ms = {stage: round(seconds * 1000, 3) for stage, seconds in result['stage_timings'].items()}
+    if batch_wait is not None:
+        stages_ms['batch_wait'] = round(batch_wait * 1000, 3)
+    return stages_ms
+
+def _server_timing(stages_ms: dict, response_stage: str, response_seconds: float, total_seconds: float) -> str:
+    """Server-Timing header value for the classifier stages, the response stage and the whole request"""
+    metrics = [f"{stage};dur={ms}" for stage, ms in stages_ms.items()]
+    metrics.append(f"{response_stage};dur={response_seconds * 1000:.3f}")
+    metrics.append(f"total;dur={total_seconds * 1000:.3f}")
+    return ", ".join(metrics)
+
+def _build_issue_response(result: dict, model_version: str, stages_ms: Optional[dict] = None) -> IssueResponse:
+    """Build the API response for a single classifier result"""
+    # Create classification object
+    classification = IssueClassification(
+        category=result['category'],
+        confidence=result['confidence'],
+        severity=result['severity'],
+        urgency=result['urgency'],
+        estimated_duration=result['estimated_duration'],
+        required_tools=result['required_tools'],
+        recommended_parts=result['recommended_parts'],
+        safety_notes=result['safety_notes'],
+        next_steps=result['next_steps']
+    )
+    
+    # Generate response
+    return IssueResponse(
+        request_id=str(uuid.uuid4()),
+        classification=classification,
+        processing_time_ms=result['processing_time_ms'],
+        model_version=model_version,
+        debug=TimingBreakdown(stages_ms=stages_ms) if stages_ms is not None else None
+    )
+
+def _render_issue_response(result: dict, loaded: PlumbingIssueClassifier, stages_ms: Optional[dict] = None) -> bytes:
+    """Render IssueResponse JSON for trusted classifier output without pydantic.
+    
+    The classification comes pre-serialized from its recommendation bundle; the
+    output is byte-for-byte what IssueResponse.model_dump_json() would produce.
+    """
+    bundle = loaded.recommendations[(result['category'], result['severity'], result['urgency'])]
+    return (
+        f'{{"request_id":"{uuid.uuid4()}",'
+        f'"classification":{bundle.classification_json(result["confidence"])},'
+        f'"processing_time_ms":{float(result["processing_time_ms"])!r},'
+        f'"model_version":{json.dumps(loaded.model_version)},'
+        f'"debug":{_render_debug(stages_ms)}}}'
+    ).encode("utf-8")
+
+def _render_debug(stages_ms: Optional[dict]) -> str:
+    if stages_ms is None:
+        return 'null'
+    # Rounded to 3 decimals, the floats print the same here as in pydantic's JSON
+    return f'{{"stages_ms":{json.dumps(stages_ms, separators=(",", ":"))}}}'
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get classification result cache counters"""
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    if classifier.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **classifier.cache.stats()}
+
+@app.get("/cascade/stats")
+async def get_cascade_stats():
+    """Get how often each cascade stage (keyword rules, model, fallback model) answered and its cost"""
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    return {
+        "rule_min_hits": classifier.rule_min_hits or None,
+        "fallback_threshold": classifier.fallback_threshold if classifier.fallback_model is not None else None,
+        "stages": classifier.cascade_stats.stats()
+    }
+
+@app.get("/executor/stats")
+async def get_executor_stats():
+    """Get inference executor queue depth and wait time"""
+    if inference_executor is None or not inference_executor.started:
+        raise HTTPException(status_code=503, detail="Classifier not ready")
+    return inference_executor.stats()
+
+@app.get("/metrics", response_class=Response, responses={200: {"content": {PROMETHEUS_CONTENT_TYPE: {}}}})
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms, classification counts and request stats"""
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/coalescing/stats")
+async def get_coalescing_stats():
+    """Get how many /classify requests shared an identical in-flight classification"""
+    return {"enabled": getattr(app.state, "coalesce_requests", False), **request_coalescer.stats()}
+
+@app.get("/microbatch/stats")
+async def get_microbatch_stats():
+    """Get micro-batch counts, flush reasons and the batch size distribution"""
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+@app.get("/stats/process")
+async def get_process_stats():
+    """Get this worker's process id and resident memory"""
+    return {
+        "pid": os.getpid(),
+        "preloaded_model": preloaded_classifier is not None,
+        **process_memory()
+    }
 
 @app.get("/categories")
 async def get_categories():
@@ -165,7 +623,8 @@ async def http_exception_handler(request, exc):
         content=ErrorResponse(
             error=exc.detail,
             detail="Please check the request and try again"
-        ).dict()
+        ).dict(),
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -177,9 +636,4 @@ async def general_exception_handler(request, exc):
             error="Internal server error",
             detail="An unexpected error occurred"
         ).dict()
-    )
-
-# Store startup time for health check
-@app.on_event("startup")
-async def startup_event():
-    app.state.start_time = time.time() 
\ No newline at end of file
+    ) 
\ No newline at end of file
@@ -0,0 +1,343 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stage durations are mostly microseconds to milliseconds
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0
+)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    """A metric family: one child per combination of label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def labels(self, *values: str):
+        """The child for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(value) for value in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A new child holding the values for one combination of label values"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    @abstractmethod
+    def _render_child(self, key: Tuple[str, ...], child) -> List[str]:
+        """Exposition lines for one child"""
+
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Report `function()` instead of the stored value"""
+        self._function = function
+
+    def _render_child(self, key, child):
+        value = child.value
+        if self._function is not None:
+            try:
+                value = float(self._function())
+            except Exception:
+                value = float('nan')
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value) if value == value else 'NaN'}"]
+
+
+class _HistogramValues:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = REQUEST_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValues(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _render_child(self, key, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collects metric families and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = REQUEST_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "classifier_stage_duration_seconds",
+    "Time spent in each classification stage, per classifier call",
+    ("stage",), buckets=STAGE_BUCKETS
+)
+CLASSIFICATIONS = REGISTRY.counter(
+    "classifier_classifications",
+    "Issues classified, by predicted category and urgency",
+    ("category", "urgency")
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "classifier_http_requests",
+    "HTTP requests handled, by endpoint and status code",
+    ("endpoint", "status")
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "classifier_http_request_duration_seconds",
+    "HTTP request latency until the response is complete, by endpoint",
+    ("endpoint",)
+)
+COALESCED_REQUESTS = REGISTRY.counter(
+    "classifier_coalesced_requests",
+    "Classifications answered with the result of an identical request already in flight"
+)
+MICROBATCH_SIZE = REGISTRY.histogram(
+    "classifier_microbatch_size",
+    "Single /classify requests classified together per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+MICROBATCH_FLUSHES = REGISTRY.counter(
+    "classifier_microbatch_flushes",
+    "Micro-batches flushed, by what triggered the flush",
+    ("reason",)
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "classifier_http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "classifier_model_load_seconds",
+    "Seconds from startup until the model was loaded"
+)
+
+
+def observe_stages(timings: Dict[str, float]):
+    """Record one classifier call's stage timings"""
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def observe_results(results: Iterable[dict], response_seconds: Optional[float] = None,
+                    coalesced: bool = False, stages: bool = True, response_stage: str = "serialization"):
+    """Record stage timings and category/urgency counts for classifier results.
+
+    Results from one classifier call share their `stage_timings`, so each call's
+    stages are observed once however many results it produced. Pass `stages=False`
+    when the caller already observed them, e.g. for a micro-batch, and for results
+    shared from an identical in-flight request (`coalesced`). `response_seconds`
+    is recorded as `response_stage`: "serialization" when the response bytes were
+    produced in that time, "response_build" when only the response model was.
+    """
+    if coalesced:
+        COALESCED_REQUESTS.inc()
+    stages = stages and not coalesced
+    seen = set()
+    for result in results:
+        timings = result.get('stage_timings')
+        if stages and timings is not None and id(timings) not in seen:
+            seen.add(id(timings))
+            observe_stages(timings)
+        CLASSIFICATIONS.labels(_label(result['category']), _label(result['urgency'])).inc()
+    if response_seconds is not None:
+        STAGE_SECONDS.labels(response_stage).observe(response_seconds)
+
+
+def _label(value) -> str:
+    return getattr(value, 'value', value)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests, in-flight requests and latency per endpoint.
+
+    Only paths of the application's own routes become label values; anything
+    else is recorded as "other" so unknown URLs can't grow the label set.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Optional[Iterable[str]] = None):
+        self.app = app
+        self._paths = set(paths) if paths is not None else None
+
+    def _endpoint(self, scope: Scope) -> str:
+        if self._paths is None:
+            router = scope.get("app")
+            self._paths = {getattr(route, "path", None) for route in getattr(router, "routes", [])} - {None}
+        path = scope.get("path", "")
+        return path if path in self._paths else "other"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        status = "500"
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            HTTP_REQUESTS.labels(endpoint, status).inc()
+            HTTP_REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
@@ -44,18 +44,66 @@ class IssueClassification(BaseModel):
     safety_notes: List[str] = Field(..., description="Safety considerations")
     next_steps: List[str] = Field(..., description="Recommended next steps")
 
+class LivenessResponse(BaseModel):
+    status: str
+    uptime_seconds: float
+
+class ReadinessResponse(BaseModel):
+    status: str = Field(..., description="starting, ready or failed")
+    ready: bool
+    model_version: Optional[str] = None
+    model_load_seconds: Optional[float] = Field(None, description="Seconds from startup until the model was loaded")
+    cold_start_seconds: Optional[float] = Field(None, description="Seconds from startup until the model was loaded and warm")
+    time_to_first_classification_seconds: Optional[float] = Field(None, description="Seconds from startup until the first successful classification")
+    error: Optional[str] = None
+
+class ErrorResponse(BaseModel):
+    error: str
+    detail: Optional[str] = None
+
+class TimingBreakdown(BaseModel):
+    stages_ms: Dict[str, float] = Field(..., description="Milliseconds spent in each classification stage")
+
 class IssueResponse(BaseModel):
     request_id: str
     classification: IssueClassification
     processing_time_ms: float
     model_version: str
+    debug: Optional[TimingBreakdown] = Field(None, description="Per-stage timings, only when CLASSIFIER_SERVER_TIMING is enabled")
+
+class StreamErrorLine(BaseModel):
+    line: int = Field(..., description="1-based line number of the rejected input line")
+    error: str
+    detail: Optional[str] = None
+
+class BatchIssueRequest(BaseModel):
+    requests: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000, description="Issue requests, each in the same shape as IssueRequest")
+
+class BatchItemResult(BaseModel):
+    index: int = Field(..., description="Position of the item in the submitted batch")
+    response: Optional[IssueResponse] = None
+    error: Optional[ErrorResponse] = None
+
+class BatchIssueResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+    processing_time_ms: float
+    model_version: str
+
+class FeedbackRequest(BaseModel):
+    description: str = Field(..., min_length=10, max_length=1000, description="Description of the issue as reported by the customer")
+    category: IssueCategory = Field(..., description="Category the technician found on site")
+    request_id: Optional[str] = Field(None, description="request_id of the classification being corrected")
+    predicted_category: Optional[IssueCategory] = Field(None, description="Category the classifier originally predicted")
+
+class FeedbackResponse(BaseModel):
+    accepted: bool
+    pending: int = Field(..., description="Feedback items waiting to be learned")
+    model_version: str = Field(..., description="Model version currently serving; changes once the feedback is learned")
 
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
     version: str
     uptime_seconds: float
-
-class ErrorResponse(BaseModel):
-    error: str
-    detail: Optional[str] = None 
\ No newline at end of file
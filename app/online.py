@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .models import IssueCategory
+
+
+class FeedbackQueueFull(Exception):
+    """Raised when too much feedback is waiting to be learned"""
+
+
+class FeedbackLearner:
+    """Applies technician feedback to an online classifier in the background.
+
+    Corrections are queued by `submit` and learned in batches of up to
+    `batch_size` by a worker thread, at least every `interval_seconds`. Each
+    batch is trained on a copy of the model that is then swapped in, so serving
+    never pauses. When the model has changed, it is written back to the model
+    artifact every `snapshot_seconds` and on `stop`.
+    """
+
+    def __init__(self, classifier, batch_size: Optional[int] = None, interval_seconds: Optional[float] = None,
+                 snapshot_seconds: Optional[float] = None, max_pending: Optional[int] = None):
+        if not classifier.supports_online_learning:
+            raise ValueError("The loaded model does not support online learning")
+
+        self.classifier = classifier
+        self.batch_size = batch_size or int(os.getenv("CLASSIFIER_FEEDBACK_BATCH_SIZE", "32"))
+        self.interval_seconds = interval_seconds if interval_seconds is not None else \
+            float(os.getenv("CLASSIFIER_FEEDBACK_INTERVAL_SECONDS", "2"))
+        self.snapshot_seconds = snapshot_seconds if snapshot_seconds is not None else \
+            float(os.getenv("CLASSIFIER_FEEDBACK_SNAPSHOT_SECONDS", "300"))
+        self.max_pending = max_pending or int(os.getenv("CLASSIFIER_FEEDBACK_MAX_PENDING", "10000"))
+
+        self._pending: Deque[Tuple[str, IssueCategory]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.received = 0
+        self.learned = 0
+        self.batches = 0
+        self.snapshots = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_update_at: Optional[float] = None
+        self.last_snapshot_at: Optional[float] = None
+        self._unsaved = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="feedback-learner", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Learn what is still queued, snapshot and stop the worker thread"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.snapshot()
+
+    def submit(self, description: str, category: IssueCategory) -> int:
+        """Queue one correction and return how many are waiting to be learned"""
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise FeedbackQueueFull(f"{len(self._pending)} feedback items already pending")
+            self._pending.append((description, category))
+            self.received += 1
+            pending = len(self._pending)
+        if pending >= self.batch_size:
+            self._wake.set()
+        return pending
+
+    def flush(self) -> int:
+        """Learn every queued correction now, returning how many were applied"""
+        applied = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch: List[Tuple[str, IssueCategory]] = [
+                        self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))
+                    ]
+                if not batch:
+                    return applied
+                descriptions, categories = zip(*batch)
+                try:
+                    self.classifier.learn(list(descriptions), list(categories))
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = str(e)
+                    print(f"⚠️  Could not learn from {len(batch)} feedback items: {e}")
+                    continue
+                applied += len(batch)
+                self.learned += len(batch)
+                self.batches += 1
+                self._unsaved += len(batch)
+                self.last_update_at = time.time()
+
+    def snapshot(self) -> bool:
+        """Write the model to its artifact if it changed since the last snapshot"""
+        with self._flush_lock:
+            if not self._unsaved:
+                return False
+            try:
+                self.classifier.save_model(self.classifier.model_path)
+            except OSError as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"⚠️  Could not snapshot model to {self.classifier.model_path}: {e}")
+                return False
+            self._unsaved = 0
+            self.snapshots += 1
+            self.last_snapshot_at = time.time()
+            return True
+
+    def _run(self):
+        next_snapshot = time.monotonic() + self.snapshot_seconds
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            self.flush()
+            if time.monotonic() >= next_snapshot:
+                self.snapshot()
+                next_snapshot = time.monotonic() + self.snapshot_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'model_version': self.classifier.model_version,
+            'pending': pending,
+            'received': self.received,
+            'learned': self.learned,
+            'batches': self.batches,
+            'unsaved': self._unsaved,
+            'snapshots': self.snapshots,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_update_at': self.last_update_at,
+            'last_snapshot_at': self.last_snapshot_at,
+        }
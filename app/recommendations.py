@@ -0,0 +1,82 @@
+import json
+from typing import Any, Dict, NamedTuple, Tuple
+
+from .models import IssueCategory, IssueSeverity, IssueUrgency
+
+BundleKey = Tuple[IssueCategory, IssueSeverity, IssueUrgency]
+
+# Result fields that are lists; bundles keep them as shared tuples
+LIST_FIELDS = ('required_tools', 'recommended_parts', 'safety_notes', 'next_steps')
+
+
+class RecommendationBundle(NamedTuple):
+    """Everything a classification reports besides its confidence, precomputed once.
+
+    The list fields are tuples so a bundle can be shared by every result that
+    uses it; results get list copies. `json_prefix` and `json_suffix` are the compact JSON of an
+    IssueClassification on either side of the confidence value, so rendering a
+    classification is two concatenations.
+    """
+
+    category: IssueCategory
+    severity: IssueSeverity
+    urgency: IssueUrgency
+    estimated_duration: str
+    required_tools: Tuple[str, ...]
+    recommended_parts: Tuple[str, ...]
+    safety_notes: Tuple[str, ...]
+    next_steps: Tuple[str, ...]
+    json_prefix: str
+    json_suffix: str
+
+    @classmethod
+    def build(cls, category: IssueCategory, severity: IssueSeverity, urgency: IssueUrgency,
+              estimated_duration: str, required_tools, recommended_parts, safety_notes,
+              next_steps) -> "RecommendationBundle":
+        fields = {
+            'severity': severity.value,
+            'urgency': urgency.value,
+            'estimated_duration': estimated_duration,
+            'required_tools': list(required_tools),
+            'recommended_parts': list(recommended_parts),
+            'safety_notes': list(safety_notes),
+            'next_steps': list(next_steps),
+        }
+        # Same field order and compact separators as IssueClassification.model_dump_json()
+        json_prefix = '{"category":' + _dumps(category.value) + ',"confidence":'
+        json_suffix = ',' + _dumps(fields)[1:]
+        return cls(
+            category, severity, urgency, estimated_duration,
+            tuple(required_tools), tuple(recommended_parts), tuple(safety_notes), tuple(next_steps),
+            json_prefix, json_suffix
+        )
+
+    def result(self, confidence: float) -> Dict[str, Any]:
+        """Classifier result dict for this bundle, with its own lists"""
+        return {
+            'category': self.category,
+            'confidence': confidence,
+            'severity': self.severity,
+            'urgency': self.urgency,
+            'estimated_duration': self.estimated_duration,
+            'required_tools': list(self.required_tools),
+            'recommended_parts': list(self.recommended_parts),
+            'safety_notes': list(self.safety_notes),
+            'next_steps': list(self.next_steps),
+        }
+
+    def classification_json(self, confidence: float) -> str:
+        """IssueClassification JSON for this bundle with the given confidence"""
+        return self.json_prefix + repr(float(confidence)) + self.json_suffix
+
+
+def copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a result dict whose lists the caller may change without affecting the original"""
+    copy = dict(result)
+    for field in LIST_FIELDS:
+        copy[field] = list(result[field])
+    return copy
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
@@ -0,0 +1,194 @@
+import gc
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, int]:
+    """Resident memory of a process in bytes, split into shared and private pages.
+
+    `pss` (proportional set size) charges each shared page to the processes sharing
+    it, so summing it across workers gives the real footprint of the pool. Reads
+    /proc and returns an empty dict where it isn't available.
+    """
+    fields = {
+        'Rss': 'rss', 'Pss': 'pss', 'Shared_Clean': 'shared_clean', 'Shared_Dirty': 'shared_dirty',
+        'Private_Clean': 'private_clean', 'Private_Dirty': 'private_dirty',
+    }
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    memory[fields[name] + '_bytes'] = int(value.split()[0]) * 1024
+    except OSError:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        memory['rss_bytes'] = int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return memory
+
+
+class RestartBackoff:
+    """When to restart a dead worker, per worker slot.
+
+    Delays double with each failure of the slot within `window_seconds`, from
+    `base_delay` up to `max_delay`. Once a slot has failed `limit` times within
+    the window, `next_delay` returns None: the worker keeps dying straight away,
+    e.g. on import, bind or memory, and restarting it again won't help.
+    """
+
+    def __init__(self, limit: int = 5, window_seconds: float = 60.0, base_delay: float = 0.5,
+                 max_delay: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self._failures: Dict[int, List[float]] = {}
+
+    def next_delay(self, slot: int) -> Optional[float]:
+        """Record a failure of `slot` and return the seconds to wait before restarting it, or None to give up"""
+        now = self.clock()
+        failures = [failed for failed in self._failures.get(slot, []) if now - failed < self.window_seconds]
+        failures.append(now)
+        self._failures[slot] = failures
+        if len(failures) >= self.limit:
+            return None
+        return min(self.base_delay * 2 ** (len(failures) - 1), self.max_delay)
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, log_level: str):
+    import uvicorn
+    from .main import app
+
+    # The parent's signal handlers must not leak into the worker; uvicorn installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve_prefork(host: str, port: int, workers: int, log_level: str = "info",
+                  rss_report_seconds: Optional[float] = None, restart_limit: Optional[int] = None,
+                  restart_window_seconds: Optional[float] = None) -> int:
+    """Load the model once, then fork `workers` uvicorn processes sharing it copy-on-write.
+
+    The model artifact is memory-mapped, so its arrays are shared page cache; the
+    Python objects built around it are inherited from the parent and frozen out of
+    the garbage collector so refcount/GC traffic doesn't un-share their pages.
+    Dead workers are restarted with exponential backoff until the parent receives
+    SIGINT/SIGTERM. A worker that dies `restart_limit` times within
+    `restart_window_seconds` stops the server instead. Returns the exit status:
+    0 after a signal, 1 after giving up on a worker.
+    """
+    from .main import preload_classifier
+
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("Pre-fork serving requires os.fork()")
+
+    if rss_report_seconds is None:
+        rss_report_seconds = float(os.getenv("WORKER_RSS_REPORT_SECONDS", "60"))
+    if restart_limit is None:
+        restart_limit = int(os.getenv("WORKER_RESTART_LIMIT", "5"))
+    if restart_window_seconds is None:
+        restart_window_seconds = float(os.getenv("WORKER_RESTART_WINDOW_SECONDS", "60"))
+    backoff = RestartBackoff(limit=restart_limit, window_seconds=restart_window_seconds)
+
+    sock = _bind_socket(host, port)
+    started = time.perf_counter()
+    preload_classifier()
+    print(f"🚰 Model loaded once in parent {os.getpid()} in {time.perf_counter() - started:.2f}s")
+
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    # Slot -> monotonic time its replacement worker is due
+    restarts: Dict[int, float] = {}
+    stopping = False
+    exit_status = 0
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(sock, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+        print(f"👷 Worker {slot} started (pid {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+
+    parent = process_memory()
+    print(f"📊 Parent RSS {parent.get('rss_bytes', 0) / 2**20:.1f} MiB")
+
+    next_report = time.monotonic() + rss_report_seconds
+    while children or (restarts and not stopping):
+        pid, status = os.waitpid(-1, os.WNOHANG) if children else (0, 0)
+        if pid:
+            slot = children.pop(pid, None)
+            if slot is not None and not stopping:
+                delay = backoff.next_delay(slot)
+                if delay is None:
+                    print(f"❌ Worker {slot} (pid {pid}) exited with status {status}, "
+                          f"{restart_limit} times within {restart_window_seconds:.0f}s; stopping the server")
+                    exit_status = 1
+                    stop(None, None)
+                else:
+                    print(f"⚠️  Worker {slot} (pid {pid}) exited with status {status}, restarting in {delay:.1f}s")
+                    restarts[slot] = time.monotonic() + delay
+            continue
+
+        if stopping:
+            restarts.clear()
+        for slot, due in list(restarts.items()):
+            if time.monotonic() >= due:
+                del restarts[slot]
+                spawn(slot)
+
+        if rss_report_seconds > 0 and time.monotonic() >= next_report:
+            for child_pid, slot in sorted(children.items(), key=lambda item: item[1]):
+                memory = process_memory(child_pid)
+                print(
+                    f"📊 Worker {slot} (pid {child_pid}): "
+                    f"RSS {memory.get('rss_bytes', 0) / 2**20:.1f} MiB, "
+                    f"PSS {memory.get('pss_bytes', 0) / 2**20:.1f} MiB, "
+                    f"private {(memory.get('private_clean_bytes', 0) + memory.get('private_dirty_bytes', 0)) / 2**20:.1f} MiB"
+                )
+            next_report = time.monotonic() + rss_report_seconds
+        time.sleep(0.2)
+
+    sock.close()
+    print("🔧 All workers stopped")
+    return exit_status
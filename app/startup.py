@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Synthetic descriptions run through the classifier before it is marked ready, so the
+# first real request doesn't pay for lazy imports, regex compilation or cold caches
+WARMUP_DESCRIPTIONS = [
+    "water is leaking from under the kitchen sink",
+    "kitchen sink is clogged and water won't drain",
+    "no hot water coming from the water heater",
+    "faucet handle is loose and dripping",
+    "toilet won't flush properly",
+    "emergency! pipe burst and the basement is flooding",
+    "sewer smell coming from the yard",
+    "garbage disposal is jammed",
+    "water pressure is very low in the shower",
+]
+
+
+class StartupState:
+    """Tracks model load and warm-up progress for the readiness endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.monotonic()
+        self.model_loaded_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.first_classification_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def mark_model_loaded(self):
+        self.model_loaded_at = time.monotonic()
+
+    def mark_ready(self):
+        self.ready_at = time.monotonic()
+
+    def mark_failed(self, error: str):
+        self.error = error
+
+    def mark_first_classification(self) -> bool:
+        """Record the first successful classification; returns True only the first time"""
+        if self.first_classification_at is not None:
+            return False
+        with self._lock:
+            if self.first_classification_at is not None:
+                return False
+            self.first_classification_at = time.monotonic()
+            return True
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        return "ready" if self.ready else "starting"
+
+    def _since_start(self, timestamp: Optional[float]) -> Optional[float]:
+        return None if timestamp is None else timestamp - self.started_at
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'status': self.status,
+            'ready': self.ready,
+            'model_load_seconds': self._since_start(self.model_loaded_at),
+            'cold_start_seconds': self._since_start(self.ready_at),
+            'time_to_first_classification_seconds': self._since_start(self.first_classification_at),
+            'error': self.error,
+        }
+
+
+def warm_up(classifier, rounds: int = 3):
+    """Run synthetic classifications through the single and batch paths, bypassing the result cache"""
+    for _ in range(rounds):
+        for description in WARMUP_DESCRIPTIONS:
+            classifier.classify_issue(description, use_cache=False)
+        classifier.classify_batch(WARMUP_DESCRIPTIONS, use_cache=False)
@@ -0,0 +1,57 @@
+from typing import AsyncIterator, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streaming response that can be produced while the request body is still being read.
+
+    StreamingResponse normally consumes `receive()` in the background to watch for a
+    client disconnect, which would steal request body chunks from the endpoint. Here
+    the body reader sees the disconnect instead (as ClientDisconnect).
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into (line number, line) pairs, skipping blank lines.
+
+    Only the current partial line is buffered, so memory stays bounded by
+    `max_line_bytes` no matter how large the stream is. A line longer than that is
+    discarded and reported as (line number, None).
+    """
+    buffer = b""
+    line_number = 0
+    oversized = False
+
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                if len(buffer) > max_line_bytes:
+                    # Drop the rest of this line as it arrives
+                    oversized = True
+                    buffer = b""
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+            line_number += 1
+            if oversized or len(line) > max_line_bytes:
+                oversized = False
+                yield line_number, None
+            elif line.strip():
+                yield line_number, line
+
+    if oversized:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, buffer
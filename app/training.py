@@ -0,0 +1,220 @@
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .cascade import CharNgramModel
+from .classifier import MODEL_VERSION, preprocess_text
+from .engine import HashedNBScorer
+from .models import IssueCategory
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# (description, category) pairs read from a training source
+Example = Tuple[str, str]
+
+DEFAULT_TEXT_FIELD = "description"
+DEFAULT_LABEL_FIELDS = ("category", "classification.category")
+
+_JOBS_ARRAY = re.compile(r'"jobs"\s*:\s*\[')
+_CATEGORIES = {category.value for category in IssueCategory}
+
+
+def _lookup(record: Dict[str, Any], field: str) -> Any:
+    """Read a dotted field path such as "classification.category" from a record"""
+    value: Any = record
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def iter_export_jobs(path: str, read_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of the `jobs` array of an export_job_report file one at a time.
+
+    Only the job being decoded is held in memory, so exports much larger than RAM
+    can be read.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+
+        def fill() -> bool:
+            nonlocal buffer
+            chunk = f.read(read_size)
+            buffer += chunk
+            return bool(chunk)
+
+        # Find the start of the jobs array
+        while True:
+            match = _JOBS_ARRAY.search(buffer)
+            if match:
+                position = match.end()
+                break
+            if not fill():
+                raise ValueError(f"{path} has no \"jobs\" array")
+
+        while True:
+            # Skip whitespace and separators before the next element
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position >= len(buffer):
+                buffer, position = '', 0
+                if not fill():
+                    raise ValueError(f"{path} ended inside the \"jobs\" array")
+                continue
+            if buffer[position] == ']':
+                return
+
+            try:
+                job, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Most likely the element continues past the buffer; read more and retry
+                buffer, position = buffer[position:], 0
+                if not fill():
+                    raise
+                continue
+            yield job
+            position = end
+
+
+def iter_jsonl_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the JSON objects of a JSONL file, skipping blank and malformed lines"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def iter_examples(paths: Sequence[str], text_field: str = DEFAULT_TEXT_FIELD,
+                  label_fields: Sequence[str] = DEFAULT_LABEL_FIELDS,
+                  stats: Optional[Counter] = None) -> Iterator[Example]:
+    """Stream labeled examples from export JSON and JSONL files.
+
+    Files ending in .jsonl or .ndjson are read line by line, anything else as an
+    export_job_report document. The label is the first of `label_fields` that is
+    present; records without a description or a known category are counted in
+    `stats['skipped']` and left out.
+    """
+    stats = stats if stats is not None else Counter()
+    for path in paths:
+        records = iter_jsonl_records(path) if path.endswith(('.jsonl', '.ndjson')) else iter_export_jobs(path)
+        for record in records:
+            text = _lookup(record, text_field)
+            label = next((value for value in (_lookup(record, field) for field in label_fields) if value is not None), None)
+            if not isinstance(text, str) or not text.strip() or label not in _CATEGORIES:
+                stats['skipped'] += 1
+                continue
+            stats['examples'] += 1
+            yield text, label
+
+
+def _chunks(examples: Iterable[Example], size: int) -> Iterator[List[Example]]:
+    iterator = iter(examples)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """Peak resident memory of this process so far, where the platform reports it"""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def train_hashed_model(examples: Iterable[Example], chunk_size: int = 10000, n_features: int = 2 ** 16,
+                       alpha: float = 1.0, base: Optional[HashedNBScorer] = None,
+                       progress=None) -> Tuple[HashedNBScorer, Dict[str, Any]]:
+    """Fit a hashed Naive Bayes model chunk by chunk.
+
+    Memory is bounded by one chunk of examples plus the model's count arrays,
+    whatever the size of the input. Passing `base` continues training an existing
+    model. Returns the model and a report with counts and timings.
+    """
+    started = time.perf_counter()
+    model = base or HashedNBScorer.empty([category.value for category in IssueCategory], n_features=n_features, alpha=alpha)
+    labels_seen: Counter = Counter()
+    rows = 0
+    chunks = 0
+
+    for chunk in _chunks(examples, chunk_size):
+        texts = [preprocess_text(text.lower()) for text, _ in chunk]
+        labels = [label for _, label in chunk]
+        model = model.partial_fit(texts, labels)
+        labels_seen.update(labels)
+        rows += len(chunk)
+        chunks += 1
+        if progress is not None:
+            progress(rows, time.perf_counter() - started)
+
+    seconds = time.perf_counter() - started
+    return model, {
+        'examples': rows,
+        'chunks': chunks,
+        'chunk_size': chunk_size,
+        'n_features': model.n_features,
+        'class_counts': dict(sorted(labels_seen.items())),
+        'training_seconds': seconds,
+        'examples_per_second': rows / seconds if seconds else 0.0,
+        'peak_memory_bytes': peak_memory_bytes(),
+    }
+
+
+def train_fallback_model(examples: Iterable[Example], max_examples: int = 50000,
+                         seed: int = 0) -> Tuple[CharNgramModel, Dict[str, Any]]:
+    """Fit the character n-gram fallback model on a uniform sample of the examples.
+
+    The logistic regression needs its training set in memory, so at most
+    `max_examples` are kept, drawn by reservoir sampling from the whole stream.
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    sample: List[Example] = []
+    seen = 0
+    for example in examples:
+        seen += 1
+        if len(sample) < max_examples:
+            sample.append(example)
+        else:
+            slot = rng.randrange(seen)
+            if slot < max_examples:
+                sample[slot] = example
+    if not sample:
+        raise ValueError("No labeled examples to train the fallback model on")
+
+    model = CharNgramModel.train([preprocess_text(text.lower()) for text, _ in sample], [label for _, label in sample])
+    return model, {
+        'examples': len(sample),
+        'examples_seen': seen,
+        'training_seconds': time.perf_counter() - started,
+    }
+
+
+def model_metadata(report: Dict[str, Any], sources: Sequence[str], model_version: str = MODEL_VERSION) -> Dict[str, Any]:
+    """Artifact metadata for a model trained from `sources`"""
+    return {
+        'model_version': model_version,
+        'created_at': datetime.now().isoformat(),
+        'training_examples': report['examples'],
+        'training_sources': [str(source) for source in sources],
+    }
@@ -0,0 +1,230 @@
+"""
+Classifier micro-benchmarks
+Latency percentiles, batch throughput, preprocessing/keyword cost, load time and memory
+
+Run from the repository root:
+    python -m benchmarks.classifier --output results.json
+    python -m benchmarks.classifier --compare baseline.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.classifier import TRAINING_DATA, PlumbingIssueClassifier, tokenize
+from app.startup import WARMUP_DESCRIPTIONS
+from app.training import peak_memory_bytes
+
+# Lower-is-better metrics regress when they grow, higher-is-better ones when they shrink
+LOWER = "lower"
+HIGHER = "higher"
+
+CORPUS = list(WARMUP_DESCRIPTIONS) + [text for text, _ in TRAINING_DATA] + [
+    "Emergency! Pipe burst and water is flooding the basement right now",
+    "Water heater pilot light keeps going out and there is no hot water",
+    "Slow drip from the bathroom faucet, no rush, whenever convenient",
+    "Garbage disposal hums but won't spin and smells bad",
+]
+
+BATCH_SIZES = (1, 8, 64, 256)
+
+
+def _metric(value: float, unit: str, better: str) -> Dict[str, Any]:
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def per_call_us(fn: Callable[[], Any], iterations: int, repeats: int = 5) -> float:
+    """Median microseconds per call over several timed runs"""
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        runs.append((time.perf_counter() - started) / iterations * 1e6)
+    return median(runs)
+
+
+def bench_single_latency(classifier: PlumbingIssueClassifier, samples: int) -> Dict[str, Dict[str, Any]]:
+    """Latency distribution of uncached classify_issue calls"""
+    latencies = np.empty(samples)
+    for index in range(samples):
+        description = CORPUS[index % len(CORPUS)]
+        started = time.perf_counter()
+        classifier.classify_issue(description, use_cache=False)
+        latencies[index] = (time.perf_counter() - started) * 1e6
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'classify_issue_p50_us': _metric(float(p50), 'us', LOWER),
+        'classify_issue_p95_us': _metric(float(p95), 'us', LOWER),
+        'classify_issue_p99_us': _metric(float(p99), 'us', LOWER),
+    }
+
+
+def bench_batch_throughput(classifier: PlumbingIssueClassifier, items: int) -> Dict[str, Dict[str, Any]]:
+    """Descriptions per second through classify_batch at several batch sizes"""
+    metrics = {}
+    for batch_size in BATCH_SIZES:
+        batch = [CORPUS[index % len(CORPUS)] + f" #{index}" for index in range(batch_size)]
+        calls = max(1, items // batch_size)
+        seconds = per_call_us(lambda: classifier.classify_batch(batch, use_cache=False), calls, repeats=3) / 1e6
+        metrics[f'classify_batch_{batch_size}_per_second'] = _metric(batch_size / seconds, 'items/s', HIGHER)
+    return metrics
+
+
+def bench_text_processing(classifier: PlumbingIssueClassifier, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """Cost of the per-description steps that run before and after the model"""
+    prepared = [tokenize(description) for description in CORPUS]
+    cleaned = [text for text, _ in prepared]
+    token_lists = [tokens for _, tokens in prepared]
+    count = len(CORPUS)
+
+    def preprocess():
+        for description in CORPUS:
+            tokenize(description)
+
+    def keywords():
+        for text in cleaned:
+            classifier.keyword_matcher.scan(text)
+
+    def vectorize():
+        classifier.engine.vectorize_tokens(token_lists)
+
+    return {
+        'preprocess_us': _metric(per_call_us(preprocess, iterations) / count, 'us', LOWER),
+        'keyword_scan_us': _metric(per_call_us(keywords, iterations) / count, 'us', LOWER),
+        'vectorize_us': _metric(per_call_us(vectorize, iterations) / count, 'us', LOWER),
+    }
+
+
+def bench_model_load(model_path: str, repeats: int) -> Dict[str, Dict[str, Any]]:
+    """Time to construct a classifier from an existing artifact, and the memory it allocates"""
+    durations = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        PlumbingIssueClassifier(model_path=model_path, cache_size=0)
+        durations.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    loaded = PlumbingIssueClassifier(model_path=model_path, cache_size=0)
+    for description in CORPUS:
+        loaded.classify_issue(description, use_cache=False)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'model_load_ms': _metric(median(durations), 'ms', LOWER),
+        'load_and_classify_peak_alloc_bytes': _metric(float(traced_peak), 'bytes', LOWER),
+    }
+
+
+def run_benchmarks(quick: bool = False) -> Dict[str, Any]:
+    """Run every benchmark and return the results document"""
+    scale = 0.1 if quick else 1.0
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, "benchmark.model")
+        classifier = PlumbingIssueClassifier(model_path=model_path, cache_size=0)
+        for description in CORPUS:
+            classifier.classify_issue(description, use_cache=False)
+
+        metrics: Dict[str, Dict[str, Any]] = {}
+        metrics.update(bench_single_latency(classifier, int(5000 * scale)))
+        metrics.update(bench_batch_throughput(classifier, int(5000 * scale)))
+        metrics.update(bench_text_processing(classifier, int(200 * scale)))
+        metrics.update(bench_model_load(model_path, 5))
+
+    peak = peak_memory_bytes()
+    if peak is not None:
+        metrics['peak_rss_bytes'] = _metric(float(peak), 'bytes', LOWER)
+
+    return {
+        'created_at': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model_version': classifier.model_version,
+        },
+        'metrics': metrics,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Compare two results documents metric by metric.
+
+    A metric regresses when it is worse than the baseline by more than
+    `threshold` (a fraction, 0.15 == 15%) in its `better` direction.
+    """
+    rows = []
+    for name, metric in current['metrics'].items():
+        reference = baseline.get('metrics', {}).get(name)
+        if reference is None or not reference['value']:
+            continue
+        change = metric['value'] / reference['value'] - 1
+        worse = change if metric['better'] == LOWER else -change
+        rows.append({
+            'metric': name,
+            'baseline': reference['value'],
+            'current': metric['value'],
+            'unit': metric['unit'],
+            'change': change,
+            'regressed': worse > threshold,
+        })
+    return rows
+
+
+def _print_results(results: Dict[str, Any]):
+    for name, metric in results['metrics'].items():
+        print(f"  {name:40s} {metric['value']:14.2f} {metric['unit']}")
+
+
+def _print_comparison(rows: List[Dict[str, Any]], threshold: float):
+    print(f"Comparison against baseline (regression threshold {threshold:.0%})")
+    for row in rows:
+        flag = "❌ REGRESSED" if row['regressed'] else "✅"
+        print(f"  {row['metric']:40s} {row['baseline']:14.2f} -> {row['current']:14.2f} {row['unit']:8s} "
+              f"{row['change']:+7.1%}  {flag}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the plumbing issue classifier")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file (use it later as a baseline)")
+    parser.add_argument("--compare", default=None, help="Baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown as a fraction (default: 0.15)")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for a smoke run")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(quick=args.quick)
+    print("Classifier benchmarks")
+    _print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_results(results, baseline, args.threshold)
+        _print_comparison(rows, args.threshold)
+        if any(row['regressed'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+HTTP load test and request-log replay
+Drives /classify in-process through an ASGI transport or against a running server
+
+Run from the repository root:
+    python -m benchmarks.load_test --requests 2000 --concurrency 32
+    python -m benchmarks.load_test --log requests.jsonl --field title --rate 200 --duration 30
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --saturation
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+import numpy as np
+
+from benchmarks.classifier import CORPUS
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+
+def load_descriptions(path: str, field: str = "description") -> List[str]:
+    """Read the descriptions to replay from a JSONL request log, in log order"""
+    descriptions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                value = json.loads(line).get(field)
+            except (ValueError, AttributeError):
+                continue
+            if isinstance(value, str) and value.strip():
+                descriptions.append(value)
+    if not descriptions:
+        raise ValueError(f"No {field!r} values found in {path}")
+    return descriptions
+
+
+@asynccontextmanager
+async def open_client(url: Optional[str] = None, timeout: float = 30.0) -> AsyncIterator[httpx.AsyncClient]:
+    """HTTP client for a live server at `url`, or for app.main.app in this process.
+
+    In-process, the application lifespan runs around the client and the client
+    waits until the model is ready, like a load balancer would.
+    """
+    if url:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            deadline = time.monotonic() + timeout
+            while (await client.get("/health/ready")).status_code != 200:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Classifier did not become ready")
+                await asyncio.sleep(0.05)
+            yield client
+
+
+async def run_load(client: httpx.AsyncClient, descriptions: Sequence[str], requests: int,
+                   concurrency: int, rate: float = 0.0, duration: Optional[float] = None,
+                   endpoint: str = "/classify") -> Dict[str, Any]:
+    """Send `requests` classifications and summarize the outcome.
+
+    With `rate` > 0 requests are issued open-loop at that many per second, and
+    `latency` is measured from each request's scheduled start, so time spent
+    waiting for one of the `concurrency` slots counts against the server. With
+    `rate` == 0, `concurrency` clients send back-to-back (closed loop). `duration`
+    stops issuing new requests after that many seconds.
+    """
+    records: List[tuple] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    stop_at = started + duration if duration else None
+
+    async def send(index: int, scheduled: float):
+        async with semaphore:
+            sent = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json={"description": descriptions[index % len(descriptions)]})
+                outcome = str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            finished = time.perf_counter()
+        records.append((finished - scheduled, sent - scheduled, outcome, finished))
+
+    if rate > 0:
+        tasks = []
+        for index in range(requests):
+            scheduled = started + index / rate
+            if stop_at is not None and scheduled >= stop_at:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(index, scheduled)))
+        await asyncio.gather(*tasks)
+    else:
+        counter = iter(range(requests))
+
+        async def worker():
+            for index in counter:
+                now = time.perf_counter()
+                if stop_at is not None and now >= stop_at:
+                    return
+                await send(index, now)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return summarize(records, time.perf_counter() - started, concurrency=concurrency, rate=rate)
+
+
+def summarize(records: Sequence[tuple], elapsed: float, concurrency: int, rate: float) -> Dict[str, Any]:
+    """Latency percentiles, histogram, outcome counts and throughput for one run"""
+    latencies_ms = np.array([record[0] for record in records]) * 1000
+    queued_ms = np.array([record[1] for record in records]) * 1000
+    outcomes: Dict[str, int] = {}
+    for record in records:
+        outcomes[record[2]] = outcomes.get(record[2], 0) + 1
+    succeeded = outcomes.get("200", 0)
+
+    histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+    for latency in latencies_ms:
+        histogram[bisect_left(HISTOGRAM_BUCKETS_MS, latency)] += 1
+
+    percentiles = np.percentile(latencies_ms, [50, 90, 95, 99]) if len(records) else [0.0] * 4
+    return {
+        'requests': len(records),
+        'succeeded': succeeded,
+        'error_rate': 1 - succeeded / len(records) if records else 0.0,
+        'outcomes': dict(sorted(outcomes.items())),
+        'concurrency': concurrency,
+        'offered_rate': rate or None,
+        'elapsed_seconds': elapsed,
+        'throughput_per_second': succeeded / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': float(percentiles[0]),
+            'p90': float(percentiles[1]),
+            'p95': float(percentiles[2]),
+            'p99': float(percentiles[3]),
+            'max': float(latencies_ms.max()) if len(records) else 0.0,
+            'mean_queued': float(queued_ms.mean()) if len(records) else 0.0,
+        },
+        'histogram_ms': [
+            {'le': bound if bound != float('inf') else None, 'count': count}
+            for bound, count in zip(HISTOGRAM_BUCKETS_MS, histogram)
+        ],
+    }
+
+
+async def find_saturation(client: httpx.AsyncClient, descriptions: Sequence[str], requests_per_step: int,
+                          max_concurrency: int, max_error_rate: float = 0.01,
+                          endpoint: str = "/classify") -> Dict[str, Any]:
+    """Double closed-loop concurrency until throughput stops growing or errors appear.
+
+    The saturation throughput is the best successful throughput seen at an error
+    rate within `max_error_rate`; past it, more concurrency only adds latency.
+    """
+    steps = []
+    concurrency = 1
+    best: Optional[Dict[str, Any]] = None
+    while concurrency <= max_concurrency:
+        step = await run_load(client, descriptions, requests_per_step, concurrency, endpoint=endpoint)
+        steps.append(step)
+        print_step(step)
+        if step['error_rate'] > max_error_rate:
+            break
+        if best is not None and step['throughput_per_second'] < best['throughput_per_second'] * 1.05:
+            # Less than 5% more throughput for twice the concurrency: saturated
+            best = max(best, step, key=lambda item: item['throughput_per_second'])
+            break
+        best = step
+        concurrency *= 2
+
+    return {
+        'saturation_throughput_per_second': best['throughput_per_second'] if best else 0.0,
+        'saturation_concurrency': best['concurrency'] if best else None,
+        'saturation_p99_ms': best['latency_ms']['p99'] if best else None,
+        'steps': steps,
+    }
+
+
+def print_step(result: Dict[str, Any]):
+    latency = result['latency_ms']
+    print(f"  concurrency {result['concurrency']:4d}: {result['throughput_per_second']:9.1f} req/s, "
+          f"p50 {latency['p50']:7.2f} ms, p99 {latency['p99']:7.2f} ms, errors {result['error_rate']:.1%}")
+
+
+def print_report(result: Dict[str, Any]):
+    latency = result['latency_ms']
+    print(f"Requests:    {result['requests']} ({result['succeeded']} succeeded, error rate {result['error_rate']:.2%})")
+    print(f"Outcomes:    {', '.join(f'{outcome}: {count}' for outcome, count in result['outcomes'].items())}")
+    print(f"Throughput:  {result['throughput_per_second']:.1f} req/s over {result['elapsed_seconds']:.2f}s")
+    print(f"Latency ms:  p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  p95 {latency['p95']:.2f}  "
+          f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}  (mean queued {latency['mean_queued']:.2f})")
+    print("Histogram:")
+    largest = max((bucket['count'] for bucket in result['histogram_ms']), default=0) or 1
+    for bucket in result['histogram_ms']:
+        if not bucket['count']:
+            continue
+        label = f"<= {bucket['le']:g} ms" if bucket['le'] is not None else "> 5000 ms"
+        print(f"  {label:>12s} {bucket['count']:7d} {'█' * max(1, round(bucket['count'] / largest * 40))}")
+
+
+async def _main(args) -> Dict[str, Any]:
+    descriptions = load_descriptions(args.log, args.field) if args.log else CORPUS
+    async with open_client(args.url, timeout=args.timeout) as client:
+        target = args.url or "in-process app"
+        if args.saturation:
+            print(f"🔎 Searching for saturation against {target}")
+            result = await find_saturation(client, descriptions, args.requests, args.concurrency, endpoint=args.endpoint)
+            print(f"Saturation throughput: {result['saturation_throughput_per_second']:.1f} req/s "
+                  f"at concurrency {result['saturation_concurrency']}")
+            return result
+
+        mode = f"{args.rate:g} req/s open loop" if args.rate else "closed loop"
+        print(f"🚰 {args.requests} requests, concurrency {args.concurrency}, {mode}, against {target}")
+        result = await run_load(client, descriptions, args.requests, args.concurrency,
+                                rate=args.rate, duration=args.duration, endpoint=args.endpoint)
+        print_report(result)
+        return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test /classify and replay request logs")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (default: drive app.main.app in-process)")
+    parser.add_argument("--log", default=None, help="JSONL request log to replay (default: built-in sample descriptions)")
+    parser.add_argument("--field", default="description", help="Log field holding the description (default: description)")
+    parser.add_argument("--endpoint", default="/classify", help="Endpoint to POST to (default: /classify)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests to send, per step with --saturation (default: 2000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at most; the upper bound with --saturation (default: 16)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Open-loop request rate per second, 0 for closed loop (default: 0)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop issuing requests after this many seconds")
+    parser.add_argument("--saturation", action="store_true", help="Double concurrency until throughput stops growing")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.url is None:
+        os.environ.setdefault("CLASSIFIER_BLOCKING_STARTUP", "true")
+    result = asyncio.run(_main(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"📄 Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
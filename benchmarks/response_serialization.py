@@ -0,0 +1,92 @@
+"""
+Benchmark /classify response serialization
+Compares the default pydantic response path with CLASSIFIER_FAST_RESPONSE
+
+Run from the repository root:
+    python -m benchmarks.response_serialization
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from statistics import median
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+import httpx
+
+import app.main as main_module
+from app.classifier import PlumbingIssueClassifier
+
+from .classifier import per_call_us
+
+DESCRIPTION = "Water is leaking from under the kitchen sink and the floor is wet"
+
+
+def bench_serialization(iterations: int):
+    """Response rendering only: the work done after the classifier returns"""
+    classifier = PlumbingIssueClassifier(cache_size=0)
+    result = classifier.classify_issue(DESCRIPTION)
+    route = next(route for route in main_module.app.routes if getattr(route, "path", None) == "/classify")
+    loop = asyncio.new_event_loop()
+
+    def pydantic_path():
+        # What FastAPI does with a returned IssueResponse: validate against response_model, then encode
+        response = main_module._build_issue_response(result, classifier.model_version)
+        content = loop.run_until_complete(
+            serialize_response(field=route.secure_cloned_response_field, response_content=response)
+        )
+        JSONResponse(content)
+
+    def fast_path():
+        main_module._render_issue_response(result, classifier)
+
+    slow = per_call_us(pydantic_path, iterations)
+    fast = per_call_us(fast_path, iterations)
+    loop.close()
+    return slow, fast
+
+
+async def _bench_endpoint(iterations: int, repeats: int = 3) -> float:
+    app = main_module.app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            payload = {"description": DESCRIPTION}
+            await client.post("/classify", json=payload)
+            runs = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    await client.post("/classify", json=payload)
+                runs.append((time.perf_counter() - started) / iterations * 1e6)
+            return median(runs)
+
+
+def bench_endpoint(iterations: int, fast: bool) -> float:
+    """Full /classify request through the ASGI app, cache enabled so inference is cheap"""
+    os.environ["CLASSIFIER_FAST_RESPONSE"] = "true" if fast else "false"
+    os.environ["CLASSIFIER_BLOCKING_STARTUP"] = "true"
+    return asyncio.run(_bench_endpoint(iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /classify response serialization")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per timed run (default: 2000)")
+    args = parser.parse_args()
+
+    slow, fast = bench_serialization(args.iterations)
+    print("Response serialization (per response)")
+    print(f"  pydantic response_model: {slow:8.1f} µs")
+    print(f"  fast path:               {fast:8.1f} µs  ({slow / fast:.1f}x)")
+
+    slow = bench_endpoint(args.iterations // 4, fast=False)
+    fast = bench_endpoint(args.iterations // 4, fast=True)
+    print("POST /classify end to end (in-process client, cached classification)")
+    print(f"  pydantic response_model: {slow:8.1f} µs")
+    print(f"  fast path:               {fast:8.1f} µs  ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
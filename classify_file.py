@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Offline bulk classification for JSONL files
+Classifies large exports without the HTTP server, using every core
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from enum import Enum
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.classifier import PlumbingIssueClassifier
+from app.models import IssueRequest
+
+# Classifier used by pool workers: inherited from the parent with fork, loaded by
+# _init_worker with spawn
+_classifier = None
+
+
+def _init_worker(model_path: Optional[str]):
+    global _classifier
+    if _classifier is None:
+        _classifier = PlumbingIssueClassifier(model_path=model_path)
+
+
+def _to_json_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def classify_chunk(chunk: Tuple[int, List[str]], field: str, id_field: str) -> Tuple[int, str]:
+    """Classify one chunk of raw JSONL lines and return (line count, output text)"""
+    first_line, lines = chunk
+    records: List[Dict[str, Any]] = []
+    descriptions: List[str] = []
+    pending: List[int] = []
+
+    for offset, line in enumerate(lines):
+        record: Dict[str, Any] = {'line': first_line + offset}
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("line is not a JSON object")
+            if id_field in data:
+                record[id_field] = data[id_field]
+            issue = IssueRequest.model_validate({'description': data.get(field)})
+        except ValidationError as e:
+            record['error'] = f"Invalid request: {'; '.join(err['msg'] for err in e.errors())}"
+        except ValueError as e:
+            record['error'] = f"Invalid JSON: {e}"
+        else:
+            pending.append(len(records))
+            descriptions.append(issue.description)
+        records.append(record)
+
+    results = _classifier.classify_batch(descriptions) if descriptions else []
+    for index, result in zip(pending, results):
+        records[index]['classification'] = {
+            key: _to_json_value(value) for key, value in result.items() if key not in ('processing_time_ms', 'stage_timings')
+        }
+        records[index]['model_version'] = _classifier.model_version
+
+    return len(lines), ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def _read_chunks(path: str, chunk_size: int, skip_lines: int) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (first line number, lines) chunks, skipping lines already processed"""
+    with open(path, 'r', encoding='utf-8') as f:
+        line_number = 1
+        for _ in islice(f, skip_lines):
+            line_number += 1
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            yield line_number, lines
+            line_number += len(lines)
+
+
+def _load_checkpoint(path: str, input_path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('input') != os.path.abspath(input_path):
+        raise ValueError(f"Checkpoint {path} belongs to {checkpoint.get('input')}, not {input_path}")
+    return checkpoint
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def classify_file(input_path: str, output_path: str, workers: Optional[int] = None, chunk_size: int = 1000,
+                  field: str = "description", id_field: str = "request_id",
+                  checkpoint_path: Optional[str] = None, resume: bool = False,
+                  model_path: Optional[str] = None, progress: bool = True) -> Dict[str, Any]:
+    """Classify every line of a JSONL file into an output JSONL file in input order"""
+    global _classifier
+
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    checkpoint = {'input': os.path.abspath(input_path), 'lines_done': 0, 'output_bytes': 0}
+
+    mode = 'wb'
+    if resume and os.path.exists(checkpoint_path):
+        if not os.path.exists(output_path):
+            raise ValueError(f"Cannot resume: {output_path} is missing but {checkpoint_path} exists")
+        checkpoint = _load_checkpoint(checkpoint_path, input_path)
+        mode = 'r+b'
+        print(f"↩️  Resuming after line {checkpoint['lines_done']}", file=sys.stderr)
+
+    # Load the model once; forked workers inherit it instead of loading their own
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    load_started = time.perf_counter()
+    _classifier = PlumbingIssueClassifier(model_path=model_path)
+    load_seconds = time.perf_counter() - load_started
+
+    rows = 0
+    started = time.perf_counter()
+    context = multiprocessing.get_context(start_method)
+    with open(output_path, mode) as output, context.Pool(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+        output.seek(checkpoint['output_bytes'])
+        output.truncate()
+
+        # Keep a bounded number of chunks in flight so memory doesn't grow with the input
+        in_flight = deque()
+        chunks = _read_chunks(input_path, chunk_size, checkpoint['lines_done'])
+        last_report = started
+
+        def write_next():
+            nonlocal rows, last_report
+            line_count, text = in_flight.popleft().get()
+            output.write(text.encode('utf-8'))
+            output.flush()
+            rows += line_count
+            checkpoint['lines_done'] += line_count
+            checkpoint['output_bytes'] = output.tell()
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+            now = time.perf_counter()
+            if progress and now - last_report >= 2:
+                print(f"   {rows} rows, {rows / (now - started):.0f} rows/s", file=sys.stderr)
+                last_report = now
+
+        for chunk in chunks:
+            in_flight.append(pool.apply_async(classify_chunk, (chunk, field, id_field)))
+            if len(in_flight) >= workers * 2:
+                write_next()
+        while in_flight:
+            write_next()
+
+    elapsed = time.perf_counter() - started
+    # Nothing is checkpointed when there was nothing left to classify
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'workers': workers,
+        'model_load_seconds': load_seconds,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Classify plumbing issues in a JSONL file without the API server")
+    parser.add_argument("input", help="JSONL file with one request object per line")
+    parser.add_argument("output", help="JSONL file to write results to, in input order")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Lines per work unit (default: 1000)")
+    parser.add_argument("--field", default="description", help="Field holding the issue description (default: description)")
+    parser.add_argument("--id-field", default="request_id", help="Field copied to the output when present (default: request_id)")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint of an interrupted run")
+    parser.add_argument("--model-path", default=None, help="Model artifact (default: CLASSIFIER_MODEL_PATH or models/)")
+    args = parser.parse_args(argv)
+
+    print(f"🚰 Classifying {args.input} -> {args.output}", file=sys.stderr)
+    stats = classify_file(
+        args.input, args.output, workers=args.workers, chunk_size=args.chunk_size,
+        field=args.field, id_field=args.id_field, checkpoint_path=args.checkpoint,
+        resume=args.resume, model_path=args.model_path
+    )
+    print(
+        f"✅ {stats['rows']} rows in {stats['seconds']:.2f}s "
+        f"({stats['rows_per_second']:.0f} rows/s, {stats['workers']} workers)",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ Main entry point for running the FastAPI application
 
 import uvicorn
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -16,17 +17,24 @@ if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
     debug = os.getenv("DEBUG", "False").lower() == "true"
+    workers = int(os.getenv("WORKERS", "1"))
     
     print("🚰 Starting Smart Plumbing Issue Classifier API...")
     print(f"📍 Server will be available at: http://{host}:{port}")
     print(f"📚 API Documentation: http://{host}:{port}/docs")
     print(f"🔍 Health Check: http://{host}:{port}/health")
     
-    # Run the application
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        reload=debug,
-        log_level="info"
-    ) 
\ No newline at end of file
+    if workers > 1 and not debug and hasattr(os, "fork"):
+        # Pre-fork: load the model once and share it copy-on-write with every worker
+        from app.server import serve_prefork
+        print(f"👥 Starting {workers} pre-forked workers")
+        sys.exit(serve_prefork(host, port, workers, log_level="info"))
+    else:
+        # Run the application
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            reload=debug,
+            log_level="info"
+        )
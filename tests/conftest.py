@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+# The workflow scripts import each other as top-level modules
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workflow"))
+
+CLASSIFICATION = {
+    "category": "leak", "confidence": 0.9, "severity": "high", "urgency": "emergency",
+    "estimated_duration": "1-2 hours", "required_tools": [], "recommended_parts": [],
+    "safety_notes": [], "next_steps": []
+}
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """Answers the health checks, /classify and /classify/batch, recording which client connection each request came on"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health/ready":
+            ready = self.server.ready and not self.server.down
+            self._reply(200 if ready else 503, {"ready": ready})
+        else:
+            self._reply(503 if self.server.down else 200, {"status": "healthy"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.client_address, body))
+        time.sleep(self.server.delay)
+        if self.server.down:
+            self._reply(500, {"detail": "down"})
+        elif self.path == "/classify/batch":
+            results = [{"index": index, "response": None if item["description"] == "fail" else {"classification": CLASSIFICATION}}
+                       for index, item in enumerate(body["requests"])]
+            self._reply(200, {"results": results})
+        elif body["description"] == "fail":
+            self._reply(422, {"detail": "invalid description"})
+        else:
+            self._reply(200, {"classification": CLASSIFICATION})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def start_fake_api(delay=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPIHandler)
+    server.requests = []
+    server.down = False
+    server.ready = True
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def stop_fake_api(server):
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def fake_api_factory():
+    """Starts fake APIs on demand and stops them after the test"""
+    servers = []
+
+    def start(delay=0.0):
+        server, url = start_fake_api(delay)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        stop_fake_api(server)
+
+@pytest.fixture
+def fake_api(fake_api_factory):
+    return fake_api_factory()
+
+@pytest.fixture
+def slow_fake_api(fake_api_factory):
+    return fake_api_factory(delay=0.5)
+
+def wait_until_ready(test_client, timeout=30.0):
+    """Poll the readiness endpoint until the background model load finishes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = test_client.get("/health/ready")
+        if response.status_code == 200:
+            return response.json()
+        time.sleep(0.02)
+    raise AssertionError("classifier did not become ready in time")
+
+@pytest.fixture
+def client_env():
+    """Environment overrides for ready_client; override this fixture or parametrize it"""
+    return {}
+
+@pytest.fixture
+def ready_client(client_env, monkeypatch):
+    """A client running the application lifespan with client_env set, once the model is ready"""
+    for name, value in client_env.items():
+        monkeypatch.setenv(name, value)
+    with TestClient(app) as test_client:
+        wait_until_ready(test_client)
+        yield test_client
@@ -1,9 +1,64 @@
+import json
+import re
+import threading
+import time
 import pytest
 from fastapi.testclient import TestClient
+import app.main as main_module
+from app.classifier import PlumbingIssueClassifier
+from app.executor import ExecutorQueueFull
 from app.main import app
+from tests.conftest import wait_until_ready
 
 client = TestClient(app)
 
+# The /classify response as documented before the fast path and debug timings were added
+BASELINE_ISSUE_RESPONSE_SCHEMA = {
+    "properties": {
+        "request_id": {"type": "string", "title": "Request Id"},
+        "classification": {"$ref": "#/components/schemas/IssueClassification"},
+        "processing_time_ms": {"type": "number", "title": "Processing Time Ms"},
+        "model_version": {"type": "string", "title": "Model Version"}
+    },
+    "type": "object",
+    "required": ["request_id", "classification", "processing_time_ms", "model_version"],
+    "title": "IssueResponse"
+}
+
+BASELINE_ISSUE_CLASSIFICATION_SCHEMA = {
+    "properties": {
+        "category": {"$ref": "#/components/schemas/IssueCategory"},
+        "confidence": {"type": "number", "maximum": 1.0, "minimum": 0.0, "title": "Confidence"},
+        "severity": {"$ref": "#/components/schemas/IssueSeverity"},
+        "urgency": {"$ref": "#/components/schemas/IssueUrgency"},
+        "estimated_duration": {
+            "type": "string", "title": "Estimated Duration", "description": "Estimated time to resolve"
+        },
+        "required_tools": {
+            "items": {"type": "string"}, "type": "array", "title": "Required Tools",
+            "description": "Tools likely needed"
+        },
+        "recommended_parts": {
+            "items": {"type": "string"}, "type": "array", "title": "Recommended Parts",
+            "description": "Parts that might be needed"
+        },
+        "safety_notes": {
+            "items": {"type": "string"}, "type": "array", "title": "Safety Notes",
+            "description": "Safety considerations"
+        },
+        "next_steps": {
+            "items": {"type": "string"}, "type": "array", "title": "Next Steps",
+            "description": "Recommended next steps"
+        }
+    },
+    "type": "object",
+    "required": [
+        "category", "confidence", "severity", "urgency", "estimated_duration",
+        "required_tools", "recommended_parts", "safety_notes", "next_steps"
+    ],
+    "title": "IssueClassification"
+}
+
 class TestPlumbingIssueClassifierAPI:
     
     def test_root_endpoint(self):
@@ -191,4 +246,327 @@ class TestPlumbingIssueClassifierAPI:
         
         # Processing time should be reasonable (less than 1 second)
         assert data["processing_time_ms"] > 0
-        assert data["processing_time_ms"] < 1000 
\ No newline at end of file
+        assert data["processing_time_ms"] < 1000 
+
+class TestBatchClassificationAPI:
+    
+    def test_classify_batch(self, ready_client):
+        """Test classification of several issues in one request"""
+        request_data = {
+            "requests": [
+                {"description": "Water is leaking from under the kitchen sink"},
+                {"description": "Toilet won't flush properly", "customer_name": "Jane Doe"},
+            ]
+        }
+        
+        response = ready_client.post("/classify/batch", json=request_data)
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["succeeded"] == 2
+        assert data["failed"] == 0
+        assert [item["index"] for item in data["results"]] == [0, 1]
+        for item in data["results"]:
+            assert item["error"] is None
+            assert "request_id" in item["response"]
+            assert "classification" in item["response"]
+    
+    def test_classify_batch_per_item_errors(self, ready_client):
+        """Test that invalid items are reported without failing the batch"""
+        request_data = {
+            "requests": [
+                {"description": "Leak"},
+                {"description": "Kitchen sink is clogged and water won't drain"},
+                {"customer_name": "John Doe"},
+            ]
+        }
+        
+        response = ready_client.post("/classify/batch", json=request_data)
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["succeeded"] == 1
+        assert data["failed"] == 2
+        assert data["results"][0]["error"]["error"] == "Invalid request"
+        assert data["results"][1]["response"] is not None
+        assert "description" in data["results"][2]["error"]["detail"]
+    
+    def test_classify_batch_empty(self, ready_client):
+        """Test that an empty batch is rejected"""
+        response = ready_client.post("/classify/batch", json={"requests": []})
+        assert response.status_code == 422
+    
+    def test_executor_stats(self, ready_client):
+        """Test that executor queue depth and wait time are reported"""
+        ready_client.post("/classify", json={"description": "Faucet handle is loose and dripping"})
+        response = ready_client.get("/executor/stats")
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["completed"] >= 1
+        for field in ["in_flight", "estimated_queue_depth", "wait_ms_avg", "wait_ms_max", "rejected"]:
+            assert field in data
+    
+    def test_process_stats(self, ready_client):
+        """Test that the worker reports its pid and resident memory"""
+        response = ready_client.get("/stats/process")
+        assert response.status_code == 200
+        assert response.json()["pid"] > 0
+    
+    def test_overloaded_executor_returns_503(self, ready_client, monkeypatch):
+        """Test that a full inference queue sheds load with Retry-After"""
+        monkeypatch.setattr(main_module.inference_executor, "max_queue", 0)
+        
+        response = ready_client.post("/classify", json={"description": "Toilet won't flush properly"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+class TestStartupAPI:
+    
+    def test_liveness_and_readiness_during_background_load(self, monkeypatch):
+        """Test that the server is alive but not ready until the model is warm"""
+        release = threading.Event()
+        
+        def slow_classifier():
+            release.wait(timeout=30)
+            return PlumbingIssueClassifier()
+        
+        monkeypatch.setattr(main_module, "PlumbingIssueClassifier", slow_classifier)
+        
+        with TestClient(app) as test_client:
+            assert test_client.get("/health/live").status_code == 200
+            
+            response = test_client.get("/health/ready")
+            assert response.status_code == 503
+            assert response.json()["status"] == "starting"
+            assert response.json()["ready"] is False
+            
+            response = test_client.post("/classify", json={"description": "Toilet won't flush properly"})
+            assert response.status_code == 503
+            
+            release.set()
+            ready = wait_until_ready(test_client)
+            assert ready["status"] == "ready"
+            assert ready["cold_start_seconds"] >= ready["model_load_seconds"] > 0
+            assert ready["time_to_first_classification_seconds"] is None
+            
+            response = test_client.post("/classify", json={"description": "Toilet won't flush properly"})
+            assert response.status_code == 200
+            
+            ready = test_client.get("/health/ready").json()
+            assert ready["time_to_first_classification_seconds"] >= ready["cold_start_seconds"]
+    
+    def test_blocking_startup(self, monkeypatch):
+        """Test that blocking startup is ready as soon as the lifespan starts"""
+        monkeypatch.setenv("CLASSIFIER_BLOCKING_STARTUP", "true")
+        
+        with TestClient(app) as test_client:
+            response = test_client.get("/health/ready")
+            assert response.status_code == 200
+            assert response.json()["model_version"] is not None
+    
+    def test_readiness_reports_failed_background_load(self, monkeypatch):
+        """Test that a model that fails to load is reported by the readiness probe"""
+        def broken_classifier():
+            raise RuntimeError("model file is corrupt")
+        
+        monkeypatch.setattr(main_module, "PlumbingIssueClassifier", broken_classifier)
+        
+        with TestClient(app) as test_client:
+            deadline = time.monotonic() + 30
+            while test_client.get("/health/ready").json()["status"] == "starting":
+                assert time.monotonic() < deadline, "classifier load never finished"
+                time.sleep(0.05)
+            
+            response = test_client.get("/health/ready")
+            assert response.status_code == 503
+            assert response.json()["status"] == "failed"
+            assert response.json()["error"] == "model file is corrupt"
+
+class TestStreamingClassificationAPI:
+    
+    def test_stream_preserves_order_and_reports_errors(self, ready_client):
+        """Test that every input line gets one output line, in order"""
+        body = "\n".join([
+            json.dumps({"description": "Water is leaking from under the kitchen sink"}),
+            "",
+            "not json",
+            json.dumps({"description": "Leak"}),
+            json.dumps({"description": "Toilet won't flush properly"}),
+        ])
+        
+        response = ready_client.post("/classify/stream", content=body,
+                                        headers={"content-type": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 4
+        assert "classification" in lines[0]
+        assert lines[1]["line"] == 3
+        assert lines[2]["line"] == 4
+        assert lines[2]["error"] == "Invalid request"
+        assert lines[3]["classification"]["category"] == "toilet"
+    
+    def test_stream_many_lines_in_micro_batches(self, ready_client, monkeypatch):
+        """Test a stream larger than the micro-batch size sent in chunks"""
+        monkeypatch.setenv("CLASSIFIER_STREAM_BATCH_SIZE", "7")
+        descriptions = [f"Kitchen sink number {i} is clogged" for i in range(50)]
+        
+        def chunks():
+            for description in descriptions:
+                yield (json.dumps({"description": description}) + "\n").encode()
+        
+        response = ready_client.post("/classify/stream", content=chunks())
+        assert response.status_code == 200
+        
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 50
+        assert all("request_id" in line for line in lines)
+    
+    def test_stream_rejects_oversized_line(self, ready_client, monkeypatch):
+        """Test that an overlong line is reported without buffering it"""
+        monkeypatch.setenv("CLASSIFIER_STREAM_MAX_LINE_BYTES", "200")
+        body = json.dumps({"description": "x" * 500}) + "\n" + json.dumps({"description": "No hot water coming from faucet"})
+        
+        response = ready_client.post("/classify/stream", content=body)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        
+        assert lines[0] == {"line": 1, "error": "Invalid request", "detail": "Line exceeds 200 bytes"}
+        assert "classification" in lines[1]
+    
+    def test_stream_gives_up_on_full_queue(self, ready_client, monkeypatch):
+        """Test that lines waiting too long for a full inference queue are reported instead of hanging"""
+        async def queue_full(descriptions):
+            raise ExecutorQueueFull("full")
+        
+        monkeypatch.setenv("CLASSIFIER_STREAM_QUEUE_WAIT_SECONDS", "0.2")
+        monkeypatch.setattr(main_module.inference_executor, "classify_batch", queue_full)
+        body = "\n".join([json.dumps({"description": "Water is leaking from under the kitchen sink"}), "not json"])
+        
+        response = ready_client.post("/classify/stream", content=body)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        
+        assert response.status_code == 200
+        assert lines[0] == {"line": 1, "error": "Classifier overloaded", "detail": "Inference queue stayed full for 0.2s"}
+        assert lines[1]["line"] == 2 and lines[1]["error"] == "Invalid request"
+
+class TestFastResponseAPI:
+    
+    @pytest.fixture
+    def client_env(self):
+        """Enable the fast /classify response path"""
+        return {"CLASSIFIER_FAST_RESPONSE": "true"}
+    
+    def test_fast_response_matches_model(self, ready_client):
+        """Test that the fast path renders the same document as IssueResponse"""
+        description = "Emergency! Pipe burst and water is flooding the basement"
+        response = ready_client.post("/classify", json={"description": description})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        
+        data = response.json()
+        expected = main_module._build_issue_response(
+            main_module.classifier.classify_issue(description), main_module.classifier.model_version
+        )
+        assert response.content == expected.model_copy(update={
+            "request_id": data["request_id"], "processing_time_ms": data["processing_time_ms"]
+        }).model_dump_json().encode()
+    
+    def test_openapi_schema_unchanged(self, ready_client):
+        """Test that enabling the fast path doesn't change the documented response"""
+        schema = ready_client.get("/openapi.json").json()
+        response_schema = schema["paths"]["/classify"]["post"]["responses"]["200"]
+        
+        assert response_schema["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/IssueResponse"}
+        
+        # The optional debug timings are the only addition to the documented response
+        components = schema["components"]["schemas"]
+        issue_response = components["IssueResponse"]
+        assert "debug" not in issue_response["required"]
+        del issue_response["properties"]["debug"]
+        assert issue_response == BASELINE_ISSUE_RESPONSE_SCHEMA
+        assert components["IssueClassification"] == BASELINE_ISSUE_CLASSIFICATION_SCHEMA
+
+class TestFeedbackAPI:
+    
+    def test_feedback_requires_online_model(self, ready_client):
+        """Test that feedback is refused when the model can't learn incrementally"""
+        response = ready_client.post("/feedback", json={
+            "description": "My septic tank smells awful", "category": "sewer"
+        })
+        assert response.status_code == 409
+        assert ready_client.get("/feedback/stats").json() == {"enabled": False}
+    
+    def test_feedback_is_learned_in_background(self, tmp_path, monkeypatch):
+        """Test that submitted feedback changes the serving model without a restart"""
+        monkeypatch.setenv("CLASSIFIER_MODEL_PATH", str(tmp_path / "online.model"))
+        monkeypatch.setenv("CLASSIFIER_MODEL_KIND", "hashed_multinomial_nb")
+        monkeypatch.setenv("CLASSIFIER_FEEDBACK_BATCH_SIZE", "3")
+        description = "My septic tank smells awful"
+        
+        with TestClient(app) as test_client:
+            wait_until_ready(test_client)
+            for _ in range(3):
+                response = test_client.post("/feedback", json={"description": description, "category": "sewer"})
+                assert response.status_code == 202
+                assert response.json()["accepted"]
+            
+            deadline = time.time() + 10
+            while test_client.get("/feedback/stats").json()["learned"] < 3 and time.time() < deadline:
+                time.sleep(0.02)
+            
+            data = test_client.post("/classify", json={"description": description}).json()
+            assert data["classification"]["category"] == "sewer"
+            assert re.fullmatch(r"1\.0\.0\+feedback\.3\.[0-9a-f]{8}", data["model_version"])
+        
+        # Shutdown snapshots the learned model to the artifact
+        assert PlumbingIssueClassifier().model_version == data["model_version"]
+    
+    def test_feedback_refused_with_prefork_workers(self, monkeypatch, tmp_path):
+        """Test that online learning is off when several processes serve the model"""
+        monkeypatch.setenv("CLASSIFIER_MODEL_PATH", str(tmp_path / "online.model"))
+        monkeypatch.setenv("CLASSIFIER_MODEL_KIND", "hashed_multinomial_nb")
+        monkeypatch.setattr(main_module, "preloaded_classifier", PlumbingIssueClassifier())
+        
+        with TestClient(app) as test_client:
+            wait_until_ready(test_client)
+            response = test_client.post("/feedback", json={"description": "My septic tank smells awful", "category": "sewer"})
+            stats = test_client.get("/feedback/stats").json()
+        
+        assert response.status_code == 409
+        assert "single serving process" in response.json()["error"]
+        assert stats["enabled"] is False and "pre-forked" in stats["reason"]
+
+class TestServerTimingAPI:
+    
+    STAGES = {"preprocess", "cache_lookup", "vectorize", "predict", "keyword_match", "recommendation", "queue_wait"}
+    
+    def parse_server_timing(self, header):
+        return {name: float(duration.split("=")[1]) for name, duration in
+                (metric.strip().split(";") for metric in header.split(","))}
+    
+    def test_disabled_by_default(self, ready_client):
+        """Test that there is no header and no debug field unless enabled"""
+        response = ready_client.post("/classify", json={"description": "Kitchen sink is completely clogged"})
+        assert "server-timing" not in response.headers
+        assert response.json()["debug"] is None
+    
+    @pytest.mark.parametrize("client_env", [
+        {"CLASSIFIER_SERVER_TIMING": "true", "CLASSIFIER_FAST_RESPONSE": "false"},
+        {"CLASSIFIER_SERVER_TIMING": "true", "CLASSIFIER_FAST_RESPONSE": "true"},
+    ])
+    def test_stage_breakdown(self, ready_client, client_env):
+        """Test that the header and debug field carry the same per-stage timings"""
+        response = ready_client.post("/classify", json={"description": "Water heater is leaking from the bottom"})
+        
+        assert response.status_code == 200
+        timings = self.parse_server_timing(response.headers["server-timing"])
+        stages = response.json()["debug"]["stages_ms"]
+        assert set(stages) == self.STAGES
+        assert {stage: timings[stage] for stage in stages} == stages
+        # Only the fast path produces the response bytes in the timed section
+        response_stage = "serialization" if client_env["CLASSIFIER_FAST_RESPONSE"] == "true" else "response_build"
+        assert set(timings) == self.STAGES | {response_stage, "total"}
+        assert timings["total"] >= timings[response_stage]
+        assert all(duration >= 0 for duration in timings.values())
@@ -0,0 +1,192 @@
+import asyncio
+import time
+import pytest
+import requests
+
+from api_client import MAX_BATCH_ITEMS, AsyncClassifierClient, CircuitBreaker, CircuitOpenError, ClassifierClient
+from dispatch_system import DispatchSystem
+
+class TestClassifierClient:
+
+    def test_connection_is_reused(self, fake_api):
+        """Test that consecutive calls share one kept-alive connection"""
+        server, url = fake_api
+        with ClassifierClient(url) as client:
+            results = [client.classify(f"leak number {i}", customer_name="Jane") for i in range(5)]
+
+        assert all(result["classification"]["category"] == "leak" for result in results)
+        assert len({address for address, _ in server.requests}) == 1
+        assert server.requests[0][1] == {"description": "leak number 0", "customer_name": "Jane"}
+
+    def test_errors_raise(self, fake_api):
+        """Test that non-2xx responses and unreachable servers raise instead of returning"""
+        _, url = fake_api
+        with ClassifierClient(url) as client:
+            assert client.health() is True
+            with pytest.raises(requests.HTTPError):
+                client.classify("fail")
+
+        with ClassifierClient("http://127.0.0.1:1", connect_timeout=0.5) as client:
+            with pytest.raises(requests.ConnectionError):
+                client.classify("pipe burst")
+
+    def test_classify_batch(self, fake_api):
+        """Test that a batch is one request and rejected items come back as None"""
+        server, url = fake_api
+        with ClassifierClient(url) as client:
+            responses = client.classify_batch(["leak one", "fail", "leak two"])
+
+        assert len(server.requests) == 1
+        assert [response and response["classification"]["category"] for response in responses] == ["leak", None, "leak"]
+
+    def test_large_batch_is_split(self, fake_api):
+        """Test that batches over the API's item limit go out as several requests"""
+        server, url = fake_api
+        with ClassifierClient(url) as client:
+            responses = client.classify_batch([f"leak {i}" for i in range(MAX_BATCH_ITEMS + 5)])
+
+        assert len(responses) == MAX_BATCH_ITEMS + 5 and all(responses)
+        assert [len(body["requests"]) for _, body in server.requests] == [MAX_BATCH_ITEMS, 5]
+
+    def test_async_client(self, fake_api):
+        """Test that the async client classifies concurrently over its pool"""
+        server, url = fake_api
+
+        async def run():
+            async with AsyncClassifierClient(url, pool_size=2) as client:
+                return await client.health(), await asyncio.gather(*(client.classify(f"leak {i}") for i in range(6)))
+
+        healthy, results = asyncio.run(run())
+        assert healthy is True
+        assert len(results) == 6
+        assert len({address for address, _ in server.requests}) <= 2
+
+    def test_dispatch_uses_client(self, fake_api):
+        """Test that the dispatch system classifies through the given client and falls back on errors"""
+        _, url = fake_api
+        dispatch = DispatchSystem(api_client=ClassifierClient(url))
+
+        job = dispatch.classify_and_queue_job("Jane", "555-0100", "1 Main St", "Pipe burst under the sink")
+        fallback = dispatch.classify_and_queue_job("John", "555-0101", "2 Main St", "fail")
+
+        assert job.classification["category"] == "leak"
+        assert fallback.classification["category"] == "other"
+
+class TestCircuitBreaker:
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the threshold counts consecutive failures only"""
+        breaker = CircuitBreaker(lambda: False, failure_threshold=2, probe_interval=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.allow()
+
+        breaker.record_failure()
+        assert not breaker.allow()
+        assert breaker.stats() == {"state": "open", "consecutive_failures": 2, "opened": 1}
+        breaker.close()
+
+    def test_fails_fast_and_recovers(self, fake_api):
+        """Test that an open circuit skips the API and closes once the health probe passes"""
+        server, url = fake_api
+        server.down = True
+        with ClassifierClient(url, failure_threshold=2, probe_interval=0.05) as client:
+            for _ in range(2):
+                with pytest.raises(requests.HTTPError):
+                    client.classify("pipe burst")
+            assert not client.available
+
+            started = time.perf_counter()
+            with pytest.raises(CircuitOpenError):
+                client.classify("pipe burst")
+            assert time.perf_counter() - started < 0.01
+            assert len(server.requests) == 2
+
+            server.down = False
+            deadline = time.time() + 5
+            while not client.available and time.time() < deadline:
+                time.sleep(0.01)
+            assert client.classify("pipe burst")["classification"]["category"] == "leak"
+
+    def test_bad_requests_do_not_open(self, fake_api):
+        """Test that 4xx responses don't count against the API"""
+        _, url = fake_api
+        with ClassifierClient(url, failure_threshold=1) as client:
+            with pytest.raises(requests.HTTPError):
+                client.classify("fail")
+            assert client.available
+
+    def test_probes_wait_for_readiness(self, fake_api):
+        """Test that a live API that can't classify yet keeps the circuit open"""
+        server, url = fake_api
+        server.ready = False
+        with ClassifierClient(url, probe_interval=0.02) as client:
+            assert client.health() is False
+            assert not client.available
+            time.sleep(0.1)
+            assert not client.available
+
+            server.ready = True
+            deadline = time.time() + 5
+            while not client.available and time.time() < deadline:
+                time.sleep(0.01)
+            assert client.available
+
+    def test_failed_health_check_opens(self):
+        """Test that a failed health check opens the circuit straight away"""
+        with ClassifierClient("http://127.0.0.1:1", connect_timeout=0.5, probe_interval=60) as client:
+            assert client.health() is False
+            assert not client.available
+
+class TestHedgedRequests:
+
+    def test_slow_replica_is_hedged(self, slow_fake_api, fake_api):
+        """Test that the second replica answers when the first is slow"""
+        slow, slow_url = slow_fake_api
+        fast, fast_url = fake_api
+        with ClassifierClient(slow_url, hedge_url=fast_url, hedge_delay=0.02) as client:
+            started = time.perf_counter()
+            result = client.classify("pipe burst")
+            elapsed = time.perf_counter() - started
+
+        assert result["classification"]["category"] == "leak"
+        assert elapsed < 0.4
+        assert len(slow.requests) == 1 and len(fast.requests) == 1
+        assert client.stats()["hedged"] == 1 and client.stats()["hedge_wins"] == 1
+
+    def test_fast_replica_is_not_hedged(self, fake_api, slow_fake_api):
+        """Test that a request answered within the hedge delay goes to one replica only"""
+        fast, fast_url = fake_api
+        slow, slow_url = slow_fake_api
+        with ClassifierClient(fast_url, hedge_url=slow_url, hedge_delay=0.2) as client:
+            client.classify("pipe burst")
+
+        assert len(fast.requests) == 1 and slow.requests == []
+        assert client.stats()["hedged"] == 0
+
+    def test_failed_replica_fails_over(self, fake_api, fake_api_factory):
+        """Test that a request the first replica rejects goes to the second without waiting"""
+        down, down_url = fake_api_factory()
+        down.down = True
+        _, url = fake_api
+        with ClassifierClient(down_url, hedge_url=url, hedge_delay=5) as client:
+            started = time.perf_counter()
+            assert client.classify("pipe burst")["classification"]["category"] == "leak"
+            assert time.perf_counter() - started < 1
+
+    def test_async_hedging(self, slow_fake_api, fake_api):
+        """Test that the async client hedges a slow replica too"""
+        _, slow_url = slow_fake_api
+        _, fast_url = fake_api
+
+        async def run():
+            async with AsyncClassifierClient(slow_url, hedge_url=fast_url, hedge_delay=0.02) as client:
+                started = time.perf_counter()
+                result = await client.classify("pipe burst")
+                return result, time.perf_counter() - started, client.stats()
+
+        result, elapsed, stats = asyncio.run(run())
+        assert result["classification"]["category"] == "leak"
+        assert elapsed < 0.4
+        assert stats["hedge_wins"] == 1
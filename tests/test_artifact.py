@@ -0,0 +1,70 @@
+import os
+import numpy as np
+import pytest
+from app.artifact import load_artifact, read_metadata, save_artifact
+from app.classifier import PlumbingIssueClassifier
+
+class TestModelArtifact:
+    
+    def test_round_trip_is_read_only_memory_map(self, tmp_path):
+        """Test that arrays come back unchanged as read-only views of the mapped file"""
+        path = str(tmp_path / "model.bin")
+        arrays = {
+            'weights': np.arange(12, dtype=np.float64).reshape(3, 4),
+            'terms': np.array(['leak', 'toilet', 'sewer']),
+            'empty': np.zeros(0, dtype=np.int64),
+        }
+        save_artifact(path, arrays, {'model_version': '9.9.9'})
+        
+        loaded, metadata = load_artifact(path)
+        assert metadata == {'model_version': '9.9.9', 'content_hash': metadata['content_hash']}
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(loaded[name], array)
+        assert not loaded['weights'].flags.writeable
+        assert isinstance(loaded['weights'].base, np.memmap) or isinstance(loaded['weights'].base.base, np.memmap)
+        assert read_metadata(path) == metadata
+    
+    def test_atomic_write_leaves_no_temporary_files(self, tmp_path):
+        """Test that overwriting an artifact only leaves the final file behind"""
+        path = str(tmp_path / "model.bin")
+        first = save_artifact(path, {'a': np.ones(3)}, {'model_version': '1'})
+        second = save_artifact(path, {'a': np.zeros(3)}, {'model_version': '2'})
+        assert first['content_hash'] != second['content_hash']
+        
+        assert os.listdir(tmp_path) == ["model.bin"]
+        assert read_metadata(path)['model_version'] == '2'
+    
+    def test_rejects_foreign_file(self, tmp_path):
+        """Test that a file that isn't an artifact is rejected instead of retrained over"""
+        path = tmp_path / "model.bin"
+        path.write_bytes(b"not a model artifact at all")
+        
+        with pytest.raises(ValueError):
+            load_artifact(str(path))
+        with pytest.raises(ValueError):
+            PlumbingIssueClassifier(model_path=str(path))
+        assert path.read_bytes() == b"not a model artifact at all"
+
+class TestClassifierArtifact:
+    
+    def test_trains_and_saves_when_missing(self, tmp_path):
+        """Test that a missing artifact is trained and written to the configured path"""
+        path = str(tmp_path / "models" / "classifier.model")
+        classifier = PlumbingIssueClassifier(model_path=path)
+        
+        assert os.path.exists(path)
+        assert read_metadata(path)['model_version'] == classifier.model_version
+    
+    def test_loads_version_and_predictions_from_artifact(self, tmp_path):
+        """Test that the model version and predictions come from the artifact"""
+        trained = PlumbingIssueClassifier(model_path=str(tmp_path / "trained.model"), cache_size=0)
+        path = str(tmp_path / "custom.model")
+        trained.engine.save(path, {'model_version': '2.3.4'})
+        
+        loaded = PlumbingIssueClassifier(model_path=path, cache_size=0)
+        assert loaded.model_version == '2.3.4'
+        assert loaded.model is None
+        
+        texts = ["no hot water coming from faucet", "toilet won t flush", "pipe burst in basement"]
+        np.testing.assert_allclose(loaded.engine.predict_proba(texts), trained.engine.predict_proba(texts))
+        assert not loaded.engine.feature_log_prob.flags.writeable
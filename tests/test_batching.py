@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.batching import MicroBatcher
+from app.main import app
+
+class RecordingClassifier:
+    """Async classify_batch stand-in that records the batches it was given"""
+
+    def __init__(self, delay=0.01, error=None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+
+    async def classify_batch(self, descriptions):
+        self.batches.append(list(descriptions))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [{'description': description} for description in descriptions]
+
+class TestMicroBatcher:
+
+    def test_idle_request_is_not_delayed(self):
+        """Test that a lone request is classified at once, without waiting for the window"""
+        fake = RecordingClassifier(delay=0)
+        batcher = MicroBatcher(fake.classify_batch, max_batch_size=8, max_wait_seconds=10)
+
+        result, waited = asyncio.run(batcher.submit("sink is clogged"))
+
+        assert result == {'description': "sink is clogged"}
+        assert waited == 0.0
+        assert batcher.stats()['flushes']['idle'] == 1
+
+    def test_concurrent_requests_are_batched(self):
+        """Test that requests arriving while the slot is busy are flushed together, in order"""
+        fake = RecordingClassifier()
+        batcher = MicroBatcher(fake.classify_batch, max_batch_size=64, max_wait_seconds=1)
+        descriptions = [f"leak number {i}" for i in range(20)]
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(description) for description in descriptions))
+
+        results = asyncio.run(run())
+
+        assert [result['description'] for result, _ in results] == descriptions
+        assert fake.batches == [descriptions[:1], descriptions[1:]]
+        stats = batcher.stats()
+        assert stats['batches'] == 2 and stats['items'] == 20
+        assert stats['flushes'] == {'idle': 1, 'full': 0, 'drain': 1, 'timer': 0}
+        assert {bucket['le']: bucket['count'] for bucket in stats['batch_sizes']}[32] == 1
+
+    def test_max_batch_size_and_wait(self):
+        """Test that a full batch is flushed at once and the rest after the wait"""
+        fake = RecordingClassifier(delay=0.2)
+        batcher = MicroBatcher(fake.classify_batch, max_batch_size=4, max_wait_seconds=0.01)
+
+        async def run():
+            first = asyncio.ensure_future(batcher.submit("first"))
+            await asyncio.sleep(0)
+            return await asyncio.gather(first, *(batcher.submit(f"item {i}") for i in range(6)))
+
+        results = asyncio.run(run())
+
+        assert [len(batch) for batch in fake.batches] == [1, 4, 2]
+        assert batcher.stats()['flushes'] == {'idle': 1, 'full': 1, 'drain': 0, 'timer': 1}
+        # The timer flush waited about max_wait_seconds, not for the running batches
+        assert 0.005 < results[-1][1] < 0.15
+
+    def test_errors_reach_every_caller(self):
+        """Test that a failing batch fails each request in it"""
+        fake = RecordingClassifier(error=RuntimeError("overloaded"))
+        batcher = MicroBatcher(fake.classify_batch, max_batch_size=8, max_wait_seconds=0.01)
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(f"item {i}") for i in range(3)), return_exceptions=True)
+
+        assert all(isinstance(error, RuntimeError) for error in asyncio.run(run()))
+
+class TestMicroBatchAPI:
+
+    @pytest.mark.parametrize("client_env", [{"CLASSIFIER_MICROBATCH": "true", "CLASSIFIER_SERVER_TIMING": "true"}])
+    def test_classify_through_micro_batcher(self, ready_client):
+        """Test that /classify works through the micro-batcher and reports its stats"""
+        response = ready_client.post("/classify", json={"description": "Toilet won't flush properly"})
+        stats = ready_client.get("/microbatch/stats").json()
+
+        assert response.status_code == 200
+        assert response.json()["classification"]["category"] == "toilet"
+        assert "batch_wait" in response.json()["debug"]["stages_ms"]
+        assert stats["enabled"] is True
+        assert stats["items"] == 1
+
+    def test_disabled_by_default(self):
+        """Test that the micro-batcher is opt-in"""
+        with TestClient(app) as test_client:
+            assert test_client.get("/microbatch/stats").json() == {"enabled": False}
@@ -0,0 +1,31 @@
+from benchmarks.classifier import HIGHER, LOWER, compare_results, run_benchmarks
+
+def results(**metrics):
+    return {'metrics': {name: {'value': value, 'unit': unit, 'better': better} for name, (value, unit, better) in metrics.items()}}
+
+class TestBenchmarkComparison:
+    
+    def test_regressions_follow_metric_direction(self):
+        """Test that slower latency and lower throughput are both flagged"""
+        baseline = results(p50=(100.0, 'us', LOWER), throughput=(1000.0, 'items/s', HIGHER), load=(10.0, 'ms', LOWER))
+        current = results(p50=(130.0, 'us', LOWER), throughput=(800.0, 'items/s', HIGHER), load=(8.0, 'ms', LOWER))
+        
+        rows = {row['metric']: row for row in compare_results(current, baseline, threshold=0.15)}
+        
+        assert rows['p50']['regressed']
+        assert rows['throughput']['regressed']
+        assert not rows['load']['regressed']
+    
+    def test_metrics_missing_from_baseline_are_skipped(self):
+        """Test that new metrics don't fail the comparison"""
+        rows = compare_results(results(new=(1.0, 'us', LOWER)), results(), threshold=0.15)
+        
+        assert rows == []
+    
+    def test_quick_run_reports_every_metric(self):
+        """Test that a smoke run produces the documented metrics"""
+        metrics = run_benchmarks(quick=True)['metrics']
+        
+        for name in ['classify_issue_p99_us', 'classify_batch_64_per_second', 'preprocess_us',
+                     'keyword_scan_us', 'model_load_ms', 'load_and_classify_peak_alloc_bytes']:
+            assert metrics[name]['value'] > 0
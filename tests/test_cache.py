@@ -0,0 +1,112 @@
+import json
+from app.cache import ClassificationCache
+from app.classifier import PlumbingIssueClassifier
+from app.models import IssueCategory
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class TestClassificationCache:
+    
+    def test_hit_and_miss_counters(self):
+        """Test that hits and misses are counted"""
+        cache = ClassificationCache(max_size=4)
+        
+        assert cache.get("a") is None
+        cache.put("a", {"category": "leak"})
+        assert cache.get("a") == {"category": "leak"}
+        
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['size'] == 1
+        assert stats['hit_rate'] == 0.5
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        cache = ClassificationCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()['evictions'] == 1
+    
+    def test_ttl_expiration(self):
+        """Test that entries older than the TTL are dropped"""
+        clock = FakeClock()
+        cache = ClassificationCache(max_size=2, ttl_seconds=10, clock=clock)
+        cache.put("a", 1)
+        
+        clock.now += 5
+        assert cache.get("a") == 1
+        clock.now += 10
+        assert cache.get("a") is None
+        assert cache.stats()['expirations'] == 1
+    
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that the disk tier serves entries to a new cache instance"""
+        path = str(tmp_path / "cache.sqlite")
+        cache = ClassificationCache(max_size=2, disk_path=path, serialize=json.dumps, deserialize=json.loads)
+        cache.put("a", {"category": "leak"})
+        cache.close()
+        
+        restarted = ClassificationCache(max_size=2, disk_path=path, serialize=json.dumps, deserialize=json.loads)
+        assert restarted.get("a") == {"category": "leak"}
+        assert restarted.stats()['disk_hits'] == 1
+        restarted.close()
+
+class TestClassifierCaching:
+    
+    def test_near_identical_descriptions_share_entry(self):
+        """Test that descriptions with the same preprocessed text hit the cache"""
+        classifier = PlumbingIssueClassifier(cache_size=16)
+        first = classifier.classify_issue("Toilet won't flush!!")
+        second = classifier.classify_issue("toilet   won't flush")
+        
+        assert first['category'] == second['category']
+        assert classifier.cache.stats()['hits'] == 1
+        assert second['processing_time_ms'] > 0
+    
+    def test_cache_disabled(self):
+        """Test that a zero cache size disables caching"""
+        classifier = PlumbingIssueClassifier(cache_size=0)
+        
+        assert classifier.cache is None
+        assert classifier.classify_issue("No hot water coming from faucet")['category'] in IssueCategory
+    
+    def test_disk_cache_round_trip(self, tmp_path):
+        """Test that results read back from disk keep their enum types"""
+        path = str(tmp_path / "cache.sqlite")
+        classifier = PlumbingIssueClassifier(cache_size=16, cache_path=path)
+        expected = classifier.classify_issue("Kitchen sink is clogged and water won't drain")
+        
+        restarted = PlumbingIssueClassifier(cache_size=16, cache_path=path)
+        result = restarted.classify_issue("Kitchen sink is clogged and water won't drain")
+        
+        assert restarted.cache.stats()['disk_hits'] == 1
+        assert isinstance(result['category'], IssueCategory)
+        for key in ['category', 'severity', 'urgency', 'next_steps', 'required_tools']:
+            assert result[key] == expected[key]
+    
+    def test_warm_up_from_request_log(self, tmp_path):
+        """Test priming the cache from a JSONL request log"""
+        log_path = tmp_path / "requests.jsonl"
+        log_path.write_text("\n".join([
+            json.dumps({"description": "No hot water coming from faucet"}),
+            json.dumps({"description": "Toilet won't flush properly"}),
+            "not json",
+            json.dumps({"title": "no description field"}),
+        ]))
+        classifier = PlumbingIssueClassifier(cache_size=16)
+        
+        assert classifier.warm_up_cache(str(log_path)) == 2
+        classifier.classify_issue("Toilet won't flush properly")
+        assert classifier.cache.stats()['hits'] == 1
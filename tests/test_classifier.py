@@ -1,6 +1,9 @@
+import re
 import pytest
-from app.classifier import PlumbingIssueClassifier
-from app.models import IssueCategory, IssueSeverity, IssueUrgency
+from app.cascade import CharNgramModel, fallback_model_path
+from app.classifier import TRAINING_DATA, PlumbingIssueClassifier, preprocess_text, tokenize
+from app.engine import TOKEN_PATTERN
+from app.models import IssueCategory, IssueSeverity, IssueUrgency, IssueClassification
 
 class TestPlumbingIssueClassifier:
     
@@ -66,6 +69,19 @@ class TestPlumbingIssueClassifier:
         assert result['severity'] == IssueSeverity.CRITICAL
         assert result['urgency'] == IssueUrgency.EMERGENCY
     
+    @pytest.mark.parametrize("description,severity,urgency", [
+        ("small drip under sink, non-urgent, fix when convenient", IssueSeverity.LOW, IssueUrgency.LOW),
+        ("I know the faucet drips a little, no rush", IssueSeverity.LOW, IssueUrgency.LOW),
+        ("Snow outside and the water heater is making noise", IssueSeverity.MEDIUM, IssueUrgency.MEDIUM),
+        ("The drain is overflowing", IssueSeverity.CRITICAL, IssueUrgency.EMERGENCY),
+    ])
+    def test_keywords_match_at_word_starts(self, classifier, description, severity, urgency):
+        """Test that keywords count at the start of words, inflected too, but not inside other words or phrases"""
+        result = classifier.classify_issue(description)
+        
+        assert result['severity'] == severity
+        assert result['urgency'] == urgency
+    
     def test_low_severity_detection(self, classifier):
         """Test detection of low severity"""
         result = classifier.classify_issue("Slight drip from faucet")
@@ -82,6 +98,29 @@ class TestPlumbingIssueClassifier:
         assert "(" not in cleaned
         assert ")" not in cleaned
     
+    @pytest.mark.parametrize("text", [
+        "Water is leaking!!! from under the sink... (urgent)",
+        "  Café's\tfaucet\u00a0drips — 2nd time; ½ cup/hour_ish  ",
+        "Toilet\nwon't\r\nflush!!",
+        "",
+    ])
+    def test_tokenize_matches_regex_pipeline(self, text):
+        """Test that the translate-table cleaning and tokens match the regex versions"""
+        expected = re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', text.lower())).strip()
+        cleaned, tokens = tokenize(text)
+        
+        assert cleaned == expected == preprocess_text(text.lower())
+        assert tokens == re.findall(TOKEN_PATTERN, expected)
+    
+    def test_token_path_matches_text_vectorizer(self, classifier):
+        """Test that scoring shared tokens gives the same matrix as vectorizing the text"""
+        prepared = [tokenize(text) for text in ["Kitchen sink is CLOGGED!", "no hot water", "x"]]
+        by_tokens = classifier.engine.vectorize_tokens([tokens for _, tokens in prepared])
+        by_text = classifier.engine.vectorize([cleaned for cleaned, _ in prepared])
+        
+        for left, right in zip(by_tokens, by_text):
+            assert left.tolist() == right.tolist()
+    
     def test_duration_estimates(self, classifier):
         """Test that duration estimates are provided"""
         result = classifier.classify_issue("Sink is clogged")
@@ -126,4 +165,159 @@ class TestPlumbingIssueClassifier:
         # Should still return a valid classification
         assert result['category'] in IssueCategory
         assert result['severity'] in IssueSeverity
-        assert result['urgency'] in IssueUrgency 
\ No newline at end of file
+        assert result['urgency'] in IssueUrgency 
+    
+    def test_classify_batch_matches_single(self, classifier):
+        """Test that batch classification agrees with single classification"""
+        descriptions = [
+            "Water is leaking from under the kitchen sink",
+            "Kitchen sink is clogged and water won't drain",
+            "Emergency! Pipe burst and water is flooding the basement",
+        ]
+        batch_results = classifier.classify_batch(descriptions)
+        
+        assert len(batch_results) == len(descriptions)
+        for description, batch_result in zip(descriptions, batch_results):
+            single_result = classifier.classify_issue(description)
+            for key in ['category', 'severity', 'urgency', 'next_steps', 'required_tools']:
+                assert batch_result[key] == single_result[key]
+            assert batch_result['confidence'] == pytest.approx(single_result['confidence'])
+            assert batch_result['processing_time_ms'] > 0
+    
+    def test_classify_batch_empty(self, classifier):
+        """Test that an empty batch returns no results"""
+        assert classifier.classify_batch([]) == []
+    
+    def test_highest_severity_and_urgency_win(self, classifier):
+        """Test that the most severe matching keyword wins regardless of table order"""
+        result = classifier.classify_issue("Slow drip turned into a burst pipe, flooding now")
+        
+        assert result['severity'] == IssueSeverity.CRITICAL
+        assert result['urgency'] == IssueUrgency.EMERGENCY
+    
+    def test_recommendation_bundles_cover_every_combination(self, classifier):
+        """Test that a bundle is precomputed for every category, severity and urgency"""
+        assert len(classifier.recommendations) == len(IssueCategory) * len(IssueSeverity) * len(IssueUrgency)
+        
+        bundle = classifier.recommendations[(IssueCategory.SEWER, IssueSeverity.CRITICAL, IssueUrgency.EMERGENCY)]
+        assert bundle.next_steps == (
+            "Dispatch emergency technician immediately",
+            "Contact customer to confirm address and access",
+            "Bring sewer camera and rooter equipment",
+            "Check for city sewer line responsibility",
+            "Bring backup technician if needed",
+            "Prepare for potential emergency parts ordering",
+        )
+    
+    def test_results_have_own_lists(self, classifier):
+        """Test that results carry lists from the bundle that callers can change safely"""
+        description = "Kitchen sink is clogged and water won't drain"
+        result = classifier.classify_issue(description)
+        bundle = classifier.recommendations[(result['category'], result['severity'], result['urgency'])]
+        
+        assert isinstance(result['next_steps'], list)
+        assert result['next_steps'] == list(bundle.next_steps)
+        assert result['required_tools'] == list(bundle.required_tools)
+        result['next_steps'].append("Call back tomorrow")
+        assert classifier.classify_issue(description)['next_steps'] == list(bundle.next_steps)
+    
+    def test_bundle_json_matches_model(self, classifier):
+        """Test that the pre-serialized fragments render the same JSON as the pydantic model"""
+        for bundle in classifier.recommendations.values():
+            classification = IssueClassification(**bundle.result(0.8125))
+            assert bundle.classification_json(0.8125) == classification.model_dump_json()
+
+class TestClassifierCascade:
+    
+    def test_keyword_rules_answer_when_decisive(self, tmp_path):
+        """Test that unambiguous keywords skip the model and ambiguous ones don't"""
+        classifier = PlumbingIssueClassifier(model_path=str(tmp_path / "model"), cache_size=0, rule_min_hits=2)
+        
+        decisive = classifier.classify_issue("Toilet won't flush at all")
+        ambiguous = classifier.classify_issue("Kitchen sink is completely clogged")
+        
+        assert decisive['category'] == IssueCategory.TOILET
+        assert decisive['confidence'] == 0.9
+        stages = classifier.cascade_stats.stats()
+        assert stages['rules']['evaluated'] == 2 and stages['rules']['answered'] == 1
+        assert stages['model']['evaluated'] == 1 and stages['model']['answered'] == 1
+        assert ambiguous['confidence'] != 0.9
+    
+    def test_fallback_runs_only_below_threshold(self, tmp_path):
+        """Test that the character n-gram model re-checks only unsure predictions"""
+        plain = PlumbingIssueClassifier(model_path=str(tmp_path / "model"), cache_size=0)
+        cascade = PlumbingIssueClassifier(model_path=str(tmp_path / "model"), cache_size=0, fallback_threshold=0.3)
+        descriptions = ["Bathtub drains very slowly", "Faucet handle is dripping", "Kitchen sink is completely clogged"]
+        
+        before = plain.classify_batch(descriptions)
+        after = cascade.classify_batch(descriptions)
+        
+        unsure = [result['confidence'] < 0.3 for result in before]
+        stages = cascade.cascade_stats.stats()
+        assert stages['fallback']['evaluated'] == sum(unsure)
+        assert stages['model']['answered'] == len(descriptions) - sum(unsure)
+        for was_unsure, old, new in zip(unsure, before, after):
+            if not was_unsure:
+                assert new['category'] == old['category'] and new['confidence'] == old['confidence']
+            else:
+                assert new['confidence'] >= old['confidence']
+        assert [result['category'] for result in after] == [IssueCategory.DRAIN, IssueCategory.FAUCET, IssueCategory.CLOG]
+        assert 'fallback' in after[0]['stage_timings']
+    
+    def test_less_confident_fallback_is_ignored(self, tmp_path):
+        """Test that the model's answer stands when the fallback is even less sure"""
+        plain = PlumbingIssueClassifier(model_path=str(tmp_path / "model"), cache_size=0)
+        cascade = PlumbingIssueClassifier(model_path=str(tmp_path / "model"), cache_size=0, fallback_threshold=1.0)
+        descriptions = ["Kitchen sink is completely clogged", "Bathtub drains very slowly"]
+        
+        class UnsureModel:
+            def predict(self, texts):
+                return ['sewer'] * len(texts), [0.01] * len(texts)
+        
+        cascade.fallback_model = UnsureModel()
+        results = cascade.classify_batch(descriptions)
+        
+        assert [(result['category'], result['confidence']) for result in results] == \
+            [(result['category'], result['confidence']) for result in plain.classify_batch(descriptions)]
+        stages = cascade.cascade_stats.stats()
+        assert stages['fallback']['evaluated'] == 2 and stages['fallback']['answered'] == 0
+        assert stages['model']['answered'] == 2
+    
+    def test_fallback_model_matches_sklearn_and_round_trips(self, tmp_path):
+        """Test that the compiled fallback scores like the sklearn pipeline, also after saving and loading"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        
+        texts, labels = zip(*TRAINING_DATA)
+        pipeline = Pipeline([
+            ('tfidf', TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 5), sublinear_tf=True)),
+            ('clf', LogisticRegression(C=10.0, max_iter=1000))
+        ]).fit(texts, labels)
+        model = CharNgramModel.from_pipeline(pipeline)
+        model.save(str(tmp_path / "fallback"))
+        loaded, metadata = CharNgramModel.load(str(tmp_path / "fallback"))
+        
+        queries = ["kichen sink clogd", "toilet  wont flush", "a", ""]
+        assert abs(model.predict_proba(queries) - pipeline.predict_proba(queries)).max() < 1e-9
+        assert (loaded.predict_proba(queries) == model.predict_proba(queries)).all()
+        assert metadata['content_hash']
+    
+    def test_fallback_model_is_saved_with_artifact(self, tmp_path):
+        """Test that the sample fallback model is stored next to the artifact and loaded from there"""
+        model_path = str(tmp_path / "model")
+        first = PlumbingIssueClassifier(model_path=model_path, fallback_threshold=0.3)
+        second = PlumbingIssueClassifier(model_path=model_path, fallback_threshold=0.3)
+        
+        assert first.fallback_metadata['base_content_hash'] == first.model_metadata['content_hash']
+        assert second.fallback_metadata == first.fallback_metadata
+        assert first._cache_key("toilet") == second._cache_key("toilet")
+        assert first._cache_key("toilet") != PlumbingIssueClassifier(model_path=model_path)._cache_key("toilet")
+        assert fallback_model_path(model_path) == model_path + ".fallback"
+    
+    def test_cascade_settings_are_part_of_cache_key(self, tmp_path):
+        """Test that a disk cache doesn't serve results computed under other cascade settings"""
+        plain = PlumbingIssueClassifier(model_path=str(tmp_path / "model"))
+        cascade = PlumbingIssueClassifier(model_path=str(tmp_path / "model"), rule_min_hits=2)
+        
+        assert plain._cache_key("toilet") != cascade._cache_key("toilet")
@@ -0,0 +1,81 @@
+import json
+import os
+import pytest
+from classify_file import classify_file
+from app.classifier import PlumbingIssueClassifier
+
+def write_jsonl(path, records):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+class TestClassifyFile:
+    
+    @pytest.fixture
+    def input_path(self, tmp_path):
+        descriptions = [
+            "My kitchen sink is completely clogged",
+            "Water heater is not producing hot water",
+            "Toilet keeps running constantly",
+            "Burst pipe flooding the basement",
+        ]
+        records = [{'request_id': i, 'description': descriptions[i % len(descriptions)]} for i in range(23)]
+        records[5] = {'request_id': 5, 'description': 'short'}
+        path = tmp_path / "input.jsonl"
+        write_jsonl(path, records)
+        with open(path, 'a') as f:
+            f.write("not json\n")
+        return str(path)
+    
+    def test_results_in_input_order(self, input_path, tmp_path):
+        """Test that every line is classified and written in input order"""
+        output_path = str(tmp_path / "output.jsonl")
+        stats = classify_file(input_path, output_path, workers=2, chunk_size=4, progress=False)
+        
+        results = read_jsonl(output_path)
+        assert stats['rows'] == 24
+        assert [r['line'] for r in results] == list(range(1, 25))
+        assert [r['request_id'] for r in results[:23]] == list(range(23))
+        expected = PlumbingIssueClassifier().classify_issue("My kitchen sink is completely clogged")
+        assert results[0]['classification']['category'] == expected['category'].value
+        assert results[0]['classification']['next_steps'] == expected['next_steps']
+        assert 'error' in results[5]
+        assert 'error' in results[23]
+        assert not os.path.exists(output_path + ".checkpoint")
+    
+    def test_resume_from_checkpoint(self, input_path, tmp_path):
+        """Test that a resumed run skips finished lines and discards partial output"""
+        expected_path = str(tmp_path / "expected.jsonl")
+        classify_file(input_path, expected_path, workers=1, chunk_size=4, progress=False)
+        with open(expected_path) as f:
+            expected = f.readlines()
+        
+        # Simulate a run interrupted after 8 lines with a partially written chunk
+        output_path = str(tmp_path / "output.jsonl")
+        done = ''.join(expected[:8])
+        with open(output_path, 'w') as f:
+            f.write(done + '{"line": 9, "trunc')
+        with open(output_path + ".checkpoint", 'w') as f:
+            json.dump({'input': os.path.abspath(input_path), 'lines_done': 8, 'output_bytes': len(done.encode())}, f)
+        
+        stats = classify_file(input_path, output_path, workers=2, chunk_size=4, resume=True, progress=False)
+        
+        assert stats['rows'] == 16
+        with open(output_path) as f:
+            assert f.readlines() == expected
+    
+    def test_empty_input(self, tmp_path):
+        """Test that an empty input gives an empty output and no checkpoint"""
+        input_path = tmp_path / "empty.jsonl"
+        input_path.write_text("")
+        output_path = str(tmp_path / "output.jsonl")
+        
+        stats = classify_file(str(input_path), output_path, workers=1, progress=False)
+        
+        assert stats['rows'] == 0
+        assert read_jsonl(output_path) == []
+        assert not os.path.exists(output_path + ".checkpoint")
@@ -0,0 +1,115 @@
+import asyncio
+import httpx
+import pytest
+import app.main as main_module
+from app.coalescing import RequestCoalescer
+
+class TestRequestCoalescer:
+
+    def test_identical_requests_share_one_computation(self):
+        """Test that concurrent callers with the same key get one shared result"""
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"category": "leak"}
+
+        async def run():
+            return await asyncio.gather(*(coalescer.run("same", compute) for _ in range(5)),
+                                        coalescer.run("other", compute))
+
+        results = asyncio.run(run())
+        assert len(calls) == 2
+        assert [shared for _, shared in results] == [False, True, True, True, True, False]
+        assert all(result is results[0][0] for result, _ in results[:5])
+        assert coalescer.stats() == {'in_flight': 0, 'computed': 2, 'coalesced': 4, 'coalesced_ratio': 4 / 6}
+
+    def test_key_is_released_after_completion(self):
+        """Test that a later request with the same key computes again"""
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return len(calls)
+
+        async def run():
+            first = await coalescer.run("key", compute)
+            await asyncio.sleep(0)
+            return first, await coalescer.run("key", compute)
+
+        assert asyncio.run(run()) == ((1, False), (2, False))
+
+    def test_exception_is_shared(self):
+        """Test that every waiting caller sees the computation's error"""
+        coalescer = RequestCoalescer()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("model unavailable")
+
+        async def run():
+            return await asyncio.gather(*(coalescer.run("key", compute) for _ in range(3)), return_exceptions=True)
+
+        errors = asyncio.run(run())
+        assert all(isinstance(error, RuntimeError) for error in errors)
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        """Test that the first caller going away doesn't abort the shared computation"""
+        coalescer = RequestCoalescer()
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(coalescer.run("key", compute))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(coalescer.run("key", compute))
+            await asyncio.sleep(0.005)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == ("done", True)
+
+class TestCoalescingAPI:
+
+    @pytest.mark.parametrize("enabled", ["true", "false"])
+    def test_concurrent_identical_requests(self, monkeypatch, enabled):
+        """Test that simultaneous identical /classify calls run one classification when enabled"""
+        monkeypatch.setenv("CLASSIFIER_COALESCE_REQUESTS", enabled)
+        monkeypatch.setenv("CLASSIFIER_BLOCKING_STARTUP", "true")
+
+        async def run():
+            async with main_module.app.router.lifespan_context(main_module.app):
+                executor = main_module.inference_executor
+                classify = executor.classify_issue
+                calls = []
+
+                async def slow_classify(description):
+                    calls.append(description)
+                    await asyncio.sleep(0.05)
+                    return await classify(description)
+
+                monkeypatch.setattr(executor, "classify_issue", slow_classify)
+                transport = httpx.ASGITransport(app=main_module.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    descriptions = ["Water main broke, street is flooding!"] * 8 + ["water main broke street is flooding"] * 2
+                    responses = await asyncio.gather(*(
+                        client.post("/classify", json={"description": description}) for description in descriptions
+                    ))
+                    stats = (await client.get("/coalescing/stats")).json()
+                return calls, responses, stats
+
+        calls, responses, stats = asyncio.run(run())
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.json()["request_id"] for response in responses}) == 10
+        assert len({response.json()["classification"]["category"] for response in responses}) == 1
+        if enabled == "true":
+            assert len(calls) == 1
+            assert stats["computed"] == 1 and stats["coalesced"] == 9
+        else:
+            assert len(calls) == 10
+            assert stats["enabled"] is False and stats["coalesced"] == 0
@@ -0,0 +1,84 @@
+import time
+from api_client import MAX_BATCH_ITEMS, ClassifierClient
+from dispatch_system import DispatchSystem
+
+CALLS = [
+    ("Mary Smith", "555-0101", "123 Oak St", "Pipe burst in basement"),
+    ("John Davis", "555-0202", "456 Pine Ave", "fail"),
+    ("Lisa Brown", "555-0303", "789 Elm Rd", "Leak under the sink"),
+]
+
+class TestBatchedIntake:
+
+    def test_flush_classifies_calls_together(self, fake_api):
+        """Test that buffered calls are classified in one request and queued in arrival order"""
+        server, url = fake_api
+        dispatch = DispatchSystem(api_client=ClassifierClient(url), intake_window_seconds=60)
+
+        for call in CALLS:
+            dispatch.submit_call(*call)
+        assert dispatch.get_jobs() == []
+
+        jobs = dispatch.flush_intake()
+
+        assert len(server.requests) == 1
+        assert [job.customer_name for job in jobs] == [call[0] for call in CALLS]
+        assert [job.id for job in jobs] == ["JOB-0001", "JOB-0002", "JOB-0003"]
+        assert [job.classification["category"] for job in jobs] == ["leak", "other", "leak"]
+        assert [job.created_at for job in jobs] == sorted(job.created_at for job in jobs)
+        assert dispatch.flush_intake() == []
+
+    def test_batch_size_capped_and_rejections_logged(self, fake_api, capsys):
+        """Test that the intake batch fits one API request and rejected calls are reported"""
+        _, url = fake_api
+        dispatch = DispatchSystem(api_client=ClassifierClient(url), intake_window_seconds=60, intake_batch_size=5000)
+        assert dispatch.intake_batch_size == MAX_BATCH_ITEMS
+
+        for call in CALLS:
+            dispatch.submit_call(*call)
+        dispatch.flush_intake()
+
+        assert "API rejected 1 of 3 calls" in capsys.readouterr().out
+
+    def test_window_and_batch_size_flush(self, fake_api):
+        """Test that a full buffer flushes at once and the rest after the window"""
+        server, url = fake_api
+        dispatch = DispatchSystem(api_client=ClassifierClient(url), intake_window_seconds=0.05, intake_batch_size=2)
+
+        for call in CALLS:
+            dispatch.submit_call(*call)
+        assert len(dispatch.get_jobs()) == 2
+
+        deadline = time.time() + 5
+        while len(dispatch.get_jobs()) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert len(server.requests) == 2
+        assert [job.customer_name for job in dispatch.get_jobs()] == [call[0] for call in CALLS]
+
+    def test_timer_flushes_race_with_assignment(self, fake_api):
+        """Test that jobs queued from the timer thread while jobs are assigned get unique ids"""
+        _, url = fake_api
+        dispatch = DispatchSystem(api_client=ClassifierClient(url), intake_window_seconds=0.001, intake_batch_size=1000)
+
+        for i in range(60):
+            dispatch.submit_call(f"Caller {i}", "555-0100", "1 Main St", "Leak under the sink")
+            dispatch.assign_jobs()
+            dispatch.complete_job("T001")
+            time.sleep(0.001)
+        dispatch.flush_intake()
+
+        jobs = dispatch.get_jobs()
+        assert len(jobs) == 60
+        assert len({job.id for job in jobs}) == 60
+
+    def test_api_down_falls_back(self):
+        """Test that a failed batch request queues every call with the fallback classification"""
+        dispatch = DispatchSystem(api_client=ClassifierClient("http://127.0.0.1:1", connect_timeout=0.5))
+
+        for call in CALLS:
+            dispatch.submit_call(*call)
+        jobs = dispatch.flush_intake()
+
+        assert len(jobs) == 3 and len(dispatch.job_queue) == 3
+        assert jobs[0].classification["urgency"] == "emergency"
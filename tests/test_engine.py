@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from app.classifier import PlumbingIssueClassifier
+from app.engine import CompiledNBScorer
+
+PARITY_TEXTS = [
+    "water is leaking from under the kitchen sink",
+    "kitchen sink is clogged and water won t drain",
+    "no hot water coming from faucet",
+    "emergency pipe burst and water is flooding the basement",
+    "toilet won t flush properly toilet toilet",
+    "something very unusual is happening with my plumbing",
+    "",
+    "zzz qqq",
+]
+
+class TestCompiledNBScorer:
+    
+    @pytest.fixture(scope="class")
+    def pipeline(self):
+        """Train a fresh sklearn pipeline the same way the classifier does"""
+        classifier = PlumbingIssueClassifier()
+        classifier._train_model()
+        return classifier.model
+    
+    @pytest.fixture(scope="class")
+    def scorer(self, pipeline):
+        """Compile the trained pipeline"""
+        return CompiledNBScorer.from_pipeline(pipeline)
+    
+    def test_probability_parity(self, pipeline, scorer):
+        """Test that compiled probabilities match the sklearn pipeline"""
+        expected = pipeline.predict_proba(PARITY_TEXTS)
+        actual = scorer.predict_proba(PARITY_TEXTS)
+        
+        assert list(scorer.classes) == list(pipeline.classes_)
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+    
+    def test_label_and_confidence_parity(self, pipeline, scorer):
+        """Test that labels and confidences from one pass match predict/predict_proba"""
+        labels, confidences = scorer.predict(PARITY_TEXTS)
+        
+        assert labels == list(pipeline.predict(PARITY_TEXTS))
+        np.testing.assert_allclose(confidences, pipeline.predict_proba(PARITY_TEXTS).max(axis=1))
+    
+    def test_vectorize_matches_tfidf(self, pipeline, scorer):
+        """Test that the CSR arrays match the TF-IDF transform"""
+        indptr, indices, data = scorer.vectorize(PARITY_TEXTS)
+        expected = pipeline.named_steps['tfidf'].transform(PARITY_TEXTS).toarray()
+        
+        actual = np.zeros_like(expected)
+        for row in range(len(PARITY_TEXTS)):
+            start, end = indptr[row], indptr[row + 1]
+            actual[row, indices[start:end]] = data[start:end]
+        np.testing.assert_allclose(actual, expected)
+    
+    @pytest.mark.parametrize("vectorizer_options", [
+        {'ngram_range': (1, 2)},
+        {'binary': True},
+        {'dtype': np.float32},
+    ])
+    def test_rejects_unsupported_vectorizer(self, vectorizer_options):
+        """Test that pipelines the scorer can't reproduce are rejected"""
+        pipeline = Pipeline([
+            ('tfidf', TfidfVectorizer(**vectorizer_options)),
+            ('clf', MultinomialNB())
+        ])
+        pipeline.fit(["pipe is leaking", "toilet is clogged"], ["leak", "toilet"])
+        
+        with pytest.raises(ValueError):
+            CompiledNBScorer.from_pipeline(pipeline)
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import pytest
+from app.classifier import PlumbingIssueClassifier
+from app.executor import ExecutorQueueFull, InferenceExecutor
+
+class SlowClassifier:
+    """Stand-in classifier whose calls block until released"""
+    
+    def __init__(self):
+        self.release = threading.Event()
+    
+    def classify_issue(self, description):
+        self.release.wait(timeout=10)
+        return {'description': description}
+
+class TestInferenceExecutor:
+    
+    def test_thread_executor_classifies_and_reports_stats(self):
+        """Test that classification runs on the pool and is counted"""
+        executor = InferenceExecutor(kind="thread", max_workers=2, max_queue=4)
+        executor.start(PlumbingIssueClassifier())
+        
+        async def run():
+            single = await executor.classify_issue("Toilet won't flush properly")
+            batch = await executor.classify_batch(["No hot water coming from faucet", "Faucet is dripping"])
+            return single, batch
+        
+        try:
+            single, batch = asyncio.run(run())
+        finally:
+            executor.shutdown()
+        
+        assert single['category'].value == "toilet"
+        assert len(batch) == 2
+        stats = executor.stats()
+        assert stats['completed'] == 2
+        assert stats['in_flight'] == 0
+        assert stats['wait_ms_avg'] >= 0
+    
+    def test_event_loop_stays_responsive(self):
+        """Test that the loop keeps running other work while classification is busy"""
+        slow = SlowClassifier()
+        executor = InferenceExecutor(kind="thread", max_workers=1, max_queue=4)
+        executor.start(slow)
+        
+        async def run():
+            task = asyncio.ensure_future(executor.classify_issue("slow one"))
+            ticks = 0
+            for _ in range(20):
+                await asyncio.sleep(0.001)
+                ticks += 1
+            assert not task.done()
+            assert executor.stats()['in_flight'] == 1
+            slow.release.set()
+            await task
+            return ticks
+        
+        try:
+            assert asyncio.run(run()) == 20
+        finally:
+            slow.release.set()
+            executor.shutdown()
+    
+    def test_queue_full_is_rejected(self):
+        """Test that calls beyond the queue bound are rejected immediately"""
+        slow = SlowClassifier()
+        executor = InferenceExecutor(kind="thread", max_workers=1, max_queue=2)
+        executor.start(slow)
+        
+        async def run():
+            tasks = [asyncio.ensure_future(executor.classify_issue(f"call {i}")) for i in range(2)]
+            await asyncio.sleep(0.01)
+            assert executor.stats()['estimated_queue_depth'] == 1
+            with pytest.raises(ExecutorQueueFull):
+                await executor.classify_issue("one too many")
+            slow.release.set()
+            await asyncio.gather(*tasks)
+        
+        try:
+            asyncio.run(run())
+        finally:
+            slow.release.set()
+            executor.shutdown()
+        assert executor.stats()['rejected'] == 1
+    
+    def test_process_executor(self, tmp_path):
+        """Test that the process pool loads the model artifact in each worker"""
+        model_path = str(tmp_path / "classifier.model")
+        executor = InferenceExecutor(kind="process", max_workers=1, max_queue=4)
+        executor.start(PlumbingIssueClassifier(model_path=model_path))
+        
+        try:
+            result = asyncio.run(executor.classify_issue("Kitchen sink is clogged and water won't drain"))
+        finally:
+            executor.shutdown()
+        
+        assert result['category'].value in ("clog", "drain")
+        assert executor.stats()['kind'] == "process"
+    
+    def test_rejects_unknown_kind(self):
+        """Test that an unknown executor kind is rejected"""
+        with pytest.raises(ValueError):
+            InferenceExecutor(kind="fiber")
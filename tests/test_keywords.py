@@ -0,0 +1,61 @@
+from app.keywords import KeywordMatcher
+
+class TestKeywordMatcher:
+    
+    def test_overlapping_keywords(self):
+        """Test that overlapping keywords are all found and one inside a longer hit is not"""
+        matcher = KeywordMatcher({'words': {'a': ['hot water', 'water', 'water heater'], 'b': ['heat']}})
+        hits = matcher.scan("no hot water heater")
+        
+        assert hits['words'] == {'a': ['hot water', 'water heater']}
+    
+    def test_whole_words_only(self):
+        """Test that keywords starting inside other words are not hits"""
+        matcher = KeywordMatcher({'urgency': {'low': ['non urgent'], 'high': ['urgent'], 'emergency': ['now']}})
+        
+        assert matcher.scan("i know it snows") == {'urgency': {}}
+        assert matcher.scan("small drip non urgent") == {'urgency': {'low': ['non urgent']}}
+        assert matcher.scan("urgent come now") == {'urgency': {'high': ['urgent'], 'emergency': ['now']}}
+    
+    def test_inflected_words_match(self):
+        """Test that a keyword matches the start of a longer form of the word"""
+        matcher = KeywordMatcher({'category': {'leak': ['leak'], 'clog': ['clog', 'overflow']}})
+        
+        assert matcher.scan("pipe leaking") == {'category': {'leak': ['leak']}}
+        assert matcher.scan("sink clogged and overflowing") == {'category': {'clog': ['clog', 'overflow']}}
+        assert matcher.scan("unclogged") == {'category': {}}
+    
+    def test_multiple_tables_single_scan(self):
+        """Test that hits are reported for every table"""
+        matcher = KeywordMatcher({
+            'severity': {'low': ['drip'], 'critical': ['burst']},
+            'category': {'pipe': ['pipe'], 'leak': ['drip', 'leak']}
+        })
+        hits = matcher.scan("pipe burst and a slow drip")
+        
+        assert hits['severity'] == {'low': ['drip'], 'critical': ['burst']}
+        assert hits['category'] == {'pipe': ['pipe'], 'leak': ['drip']}
+    
+    def test_multi_word_keywords(self):
+        """Test keywords containing spaces"""
+        matcher = KeywordMatcher({'urgency': {'low': ['no rush'], 'high': ['right away']}})
+        
+        assert matcher.scan("please come right away")['urgency'] == {'high': ['right away']}
+        assert matcher.scan("nothing here")['urgency'] == {}
+    
+    def test_highest_level_wins(self):
+        """Test deterministic resolution to the highest level"""
+        order = ['low', 'medium', 'high', 'critical']
+        
+        assert KeywordMatcher.highest_level({'low': ['drip'], 'critical': ['burst']}, order) == 'critical'
+        assert KeywordMatcher.highest_level({'low': ['drip']}, order) == 'low'
+        assert KeywordMatcher.highest_level({}, order, 'medium') == 'medium'
+    
+    def test_large_vocabulary(self):
+        """Test that thousands of keywords are matched correctly"""
+        keywords = [f"term{i}x" for i in range(5000)]
+        matcher = KeywordMatcher({'big': {'level': keywords, 'other': ['term42']}})
+        hits = matcher.scan("saw term4999x and term42x today")
+        
+        assert hits['big'] == {'level': ['term42x', 'term4999x']}
+        assert matcher.scan("term42")['big'] == {'other': ['term42']}
@@ -0,0 +1,37 @@
+import asyncio
+import json
+from benchmarks.load_test import load_descriptions, open_client, run_load, summarize
+
+class TestLoadTest:
+    
+    def test_in_process_run_reports_every_request(self):
+        """Test a short closed-loop run against the in-process app"""
+        async def scenario():
+            async with open_client() as client:
+                return await run_load(client, ["Kitchen sink is clogged and water won't drain"], requests=40, concurrency=4)
+        
+        result = asyncio.run(scenario())
+        
+        assert result['requests'] == 40
+        assert result['outcomes'] == {"200": 40}
+        assert result['error_rate'] == 0.0
+        assert result['throughput_per_second'] > 0
+        assert sum(bucket['count'] for bucket in result['histogram_ms']) == 40
+    
+    def test_summary_counts_errors(self):
+        """Test that failed and timed-out requests count towards the error rate"""
+        records = [(0.001, 0.0, "200", 1.0), (0.003, 0.0, "503", 1.0), (5.0, 0.0, "ReadTimeout", 1.0), (0.002, 0.0, "200", 1.0)]
+        
+        result = summarize(records, elapsed=2.0, concurrency=2, rate=0.0)
+        
+        assert result['error_rate'] == 0.5
+        assert result['throughput_per_second'] == 1.0
+        assert result['outcomes'] == {"200": 2, "503": 1, "ReadTimeout": 1}
+        assert result['histogram_ms'][-2]['count'] == 1
+    
+    def test_load_descriptions_from_log(self, tmp_path):
+        """Test replaying a request log field, skipping unusable lines"""
+        log_path = tmp_path / "log.jsonl"
+        log_path.write_text("\n".join([json.dumps({"title": "Toilet keeps running"}), "oops", json.dumps({"body": "x"})]))
+        
+        assert load_descriptions(str(log_path), field="title") == ["Toilet keeps running"]
@@ -0,0 +1,90 @@
+import re
+import pytest
+from app.classifier import PlumbingIssueClassifier
+from app.metrics import MetricsRegistry, STAGE_SECONDS, _Metric, observe_results
+
+def sample_value(text, name, **labels):
+    """Read one sample from Prometheus text output, or None when absent"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(name + (f"{{{label_text}}}" if label_text else "")) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+class TestMetricsRegistry:
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram output has cumulative buckets, +Inf, sum and count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.labels("a").observe(value)
+
+        text = registry.render()
+        assert "# TYPE demo_seconds histogram" in text
+        assert sample_value(text, "demo_seconds_bucket", stage="a", le="0.1") == 1
+        assert sample_value(text, "demo_seconds_bucket", stage="a", le="1") == 3
+        assert sample_value(text, "demo_seconds_bucket", stage="a", le="+Inf") == 4
+        assert sample_value(text, "demo_seconds_sum", stage="a") == pytest.approx(4.05)
+        assert sample_value(text, "demo_seconds_count", stage="a") == 4
+
+    def test_counter_gauge_and_label_escaping(self):
+        """Test counter/gauge rendering and that label values are escaped"""
+        registry = MetricsRegistry()
+        counter = registry.counter("demo_events", "Demo", ("kind",))
+        gauge = registry.gauge("demo_level", "Demo")
+        counter.labels('say "hi"\n').inc(2)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        text = registry.render()
+        assert 'demo_events_total{kind="say \\"hi\\"\\n"} 2' in text
+        assert sample_value(text, "demo_level") == 1
+        gauge.set(7)
+        assert sample_value(registry.render(), "demo_level") == 7
+        with pytest.raises(TypeError):
+            _Metric("demo_abstract", "Demo")
+
+    def test_wrong_label_count_rejected(self):
+        """Test that a child can't be created with the wrong number of labels"""
+        registry = MetricsRegistry()
+        counter = registry.counter("demo_events", "Demo", ("kind",))
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+
+    def test_batch_stages_observed_once(self):
+        """Test that a batch's shared stage timings count as one observation per stage"""
+        classifier = PlumbingIssueClassifier(cache_size=0)
+        results = classifier.classify_batch(["Toilet won't flush", "Kitchen sink is clogged", "No hot water"])
+        assert set(results[0]['stage_timings']) == {
+            'preprocess', 'cache_lookup', 'vectorize', 'predict', 'keyword_match', 'recommendation'
+        }
+
+        before = STAGE_SECONDS.labels("vectorize").counts[:]
+        observe_results(results, 0.001)
+        assert sum(STAGE_SECONDS.labels("vectorize").counts) == sum(before) + 1
+
+class TestMetricsAPI:
+
+    def test_metrics_endpoint(self, ready_client):
+        """Test that classifications show up in the exposed metrics"""
+        before = ready_client.get("/metrics").text
+        response = ready_client.post("/classify", json={"description": "Toilet won't flush properly"})
+        urgency = response.json()["classification"]["urgency"]
+        ready_client.get("/no-such-page")
+
+        response = ready_client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+
+        def delta(name, **labels):
+            return (sample_value(text, name, **labels) or 0) - (sample_value(before, name, **labels) or 0)
+
+        for stage in ("preprocess", "vectorize", "predict", "keyword_match", "recommendation", "response_build"):
+            assert delta("classifier_stage_duration_seconds_count", stage=stage) == 1
+        assert delta("classifier_classifications_total", category="toilet", urgency=urgency) == 1
+        assert delta("classifier_http_requests_total", endpoint="/classify", status="200") == 1
+        assert delta("classifier_http_requests_total", endpoint="other", status="404") == 1
+        assert sample_value(text, "classifier_http_requests_in_flight") == 1
+        assert sample_value(text, "classifier_model_load_seconds") > 0
@@ -0,0 +1,115 @@
+import re
+import numpy as np
+import pytest
+from app.classifier import PlumbingIssueClassifier, TRAINING_DATA
+from app.engine import HASHED_ARTIFACT_KIND, CompiledNBScorer, HashedNBScorer, load_engine
+from app.models import IssueCategory
+from app.online import FeedbackLearner, FeedbackQueueFull
+
+CLASSES = [category.value for category in IssueCategory]
+
+class TestHashedNBScorer:
+    
+    def test_partial_fit_matches_single_fit(self):
+        """Test that learning in several batches equals learning everything at once"""
+        texts, labels = zip(*TRAINING_DATA)
+        at_once = HashedNBScorer.empty(CLASSES, n_features=1024).partial_fit(texts, labels)
+        
+        incremental = HashedNBScorer.empty(CLASSES, n_features=1024)
+        for start in range(0, len(texts), 7):
+            incremental = incremental.partial_fit(texts[start:start + 7], labels[start:start + 7])
+        
+        np.testing.assert_allclose(incremental.feature_count, at_once.feature_count)
+        np.testing.assert_allclose(incremental.predict_proba(texts), at_once.predict_proba(texts))
+    
+    def test_partial_fit_leaves_original_untouched(self):
+        """Test that an update returns a new scorer instead of mutating the serving one"""
+        scorer = HashedNBScorer.empty(CLASSES, n_features=1024).partial_fit(["toilet is running"], ["toilet"])
+        before = scorer.predict_proba(["septic tank smells"])
+        
+        updated = scorer.partial_fit(["septic tank smells"], ["sewer"])
+        
+        np.testing.assert_array_equal(scorer.predict_proba(["septic tank smells"]), before)
+        assert updated.predict(["septic tank smells"])[0] == ["sewer"]
+    
+    def test_unknown_label_rejected(self):
+        """Test that labels outside the class list are refused"""
+        with pytest.raises(ValueError):
+            HashedNBScorer.empty(CLASSES, n_features=1024).partial_fit(["gas smell"], ["gas"])
+    
+    def test_artifact_round_trip(self, tmp_path):
+        """Test that load_engine picks the scorer class from the artifact kind"""
+        path = str(tmp_path / "online.model")
+        texts, labels = zip(*TRAINING_DATA)
+        scorer = HashedNBScorer.empty(CLASSES, n_features=1024).partial_fit(texts, labels)
+        scorer.save(path, {'model_version': 'test'})
+        
+        loaded, metadata = load_engine(path)
+        
+        assert isinstance(loaded, HashedNBScorer)
+        assert metadata['kind'] == HASHED_ARTIFACT_KIND
+        np.testing.assert_allclose(loaded.predict_proba(texts), scorer.predict_proba(texts))
+        with pytest.raises(ValueError):
+            CompiledNBScorer.load(path)
+
+class TestOnlineLearning:
+    
+    @pytest.fixture
+    def classifier(self, tmp_path):
+        """Create an online classifier backed by a temporary artifact"""
+        return PlumbingIssueClassifier(model_path=str(tmp_path / "online.model"), model_kind=HASHED_ARTIFACT_KIND)
+    
+    def test_learn_updates_model_version_and_predictions(self, classifier):
+        """Test that feedback changes predictions and bypasses cached results"""
+        description = "My septic tank smells awful"
+        before = classifier.classify_issue(description)
+        assert before['category'] != IssueCategory.SEWER
+        
+        version = classifier.learn([description] * 3, [IssueCategory.SEWER] * 3)
+        
+        assert re.fullmatch(r"1\.0\.0\+feedback\.3\.[0-9a-f]{8}", version)
+        assert classifier.classify_issue(description)['category'] == IssueCategory.SEWER
+    
+    def test_version_identifies_learned_feedback(self, tmp_path):
+        """Test that models learning different feedback from one base never share a version"""
+        path = str(tmp_path / "online.model")
+        first, second, third = (PlumbingIssueClassifier(model_path=path, model_kind=HASHED_ARTIFACT_KIND) for _ in range(3))
+        
+        first.learn(["My septic tank smells awful"], [IssueCategory.SEWER])
+        second.learn(["Water heater pilot light is out"], [IssueCategory.WATER_HEATER])
+        third.learn(["My septic tank smells awful"], [IssueCategory.SEWER])
+        
+        assert first.model_version != second.model_version
+        assert first.model_version == third.model_version
+    
+    def test_tfidf_model_cannot_learn(self, tmp_path):
+        """Test that the default model refuses online updates"""
+        classifier = PlumbingIssueClassifier(model_path=str(tmp_path / "tfidf.model"))
+        
+        assert not classifier.supports_online_learning
+        with pytest.raises(ValueError):
+            classifier.learn(["My septic tank smells awful"], [IssueCategory.SEWER])
+    
+    def test_learner_batches_and_snapshots(self, classifier):
+        """Test that queued feedback is learned in batches and written to the artifact"""
+        learner = FeedbackLearner(classifier, batch_size=2, interval_seconds=60, snapshot_seconds=3600)
+        for _ in range(5):
+            learner.submit("My septic tank smells awful", IssueCategory.SEWER)
+        
+        assert learner.flush() == 5
+        assert learner.stats()['batches'] == 3
+        assert learner.snapshot()
+        assert not learner.snapshot()
+        
+        restarted = PlumbingIssueClassifier(model_path=classifier.model_path)
+        assert restarted.model_version == classifier.model_version
+        assert restarted.model_version.startswith("1.0.0+feedback.5.")
+        assert restarted.classify_issue("My septic tank smells awful")['category'] == IssueCategory.SEWER
+    
+    def test_learner_rejects_when_full(self, classifier):
+        """Test that the feedback queue is bounded"""
+        learner = FeedbackLearner(classifier, max_pending=1)
+        learner.submit("My septic tank smells awful", IssueCategory.SEWER)
+        
+        with pytest.raises(FeedbackQueueFull):
+            learner.submit("My septic tank smells awful", IssueCategory.SEWER)
@@ -0,0 +1,62 @@
+import gc
+import os
+import signal
+import time
+import pytest
+from app.server import RestartBackoff, process_memory
+
+class TestProcessMemory:
+    
+    @pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="requires /proc")
+    def test_reports_own_memory(self):
+        """Test that the current process reports resident memory"""
+        memory = process_memory()
+        
+        assert memory['rss_bytes'] > 0
+    
+    def test_unknown_process(self):
+        """Test that a missing process reports nothing instead of failing"""
+        assert process_memory(2 ** 30) == {}
+
+class TestRestartBackoff:
+    
+    def test_delays_double_then_give_up(self):
+        """Test that restarts back off exponentially and stop after the limit within the window"""
+        now = [0.0]
+        backoff = RestartBackoff(limit=4, window_seconds=60, base_delay=0.5, max_delay=1.5, clock=lambda: now[0])
+        
+        assert [backoff.next_delay(0) for _ in range(3)] == [0.5, 1.0, 1.5]
+        assert backoff.next_delay(1) == 0.5
+        assert backoff.next_delay(0) is None
+    
+    def test_failures_outside_window_are_forgotten(self):
+        """Test that a worker that ran fine for a while starts again from the base delay"""
+        now = [0.0]
+        backoff = RestartBackoff(limit=2, window_seconds=10, clock=lambda: now[0])
+        
+        assert backoff.next_delay(0) == 0.5
+        now[0] = 11.0
+        assert backoff.next_delay(0) == 0.5
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork()")
+class TestServePrefork:
+    
+    def test_crashing_worker_stops_server(self, monkeypatch):
+        """Test that a worker dying straight after fork ends the server with a failure status"""
+        import app.main as main_module
+        import app.server as server_module
+        
+        monkeypatch.setattr(main_module, "preload_classifier", lambda: None)
+        monkeypatch.setattr(server_module, "_run_worker", lambda sock, log_level: os._exit(3))
+        handlers = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+        try:
+            started = time.monotonic()
+            status = server_module.serve_prefork("127.0.0.1", 0, 1, rss_report_seconds=0,
+                                                 restart_limit=2, restart_window_seconds=60)
+        finally:
+            gc.unfreeze()
+            signal.signal(signal.SIGTERM, handlers[0])
+            signal.signal(signal.SIGINT, handlers[1])
+        
+        assert status == 1
+        assert 0.5 <= time.monotonic() - started < 5
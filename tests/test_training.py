@@ -0,0 +1,101 @@
+import json
+import os
+from collections import Counter
+from app.classifier import PlumbingIssueClassifier, TRAINING_DATA
+from app.engine import HashedNBScorer
+from app.models import IssueCategory
+from app.training import iter_examples, iter_export_jobs, train_hashed_model
+from train import main as train_main
+
+EXPORT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workflow", "workflow_job_report.json")
+
+class TestTraining:
+    
+    def test_export_jobs_stream_matches_json_load(self):
+        """Test that streaming the jobs array yields the same jobs as loading the file"""
+        with open(EXPORT_PATH) as f:
+            expected = json.load(f)["jobs"]
+        
+        # A tiny read size makes every job span several reads
+        assert list(iter_export_jobs(EXPORT_PATH, read_size=7)) == expected
+    
+    def test_examples_from_export_and_jsonl(self, tmp_path):
+        """Test reading labels from both formats and skipping unusable records"""
+        jsonl_path = tmp_path / "jobs.jsonl"
+        jsonl_path.write_text("\n".join([
+            json.dumps({"description": "Septic tank smells awful", "category": "sewer"}),
+            json.dumps({"description": "No label here"}),
+            json.dumps({"description": "Unknown label", "category": "roofing"}),
+            "not json",
+        ]))
+        stats = Counter()
+        
+        examples = list(iter_examples([EXPORT_PATH, str(jsonl_path)], stats=stats))
+        
+        assert len(examples) == 5
+        assert examples[-1] == ("Septic tank smells awful", "sewer")
+        assert stats["skipped"] == 2
+    
+    def test_chunked_training_matches_single_chunk(self):
+        """Test that the chunk size doesn't change the fitted model"""
+        chunked, report = train_hashed_model(iter(TRAINING_DATA), chunk_size=4, n_features=1024)
+        single, _ = train_hashed_model(iter(TRAINING_DATA), chunk_size=1000, n_features=1024)
+        
+        assert report["examples"] == len(TRAINING_DATA)
+        assert report["chunks"] == 11
+        assert chunked.feature_count.tolist() == single.feature_count.tolist()
+    
+    def test_train_entry_point_writes_loadable_artifact(self, tmp_path):
+        """Test that the training CLI writes an artifact the classifier can serve"""
+        jsonl_path = tmp_path / "jobs.jsonl"
+        jsonl_path.write_text("\n".join(json.dumps({"description": text, "category": label}) for text, label in TRAINING_DATA))
+        model_path = str(tmp_path / "trained.model")
+        report_path = tmp_path / "report.json"
+        
+        assert train_main([str(jsonl_path), "--output", model_path, "--chunk-size", "10", "--report", str(report_path)]) == 0
+        
+        report = json.loads(report_path.read_text())
+        assert report["examples"] == len(TRAINING_DATA)
+        assert report["training_seconds"] > 0
+        classifier = PlumbingIssueClassifier(model_path=model_path)
+        assert isinstance(classifier.engine, HashedNBScorer)
+        assert classifier.model_metadata["training_sources"] == [str(jsonl_path)]
+        assert classifier.classify_issue("Toilet won't flush properly")["category"] == IssueCategory.TOILET
+    
+    def test_fallback_model_trained_from_same_sources(self, tmp_path):
+        """Test that the fallback model comes from the artifact's sources and a stale one isn't used"""
+        jsonl_path = tmp_path / "jobs.jsonl"
+        jsonl_path.write_text("\n".join(json.dumps({"description": text, "category": label}) for text, label in TRAINING_DATA))
+        model_path = str(tmp_path / "trained.model")
+        
+        assert train_main([str(jsonl_path), "--output", model_path, "--fallback", "--fallback-max-examples", "20"]) == 0
+        classifier = PlumbingIssueClassifier(model_path=model_path, cache_size=0, fallback_threshold=0.5)
+        assert classifier.fallback_metadata["training_sources"] == [str(jsonl_path)]
+        assert classifier.fallback_metadata["training_examples"] == 20
+        assert classifier.fallback_metadata["base_content_hash"] == classifier.model_metadata["content_hash"]
+        
+        # Retrained without a fallback model: the one left over belongs to the previous artifact
+        jsonl_path.write_text("\n".join(json.dumps({"description": text, "category": label}) for text, label in TRAINING_DATA * 2))
+        assert train_main([str(jsonl_path), "--output", model_path]) == 0
+        classifier = PlumbingIssueClassifier(model_path=model_path, cache_size=0, fallback_threshold=0.5)
+        assert classifier.fallback_model is None
+        assert "fallback" not in classifier.classify_issue("Kitchen sink is completely clogged")["stage_timings"]
+    
+    def test_retrained_artifact_with_same_version_misses_disk_cache(self, tmp_path):
+        """Test that results cached for one artifact aren't served for another with the same version"""
+        jsonl_path = tmp_path / "jobs.jsonl"
+        jsonl_path.write_text("\n".join(json.dumps({"description": text, "category": label}) for text, label in TRAINING_DATA * 3))
+        cache_path = str(tmp_path / "cache.sqlite")
+        description = "Pipe is rattling inside the wall"
+        
+        sample = PlumbingIssueClassifier(model_path=str(tmp_path / "sample.model"), cache_path=cache_path)
+        sample.classify_issue(description)
+        
+        model_path = str(tmp_path / "trained.model")
+        assert train_main([str(jsonl_path), "--output", model_path]) == 0
+        trained = PlumbingIssueClassifier(model_path=model_path, cache_path=cache_path)
+        
+        assert trained.model_version == sample.model_version
+        cached = trained.classify_issue(description)
+        assert cached["confidence"] == trained.classify_issue(description, use_cache=False)["confidence"]
+        assert cached["confidence"] != sample.classify_issue(description)["confidence"]
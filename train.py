@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Out-of-core model training
+Streams labeled jobs from export_job_report JSON and JSONL files into a model artifact
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+
+from app.cascade import fallback_model_path
+from app.classifier import DEFAULT_MODEL_PATH, MODEL_VERSION
+from app.engine import HashedNBScorer
+from app.training import (DEFAULT_LABEL_FIELDS, DEFAULT_TEXT_FIELD, iter_examples, model_metadata,
+                          train_fallback_model, train_hashed_model)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Train the classifier from job history exports without loading them into memory")
+    parser.add_argument("sources", nargs="+", help="export_job_report .json files and/or .jsonl files")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH, help="Model artifact to write (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Examples vectorized and fitted per step (default: 10000)")
+    parser.add_argument("--n-features", type=int, default=2 ** 16, help="Hashed feature space size (default: 65536)")
+    parser.add_argument("--alpha", type=float, default=1.0, help="Naive Bayes smoothing (default: 1.0)")
+    parser.add_argument("--text-field", default=DEFAULT_TEXT_FIELD, help="Field holding the description (default: description)")
+    parser.add_argument("--label-field", action="append", default=None,
+                        help="Dotted field holding the category; repeat to try several "
+                             f"(default: {', '.join(DEFAULT_LABEL_FIELDS)})")
+    parser.add_argument("--continue-from", default=None, help="Existing hashed model artifact to keep training")
+    parser.add_argument("--model-version", default=MODEL_VERSION, help="Version recorded in the artifact (default: %(default)s)")
+    parser.add_argument("--fallback", action="store_true",
+                        help="Also train the character n-gram fallback model on the same sources, saved next to the output")
+    parser.add_argument("--fallback-max-examples", type=int, default=50000,
+                        help="Examples sampled into memory for the fallback model (default: %(default)s)")
+    parser.add_argument("--report", default=None, help="Also write the training report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    base = None
+    if args.continue_from:
+        base, _ = HashedNBScorer.load(args.continue_from)
+
+    stats = Counter()
+    examples = iter_examples(args.sources, text_field=args.text_field,
+                             label_fields=args.label_field or DEFAULT_LABEL_FIELDS, stats=stats)
+
+    def progress(rows, seconds):
+        print(f"   {rows} examples, {rows / seconds:.0f}/s", file=sys.stderr)
+
+    print(f"🧠 Training from {len(args.sources)} source(s)", file=sys.stderr)
+    model, report = train_hashed_model(examples, chunk_size=args.chunk_size, n_features=args.n_features,
+                                       alpha=args.alpha, base=base, progress=progress)
+    report['skipped'] = stats['skipped']
+    if not report['examples']:
+        print("❌ No labeled examples found", file=sys.stderr)
+        return 1
+
+    metadata = model.save(args.output, model_metadata(report, args.sources, args.model_version))
+    report['output'] = args.output
+
+    peak = report['peak_memory_bytes']
+    print(
+        f"✅ {report['examples']} examples ({report['skipped']} skipped) in {report['training_seconds']:.2f}s, "
+        f"{report['examples_per_second']:.0f}/s, peak memory "
+        f"{f'{peak / 2**20:.1f} MiB' if peak is not None else 'unknown'} -> {args.output}",
+        file=sys.stderr
+    )
+    if args.fallback:
+        # Tied to this artifact by its content hash, so a stale fallback model is never used with it
+        examples = iter_examples(args.sources, text_field=args.text_field, label_fields=args.label_field or DEFAULT_LABEL_FIELDS)
+        fallback, fallback_report = train_fallback_model(examples, max_examples=args.fallback_max_examples)
+        fallback_path = fallback_model_path(args.output)
+        fallback.save(fallback_path, {
+            **model_metadata(fallback_report, args.sources, args.model_version),
+            'base_content_hash': metadata['content_hash'],
+        })
+        report['fallback'] = {**fallback_report, 'output': fallback_path}
+        print(f"✅ Fallback model from {fallback_report['examples']} examples in "
+              f"{fallback_report['training_seconds']:.2f}s -> {fallback_path}", file=sys.stderr)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
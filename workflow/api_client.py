@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Classifier API Client
+Shared, connection-pooled HTTP client for the workflow tools
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# API Configuration
+API_BASE_URL = os.getenv("CLASSIFIER_API_URL", "http://localhost:8000")
+CONNECT_TIMEOUT = float(os.getenv("CLASSIFIER_API_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.getenv("CLASSIFIER_API_READ_TIMEOUT", "10"))
+POOL_SIZE = int(os.getenv("CLASSIFIER_API_POOL_SIZE", "10"))
+# Most items /classify/batch accepts in one request; larger batches are split
+MAX_BATCH_ITEMS = 1000
+
+# Circuit breaker: consecutive failures before calls stop, and how often a down API is probed.
+# Probes use the readiness check, which only passes once the API can classify
+READINESS_PATH = "/health/ready"
+FAILURE_THRESHOLD = int(os.getenv("CLASSIFIER_API_FAILURE_THRESHOLD", "3"))
+PROBE_INTERVAL_SECONDS = float(os.getenv("CLASSIFIER_API_PROBE_INTERVAL_SECONDS", "5"))
+
+# Hedged requests: second replica, and how long to wait for the first before asking it too
+HEDGE_URL = os.getenv("CLASSIFIER_API_HEDGE_URL") or None
+HEDGE_DELAY_SECONDS = float(os.getenv("CLASSIFIER_API_HEDGE_DELAY_MS", "50")) / 1000
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an API that the circuit breaker considers down"""
+
+class CircuitBreaker:
+    """Stops calls to an API after repeated failures until a health probe succeeds.
+
+    After `failure_threshold` consecutive failures the circuit opens: `allow()`
+    returns False, so callers go to their fallback at once instead of waiting
+    out a timeout. A background thread then calls `probe` every
+    `probe_interval` seconds and closes the circuit when it returns True.
+    """
+
+    def __init__(self, probe: Callable[[], bool], failure_threshold: Optional[int] = None,
+                 probe_interval: Optional[float] = None):
+        self.probe = probe
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.probe_interval = probe_interval if probe_interval is not None else PROBE_INTERVAL_SECONDS
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._open = False
+        self.consecutive_failures = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        return "open" if self._open else "closed"
+
+    def allow(self) -> bool:
+        return not self._open
+
+    def record_success(self):
+        if self.consecutive_failures:
+            with self._lock:
+                self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self._trip()
+
+    def trip(self):
+        """Open the circuit now, e.g. after a failed health check"""
+        with self._lock:
+            self._trip()
+
+    def _trip(self):
+        if self._open or self._stopped.is_set():
+            return
+        self._open = True
+        self.opened += 1
+        threading.Thread(target=self._probe_until_healthy, daemon=True).start()
+
+    def _probe_until_healthy(self):
+        while not self._stopped.wait(self.probe_interval):
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    self._open = False
+                    self.consecutive_failures = 0
+                return
+
+    def close(self):
+        """Stop probing"""
+        self._stopped.set()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+        }
+
+def _batch_payload(descriptions: List[str]) -> Dict:
+    return {"requests": [{"description": description} for description in descriptions]}
+
+def _batch_chunks(descriptions: List[str]) -> List[List[str]]:
+    return [descriptions[start:start + MAX_BATCH_ITEMS] for start in range(0, len(descriptions), MAX_BATCH_ITEMS)]
+
+def _batch_responses(body: Dict) -> List[Optional[Dict]]:
+    responses = [None] * len(body["results"])
+    for item in body["results"]:
+        responses[item["index"]] = item.get("response")
+    return responses
+
+class ClassifierClient:
+    """Synchronous client for the classifier API.
+
+    Requests go through one `requests.Session`, so connections are kept alive
+    and reused instead of being opened for every job. The session is safe to
+    share between threads; up to `pool_size` connections are kept open.
+
+    Each replica has a `CircuitBreaker`; while every breaker is open, calls
+    raise `CircuitOpenError` immediately. With a `hedge_url`, a request the
+    first replica hasn't answered within `hedge_delay` seconds (or has failed)
+    is also sent to the second, and whichever answers first is used.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, pool_size: Optional[int] = None,
+                 hedge_url: Optional[str] = None, hedge_delay: Optional[float] = None,
+                 failure_threshold: Optional[int] = None, probe_interval: Optional[float] = None):
+        self.base_url = (base_url or API_BASE_URL).rstrip("/")
+        self.timeout = (connect_timeout if connect_timeout is not None else CONNECT_TIMEOUT,
+                        read_timeout if read_timeout is not None else READ_TIMEOUT)
+        self.pool_size = pool_size or POOL_SIZE
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        hedge_url = hedge_url or HEDGE_URL
+        self.urls = [self.base_url] + ([hedge_url.rstrip("/")] if hedge_url else [])
+        self.breakers = {
+            url: CircuitBreaker(lambda url=url: self._probe(url), failure_threshold, probe_interval)
+            for url in self.urls
+        }
+        self.hedge_delay = hedge_delay if hedge_delay is not None else HEDGE_DELAY_SECONDS
+        self._hedge_pool = ThreadPoolExecutor(max_workers=2 * self.pool_size) if hedge_url else None
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether any replica's circuit is closed"""
+        return any(breaker.allow() for breaker in self.breakers.values())
+
+    def classify(self, description: str, **fields) -> Dict:
+        """Classify one issue; raises on connection errors, non-2xx responses and open circuits"""
+        return self._post("/classify", {"description": description, **fields})
+
+    def classify_batch(self, descriptions: List[str]) -> List[Optional[Dict]]:
+        """Classify several issues in one request.
+
+        Returns the response for each description in order, or None for items
+        the API rejected. Raises like `classify` when the request as a whole fails.
+        More than MAX_BATCH_ITEMS descriptions are sent as several requests.
+        """
+        responses: List[Optional[Dict]] = []
+        for chunk in _batch_chunks(descriptions):
+            responses.extend(_batch_responses(self._post("/classify/batch", _batch_payload(chunk))))
+        return responses
+
+    def health(self) -> bool:
+        """Whether any replica is ready to classify; the circuit of one that isn't is opened"""
+        healthy = False
+        for url in self.urls:
+            if self._probe(url):
+                healthy = True
+            else:
+                self.breakers[url].trip()
+        return healthy
+
+    def _probe(self, url: str) -> bool:
+        try:
+            return self.session.get(f"{url}{READINESS_PATH}", timeout=self.timeout[0]).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _post(self, path: str, payload: Dict) -> Dict:
+        urls = [url for url in self.urls if self.breakers[url].allow()]
+        if not urls:
+            raise CircuitOpenError(f"Classifier API unavailable: {', '.join(self.urls)}")
+        if len(urls) == 1:
+            return self._send(urls[0], path, payload)
+        return self._hedged(urls, path, payload)
+
+    def _send(self, url: str, path: str, payload: Dict) -> Dict:
+        breaker = self.breakers[url]
+        try:
+            response = self.session.post(f"{url}{path}", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            # Connection problems, timeouts and server errors count against the replica, bad requests don't
+            if e.response is None or e.response.status_code >= 500:
+                breaker.record_failure()
+            raise
+        breaker.record_success()
+        return response.json()
+
+    def _hedged(self, urls: List[str], path: str, payload: Dict) -> Dict:
+        futures = [self._hedge_pool.submit(self._send, urls[0], path, payload)]
+        done, _ = wait(futures, timeout=self.hedge_delay)
+        if not done or futures[0].exception() is not None:
+            self.hedged += 1
+            futures.append(self._hedge_pool.submit(self._send, urls[1], path, payload))
+
+        error = None
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            if future is not futures[0]:
+                self.hedge_wins += 1
+            return result
+        raise error
+
+    def stats(self) -> Dict:
+        return {
+            "breakers": {url: breaker.stats() for url, breaker in self.breakers.items()},
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+    def close(self):
+        for breaker in self.breakers.values():
+            breaker.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class AsyncClassifierClient:
+    """asyncio variant of `ClassifierClient`, backed by a pooled `httpx.AsyncClient`.
+
+    Circuit breaking and hedging work as in `ClassifierClient`; the breakers
+    probe a down replica from their own thread.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, pool_size: Optional[int] = None, transport=None,
+                 hedge_url: Optional[str] = None, hedge_delay: Optional[float] = None,
+                 failure_threshold: Optional[int] = None, probe_interval: Optional[float] = None):
+        import httpx
+
+        self.base_url = (base_url or API_BASE_URL).rstrip("/")
+        self.connect_timeout = connect_timeout if connect_timeout is not None else CONNECT_TIMEOUT
+        self.pool_size = pool_size or POOL_SIZE
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout if read_timeout is not None else READ_TIMEOUT,
+                                  connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            transport=transport
+        )
+
+        hedge_url = hedge_url or HEDGE_URL
+        self.urls = [self.base_url] + ([hedge_url.rstrip("/")] if hedge_url else [])
+        self.breakers = {
+            url: CircuitBreaker(lambda url=url: self._probe(url), failure_threshold, probe_interval)
+            for url in self.urls
+        }
+        self.hedge_delay = hedge_delay if hedge_delay is not None else HEDGE_DELAY_SECONDS
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether any replica's circuit is closed"""
+        return any(breaker.allow() for breaker in self.breakers.values())
+
+    async def classify(self, description: str, **fields) -> Dict:
+        """Classify one issue; raises on connection errors, non-2xx responses and open circuits"""
+        return await self._post("/classify", {"description": description, **fields})
+
+    async def classify_batch(self, descriptions: List[str]) -> List[Optional[Dict]]:
+        """Classify several issues in one request; see `ClassifierClient.classify_batch`"""
+        responses: List[Optional[Dict]] = []
+        for chunk in _batch_chunks(descriptions):
+            responses.extend(_batch_responses(await self._post("/classify/batch", _batch_payload(chunk))))
+        return responses
+
+    async def health(self) -> bool:
+        """Whether any replica is ready to classify; the circuit of one that isn't is opened"""
+        import httpx
+
+        healthy = False
+        for url in self.urls:
+            try:
+                ok = (await self.client.get(f"{url}{READINESS_PATH}")).status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                healthy = True
+            else:
+                self.breakers[url].trip()
+        return healthy
+
+    def _probe(self, url: str) -> bool:
+        # Runs on the breaker's thread, outside the event loop
+        try:
+            return requests.get(f"{url}{READINESS_PATH}", timeout=self.connect_timeout).status_code == 200
+        except requests.RequestException:
+            return False
+
+    async def _post(self, path: str, payload: Dict) -> Dict:
+        urls = [url for url in self.urls if self.breakers[url].allow()]
+        if not urls:
+            raise CircuitOpenError(f"Classifier API unavailable: {', '.join(self.urls)}")
+        if len(urls) == 1:
+            return await self._send(urls[0], path, payload)
+        return await self._hedged(urls, path, payload)
+
+    async def _send(self, url: str, path: str, payload: Dict) -> Dict:
+        import httpx
+
+        breaker = self.breakers[url]
+        try:
+            response = await self.client.post(f"{url}{path}", json=payload)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                breaker.record_failure()
+            raise
+        except httpx.HTTPError:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return response.json()
+
+    async def _hedged(self, urls: List[str], path: str, payload: Dict) -> Dict:
+        first = asyncio.ensure_future(self._send(urls[0], path, payload))
+        done, _ = await asyncio.wait([first], timeout=self.hedge_delay)
+        if done and first.exception() is None:
+            return first.result()
+        self.hedged += 1
+        pending = {first, asyncio.ensure_future(self._send(urls[1], path, payload))}
+
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "breakers": {url: breaker.stats() for url, breaker in self.breakers.items()},
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+    async def aclose(self):
+        for breaker in self.breakers.values():
+            breaker.close()
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+_shared_client: Optional[ClassifierClient] = None
+_shared_lock = threading.Lock()
+
+def get_client() -> ClassifierClient:
+    """The process-wide client shared by the workflow tools"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = ClassifierClient()
+        return _shared_client
@@ -4,14 +4,22 @@ Dispatch System for Plumbing Business
 Automatically prioritizes and assigns jobs based on AI classification
 """
 
-import requests
 import json
+import os
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import heapq
 
+from api_client import MAX_BATCH_ITEMS, ClassifierClient, get_client
+
+# Batched intake: calls are classified together once this many are buffered (at most
+# what one /classify/batch request takes), or this long after the first of them came in
+INTAKE_WINDOW_SECONDS = float(os.getenv("DISPATCH_INTAKE_WINDOW_SECONDS", "0.5"))
+INTAKE_BATCH_SIZE = min(int(os.getenv("DISPATCH_INTAKE_BATCH_SIZE", "50")), MAX_BATCH_ITEMS)
+
 class JobPriority(Enum):
     EMERGENCY = 1
     HIGH = 2
@@ -43,12 +51,32 @@ class DispatchJob:
     safety_notes: List[str]
     assigned_technician: Optional[str] = None
 
+@dataclass
+class IncomingCall:
+    customer_name: str
+    phone: str
+    address: str
+    description: str
+    received_at: datetime
+
 class DispatchSystem:
-    def __init__(self):
-        self.api_url = "http://localhost:8000"
+    def __init__(self, api_client: Optional[ClassifierClient] = None,
+                 intake_window_seconds: Optional[float] = None, intake_batch_size: Optional[int] = None):
+        self.api_client = api_client or get_client()
         self.jobs: List[DispatchJob] = []
         self.technicians: List[Technician] = []
         self.job_queue = []  # Priority queue
+        self._queued = 0  # Tie-breaker so jobs with equal priority and time never compare
+        # Guards jobs, the queue and technician state; intake flushes run on a timer thread
+        self._jobs_lock = threading.RLock()
+        
+        # Batched call intake
+        self.intake_window_seconds = intake_window_seconds if intake_window_seconds is not None else INTAKE_WINDOW_SECONDS
+        self.intake_batch_size = min(intake_batch_size or INTAKE_BATCH_SIZE, MAX_BATCH_ITEMS)
+        self._intake: List[IncomingCall] = []
+        self._intake_lock = threading.Lock()
+        self._intake_timer: Optional[threading.Timer] = None
+        self._flush_lock = threading.Lock()
         
         # Initialize technicians
         self._initialize_technicians()
@@ -69,8 +97,50 @@ class DispatchSystem:
         
         # Classify the issue
         result = self._classify_issue(description)
-        classification = result["classification"]
+        return self._queue_job(IncomingCall(customer_name, phone, address, description, datetime.now()),
+                               result["classification"])
+    
+    def submit_call(self, customer_name: str, phone: str, address: str, description: str):
+        """Buffer a new call to be classified and queued with the calls around it"""
+        print(f"\n📞 New call from {customer_name}")
+        print(f"   Issue: {description}")
+        
+        with self._intake_lock:
+            self._intake.append(IncomingCall(customer_name, phone, address, description, datetime.now()))
+            full = len(self._intake) >= self.intake_batch_size
+            if not full and self._intake_timer is None:
+                self._intake_timer = threading.Timer(self.intake_window_seconds, self.flush_intake)
+                self._intake_timer.daemon = True
+                self._intake_timer.start()
         
+        if full:
+            self.flush_intake()
+    
+    def flush_intake(self) -> List[DispatchJob]:
+        """Classify all buffered calls in one batch request and queue them in the order they came in"""
+        # One flush at a time, so batches are queued in the order they were taken
+        with self._flush_lock:
+            with self._intake_lock:
+                calls, self._intake = self._intake, []
+                if self._intake_timer is not None:
+                    self._intake_timer.cancel()
+                    self._intake_timer = None
+            
+            if not calls:
+                return []
+            
+            print(f"\n📦 Classifying {len(calls)} buffered call(s) together")
+            results = self._classify_issues([call.description for call in calls])
+            with self._jobs_lock:
+                return [self._queue_job(call, result["classification"]) for call, result in zip(calls, results)]
+    
+    def get_jobs(self) -> List[DispatchJob]:
+        """Snapshot of all jobs created so far"""
+        with self._jobs_lock:
+            return list(self.jobs)
+    
+    def _queue_job(self, call: IncomingCall, classification: Dict) -> DispatchJob:
+        """Create a job for a classified call and add it to the queue"""
         # Determine priority
         urgency = classification["urgency"]
         if urgency == "emergency":
@@ -83,24 +153,24 @@ class DispatchSystem:
             priority = JobPriority.MEDIUM
         
         # Create dispatch job
-        job = DispatchJob(
-            id=f"JOB-{len(self.jobs) + 1:04d}",
-            customer_name=customer_name,
-            phone=phone,
-            address=address,
-            description=description,
-            classification=classification,
-            priority=priority,
-            created_at=datetime.now(),
-            estimated_duration=classification["estimated_duration"],
-            required_tools=classification["required_tools"],
-            safety_notes=classification["safety_notes"]
-        )
-        
-        self.jobs.append(job)
-        
-        # Add to priority queue (negative priority for max heap)
-        heapq.heappush(self.job_queue, (-priority.value, job.created_at.timestamp(), job))
+        with self._jobs_lock:
+            job = DispatchJob(
+                id=f"JOB-{len(self.jobs) + 1:04d}",
+                customer_name=call.customer_name,
+                phone=call.phone,
+                address=call.address,
+                description=call.description,
+                classification=classification,
+                priority=priority,
+                created_at=call.received_at,
+                estimated_duration=classification["estimated_duration"],
+                required_tools=classification["required_tools"],
+                safety_notes=classification["safety_notes"]
+            )
+            
+            self.jobs.append(job)
+            
+            self._push_job(job)
         
         print(f"✅ Job queued: {job.id}")
         print(f"   Priority: {priority.name}")
@@ -111,19 +181,31 @@ class DispatchSystem:
     
     def _classify_issue(self, description: str) -> Dict:
         """Classify an issue using the API"""
+        if not self.api_client.available:
+            return self._fallback_classification(description)
+        
         try:
-            payload = {"description": description}
-            response = requests.post(f"{self.api_url}/classify", json=payload, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return self._fallback_classification(description)
-                
+            return self.api_client.classify(description)
         except Exception as e:
             print(f"⚠️  API Error: {e}")
             return self._fallback_classification(description)
     
+    def _classify_issues(self, descriptions: List[str]) -> List[Dict]:
+        """Classify several issues with one API request"""
+        responses = [None] * len(descriptions)
+        if self.api_client.available:
+            try:
+                responses = self.api_client.classify_batch(descriptions)
+            except Exception as e:
+                print(f"⚠️  Batch classification of {len(descriptions)} calls failed, using fallback: {e}")
+            else:
+                rejected = sum(1 for response in responses if response is None)
+                if rejected:
+                    print(f"⚠️  API rejected {rejected} of {len(descriptions)} calls, using fallback for them")
+        
+        return [response or self._fallback_classification(description)
+                for description, response in zip(descriptions, responses)]
+    
     def _fallback_classification(self, description: str) -> Dict:
         """Fallback classification"""
         description_lower = description.lower()
@@ -156,19 +238,27 @@ class DispatchSystem:
         """Assign jobs to available technicians"""
         print("\n🔧 Assigning jobs to technicians...")
         
-        while self.job_queue and self._get_available_technicians():
-            # Get highest priority job
-            _, _, job = heapq.heappop(self.job_queue)
-            
-            # Find best technician
-            technician = self._find_best_technician(job)
-            
-            if technician:
-                self._assign_job_to_technician(job, technician)
-            else:
-                # Put job back in queue if no technician available
-                heapq.heappush(self.job_queue, (-job.priority.value, job.created_at.timestamp(), job))
-                break
+        with self._jobs_lock:
+            while self.job_queue and self._get_available_technicians():
+                # Get highest priority job
+                job = heapq.heappop(self.job_queue)[-1]
+                
+                # Find best technician
+                technician = self._find_best_technician(job)
+                
+                if technician:
+                    self._assign_job_to_technician(job, technician)
+                else:
+                    # Put job back in queue if no technician available
+                    self._push_job(job)
+                    break
+    
+    def _push_job(self, job: DispatchJob):
+        """Add a job to the priority queue"""
+        # Negative priority for max heap; jobs of equal priority in order of creation
+        with self._jobs_lock:
+            self._queued += 1
+            heapq.heappush(self.job_queue, (-job.priority.value, job.created_at.timestamp(), self._queued, job))
     
     def _get_available_technicians(self) -> List[Technician]:
         """Get list of available technicians"""
@@ -248,55 +338,57 @@ class DispatchSystem:
     
     def complete_job(self, technician_id: str):
         """Mark a job as completed"""
-        for tech in self.technicians:
-            if tech.id == technician_id and tech.current_job:
-                job_id = tech.current_job
-                tech.current_job = None
-                tech.available = True
-                tech.estimated_completion = None
-                
-                print(f"✅ Job {job_id} completed by {tech.name}")
-                break
+        with self._jobs_lock:
+            for tech in self.technicians:
+                if tech.id == technician_id and tech.current_job:
+                    job_id = tech.current_job
+                    tech.current_job = None
+                    tech.available = True
+                    tech.estimated_completion = None
+                    
+                    print(f"✅ Job {job_id} completed by {tech.name}")
+                    break
     
     def display_dispatch_status(self):
         """Display current dispatch status"""
-        print("\n" + "="*60)
-        print("🚰 DISPATCH SYSTEM STATUS")
-        print("="*60)
-        
-        # Job queue status
-        pending_jobs = len(self.job_queue)
-        total_jobs = len(self.jobs)
-        assigned_jobs = len([j for j in self.jobs if j.assigned_technician])
-        
-        print(f"\n📊 Job Status:")
-        print(f"   Total Jobs: {total_jobs}")
-        print(f"   Pending: {pending_jobs}")
-        print(f"   Assigned: {assigned_jobs}")
-        
-        # Emergency jobs
-        emergency_jobs = [j for j in self.jobs if j.priority == JobPriority.EMERGENCY]
-        if emergency_jobs:
-            print(f"\n🚨 Emergency Jobs:")
-            for job in emergency_jobs:
-                status = "Assigned" if job.assigned_technician else "Pending"
-                print(f"   {job.id}: {job.customer_name} - {status}")
-        
-        # Technician status
-        print(f"\n👥 Technician Status:")
-        for tech in self.technicians:
-            status = "Available" if tech.available else "Busy"
-            current_job = tech.current_job if tech.current_job else "None"
-            print(f"   {tech.name}: {status} - Job: {current_job}")
-        
-        # Pending jobs
-        if self.job_queue:
-            print(f"\n⏳ Next Jobs in Queue:")
-            # Show next 3 jobs
-            temp_queue = self.job_queue.copy()
-            for i in range(min(3, len(temp_queue))):
-                _, _, job = heapq.heappop(temp_queue)
-                print(f"   {job.id}: {job.customer_name} - {job.description[:40]}...")
+        with self._jobs_lock:
+            print("\n" + "="*60)
+            print("🚰 DISPATCH SYSTEM STATUS")
+            print("="*60)
+            
+            # Job queue status
+            pending_jobs = len(self.job_queue)
+            total_jobs = len(self.jobs)
+            assigned_jobs = len([j for j in self.jobs if j.assigned_technician])
+            
+            print(f"\n📊 Job Status:")
+            print(f"   Total Jobs: {total_jobs}")
+            print(f"   Pending: {pending_jobs}")
+            print(f"   Assigned: {assigned_jobs}")
+            
+            # Emergency jobs
+            emergency_jobs = [j for j in self.jobs if j.priority == JobPriority.EMERGENCY]
+            if emergency_jobs:
+                print(f"\n🚨 Emergency Jobs:")
+                for job in emergency_jobs:
+                    status = "Assigned" if job.assigned_technician else "Pending"
+                    print(f"   {job.id}: {job.customer_name} - {status}")
+            
+            # Technician status
+            print(f"\n👥 Technician Status:")
+            for tech in self.technicians:
+                status = "Available" if tech.available else "Busy"
+                current_job = tech.current_job if tech.current_job else "None"
+                print(f"   {tech.name}: {status} - Job: {current_job}")
+            
+            # Pending jobs
+            if self.job_queue:
+                print(f"\n⏳ Next Jobs in Queue:")
+                # Show next 3 jobs
+                temp_queue = self.job_queue.copy()
+                for i in range(min(3, len(temp_queue))):
+                    job = heapq.heappop(temp_queue)[-1]
+                    print(f"   {job.id}: {job.customer_name} - {job.description[:40]}...")
     
     def run_dispatch_demo(self):
         """Run a dispatch system demonstration"""
@@ -312,10 +404,11 @@ class DispatchSystem:
             ("Alice Johnson", "555-0505", "654 Cedar Ln, Downtown", "Water heater making strange noises")
         ]
         
-        # Process calls
+        # Take the calls, then classify and queue them as one batch
         for customer_name, phone, address, description in calls:
-            self.classify_and_queue_job(customer_name, phone, address, description)
-            print("-" * 40)
+            self.submit_call(customer_name, phone, address, description)
+        self.flush_intake()
+        print("-" * 40)
         
         # Assign jobs
         self.assign_jobs()
@@ -4,15 +4,16 @@ Mobile App Interface for Plumbers
 Simplified interface for technicians in the field
 """
 
-import requests
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
 import os
 
+from api_client import ClassifierClient, get_client
+
 class MobilePlumberApp:
-    def __init__(self):
-        self.api_url = "http://localhost:8000"
+    def __init__(self, api_client: Optional[ClassifierClient] = None):
+        self.api_client = api_client or get_client()
         self.current_job = None
         self.technician_id = None
         
@@ -40,22 +41,11 @@ class MobilePlumberApp:
     
     def classify_issue_on_site(self, description: str) -> Dict:
         """Classify an issue using the API while on site"""
+        if not self.api_client.available:
+            return self._fallback_classification(description)
+        
         try:
-            payload = {
-                "description": description
-            }
-            
-            response = requests.post(
-                f"{self.api_url}/classify",
-                json=payload,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return self._fallback_classification(description)
-                
+            return self.api_client.classify(description)
         except Exception as e:
             print(f"⚠️  API Error: {e}")
             return self._fallback_classification(description)
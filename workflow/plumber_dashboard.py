@@ -4,7 +4,6 @@ Plumber Dashboard - Workflow Management System
 Integrates with Smart Plumbing Issue Classifier API
 """
 
-import requests
 import json
 import time
 from datetime import datetime, timedelta
@@ -13,8 +12,7 @@ import os
 from dataclasses import dataclass
 from enum import Enum
 
-# API Configuration
-API_BASE_URL = "http://localhost:8000"
+from api_client import ClassifierClient, get_client
 
 class JobStatus(Enum):
     PENDING = "pending"
@@ -54,7 +52,8 @@ class Job:
     notes: str = ""
 
 class PlumberWorkflow:
-    def __init__(self):
+    def __init__(self, api_client: Optional[ClassifierClient] = None):
+        self.api_client = api_client or get_client()
         self.jobs: List[Job] = []
         self.technicians = [
             "Mike Johnson",
@@ -62,15 +61,16 @@ class PlumberWorkflow:
             "David Chen",
             "Lisa Rodriguez"
         ]
-        self.api_available = self._check_api_health()
+        self._check_api_health()
+    
+    @property
+    def api_available(self) -> bool:
+        """Whether the API is up; tracked by the client's circuit breaker after the initial check"""
+        return self.api_client.available
     
     def _check_api_health(self) -> bool:
-        """Check if the API is available"""
-        try:
-            response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        """Check if the API is ready to classify"""
+        return self.api_client.health()
     
     def classify_issue(self, description: str, customer_info: Dict) -> Dict:
         """Classify a plumbing issue using the API"""
@@ -78,22 +78,7 @@ class PlumberWorkflow:
             return self._fallback_classification(description)
         
         try:
-            payload = {
-                "description": description,
-                **customer_info
-            }
-            
-            response = requests.post(
-                f"{API_BASE_URL}/classify",
-                json=payload,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return self._fallback_classification(description)
-                
+            return self.api_client.classify(description, **customer_info)
         except Exception as e:
             print(f"⚠️  API Error: {e}")
             return self._fallback_classification(description)
@@ -4,7 +4,6 @@ Complete Plumber Workflow Demo
 Shows all systems working together: API, Dashboard, Mobile App, and Dispatch
 """
 
-import time
 import sys
 import os
 
@@ -58,10 +57,11 @@ def run_complete_workflow():
         job = dashboard.create_job(customer, description)
         jobs.append(job)
         
-        # Process through dispatch
-        dispatch_job = dispatch.classify_and_queue_job(customer_name, phone, address, description)
-        
-        time.sleep(1)  # Simulate processing time
+        # Buffer for dispatch; calls are classified together below
+        dispatch.submit_call(customer_name, phone, address, description)
+    
+    # Classify and queue all buffered calls with one batch request
+    dispatch.flush_intake()
     
     # Phase 2: Job assignment and dispatch
     print("\n" + "="*50)